@@ -0,0 +1,10 @@
+"""
+URL configuration of ASGI requests, see `myapp.middleware`.
+
+The routes of `apexiveproject.urls`, with the list and retrieve API views
+served asynchronously by `myapp.async_views.AsyncReadView`.
+"""
+from apexiveproject.urls import urlpatterns as sync_urlpatterns
+from myapp.async_views import async_urlpatterns
+
+urlpatterns = async_urlpatterns(sync_urlpatterns)
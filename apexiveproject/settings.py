@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "myapp.middleware.RequestMetricsMiddleware",
+    "myapp.middleware.ProfilerMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -49,10 +52,15 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "myapp.middleware.AsyncReadViewsMiddleware",
+    "myapp.middleware.PrimaryReplicaMiddleware",
 ]
 
 ROOT_URLCONF = "apexiveproject.urls"
 
+# URL configuration of ASGI requests, serving the API reads with async views
+ASYNC_ROOT_URLCONF = "apexiveproject.async_urls"
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -82,6 +90,53 @@ DATABASES = {
     }
 }
 
+# Aliases of the read replicas, see `myapp.db_router.PrimaryReplicaRouter`.
+DATABASE_REPLICAS = []
+
+# Seconds a client reads from the primary after a write, covering the
+# replication lag, see `myapp.middleware.PrimaryReplicaMiddleware`.
+DATABASE_REPLICA_LAG = 5
+
+# Pragmas run on every new SQLite connection, see `myapp.receivers`.
+SQLITE_PRAGMAS = {}
+
+# Set APEXIVE_DB_PROFILE=production to keep connections open between
+# requests, tune SQLite for concurrent readers and read from the replicas
+# listed in APEXIVE_DB_REPLICAS (comma separated SQLite files, copied from
+# the primary with `manage.py sync_replicas`).
+
+if os.environ.get("APEXIVE_DB_PROFILE") == "production":
+    DATABASES["default"].update(
+        {
+            "CONN_MAX_AGE": 600,
+            "CONN_HEALTH_CHECKS": True,
+            # Seconds a writer waits for the write lock
+            "OPTIONS": {"timeout": 20},
+        }
+    )
+    SQLITE_PRAGMAS = {
+        # Readers do not block the writer, nor the writer the readers
+        "journal_mode": "wal",
+        # Safe with WAL, fsync at checkpoints only
+        "synchronous": "normal",
+        "mmap_size": 256 * 1024 * 1024,
+        # In KiB when negative
+        "cache_size": -64 * 1024,
+        "temp_store": "memory",
+    }
+    for index, name in enumerate(
+        filter(None, os.environ.get("APEXIVE_DB_REPLICAS", "").split(","))
+    ):
+        alias = f"replica{index + 1}"
+        DATABASES[alias] = {
+            **DATABASES["default"],
+            "NAME": name,
+            "TEST": {"MIRROR": "default"},
+        }
+        DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["myapp.db_router.PrimaryReplicaRouter"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -102,6 +157,77 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+#
+# Set APEXIVE_CACHE_DIR to share the cache between worker processes through
+# the file system.
+
+if os.environ.get("APEXIVE_CACHE_DIR"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ["APEXIVE_CACHE_DIR"],
+        },
+        "fragments": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.path.join(
+                os.environ["APEXIVE_CACHE_DIR"], "fragments"
+            ),
+            "OPTIONS": {"MAX_ENTRIES": 100000},
+        },
+    }
+    FRAGMENT_CACHE_ALIAS = "fragments"
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+    # The in-process tier of the fragment cache is the only one
+    FRAGMENT_CACHE_ALIAS = None
+
+# Cache alias and timeout (seconds) of the API response cache.
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Fragment cache of the serialized rows of list responses, see
+# `myapp.fragments`: size in bytes of the in-process tier and lifetime in
+# seconds of the fragments of the shared tier, `FRAGMENT_CACHE_ALIAS`.
+FRAGMENT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+FRAGMENT_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Days the entries of the change feed are kept by
+# `manage.py compact_change_log`, see `myapp.views.ChangeFeedAPIView`.
+CHANGE_LOG_RETENTION_DAYS = 30
+
+# Background deletion of authors, see `myapp.deletion`: books deleted per
+# transaction, seconds the write lock is left to other writers between two
+# batches, and whether jobs run in the request instead of a worker thread.
+DELETION_BATCH_SIZE = 500
+DELETION_BATCH_PAUSE = 0.05
+DELETION_JOBS_INLINE = False
+
+# Encode responses with orjson and msgpack, when they are installed (the
+# "fast" extra), rather than with the pure Python implementations of
+# `myapp.renderers`.
+FAST_RENDERERS = True
+
+# Backend of the book search endpoint, see `myapp.search`. Databases other
+# than SQLite can use "myapp.search.ContainsSearchBackend" until they get
+# an index based backend.
+BOOK_SEARCH_BACKEND = "myapp.search.SQLiteFTSBackend"
+
+# Profiling of live requests, see `myapp.middleware.ProfilerMiddleware`:
+# fraction of the requests profiled at random, number of profiles kept,
+# number of slowest queries explained per profile and lifetime in seconds
+# of the tokens of the X-Profile header.
+PROFILER_SAMPLE_RATE = 0.0
+PROFILER_BUFFER_SIZE = 20
+PROFILER_SLOW_QUERIES = 5
+PROFILER_TOKEN_MAX_AGE = 3600
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -119,6 +245,20 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    "DEFAULT_PAGINATION_CLASS": "myapp.pagination.KeysetPagination",
+    "DEFAULT_RENDERER_CLASSES": [
+        "myapp.renderers.JSONRenderer",
+        "myapp.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "PAGE_SIZE": 100,
+}
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
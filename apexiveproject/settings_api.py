@@ -0,0 +1,53 @@
+"""
+"api" settings profile of the apexiveproject project.
+
+The settings of `apexiveproject.settings` without what only the admin site
+and the browsable API use: their apps, the session, CSRF, message and
+clickjacking middleware, which run on every request, and the template
+engine. `myapp` is a JSON API, its clients authenticate with HTTP Basic
+authentication.
+
+Select it with the DJANGO_SETTINGS_MODULE environment variable, or the
+``--settings`` option of ``manage.py``:
+```bash
+DJANGO_SETTINGS_MODULE=apexiveproject.settings_api gunicorn \\
+    apexiveproject.wsgi
+python manage.py benchmark_startup
+```
+"""
+from apexiveproject.settings import *  # noqa: F401,F403
+from apexiveproject.settings import REST_FRAMEWORK
+
+# The auth and contenttypes apps hold the users of the staff only views
+INSTALLED_APPS = [
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "rest_framework",
+    "myapp",
+]
+
+MIDDLEWARE = [
+    "myapp.middleware.RequestMetricsMiddleware",
+    "myapp.middleware.ProfilerMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "myapp.middleware.AsyncReadViewsMiddleware",
+    "myapp.middleware.PrimaryReplicaMiddleware",
+]
+
+TEMPLATES = []
+
+# Without a table: only the test client, which the benchmarks use, opens
+# sessions
+SESSION_ENGINE = "django.contrib.sessions.backends.signed_cookies"
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "myapp.renderers.JSONRenderer",
+        "myapp.renderers.MessagePackRenderer",
+    ],
+}
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MyappConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "myapp"
+
+    def ready(self):
+        from myapp import receivers  # noqa: F401
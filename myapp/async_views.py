@@ -0,0 +1,304 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.http import Http404, HttpResponse
+from django.urls import URLPattern, URLResolver
+from django.views import View
+from rest_framework.exceptions import APIException
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from myapp.cache import (
+    abuild_response_cache_key,
+    arecord_cache_event,
+    get_cache,
+)
+from myapp.fast_serializers import FastReader, FastReadUnsupported
+from myapp.fragments import fragments
+from myapp.instrumentation import measure
+from myapp.mixins import (
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    FragmentCacheMixin,
+    MultiGetMixin,
+    StreamingListMixin,
+    conditional_response,
+    fingerprint_aggregates,
+    fingerprint_validators,
+    get_date_variant,
+)
+from myapp.pagination import get_view_ordering
+
+
+class AsyncReadView(View):
+    """
+    Async implementation of the list and retrieve actions of a DRF view.
+
+    The wrapped view (`sync_view`, as returned by ``as_view()`` or a router)
+    is instantiated for every request to reuse its queryset, serializer,
+    pagination and validators, but the rows are read with the async ORM
+    (``aget``, ``async for``, ``aaggregate``) and serialized with
+    `FastReader`, whose nested rows are prefetched with one async query per
+    relation. The response cache and conditional requests of
+    `CachedResponseMixin` and `ConditionalGetMixin` are honoured, through
+    the async cache API, and the response is rendered by the renderer DRF
+    negotiates, so the output is the same as the DRF view's.
+
+    Other requests are passed to the DRF view, run in a thread: writes,
+    streamed lists, multi-gets (see `MultiGetMixin`), non JSON renderers
+    (the browsable API), views with permissions or throttles (which may
+    read the session synchronously), and serializers the fast read path
+    can not compile.
+
+    Usage example:
+    ```python
+    path("books/", AsyncReadView.as_view(sync_view=BookList.as_view()))
+    ```
+    """
+
+    sync_view = None
+
+    # Only `dispatch` handles requests, the per-method handlers View uses
+    # to tell async views apart are not defined.
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            view = self.get_drf_view(request, *args, **kwargs)
+            if view is not None:
+                return await self.read(view)
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+    def get_drf_view(self, request, *args, **kwargs):
+        """
+        Return the DRF view set up for `request` like its ``dispatch()``
+        does, or None when the request has to be served by the DRF view.
+        """
+
+        callback = self.sync_view
+        view = callback.cls(**callback.initkwargs)
+        actions = getattr(callback, "actions", None)
+        if actions is not None:
+            actions = {"head": actions.get("get"), **actions}
+            view.action_map = actions
+            for method, action in actions.items():
+                setattr(view, method, getattr(view, action))
+        view.setup(request, *args, **kwargs)
+        view.request = view.initialize_request(request, *args, **kwargs)
+        view.format_kwarg = view.get_format_suffix(**kwargs)
+        view.headers = view.default_response_headers
+
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        self.action = "retrieve" if lookup_url_kwarg in kwargs else "list"
+        if not self.supports(view):
+            return None
+        return view
+
+    def supports(self, view):
+        """
+        Return whether the request to `view` can be served asynchronously.
+        """
+
+        request = view.request
+        if (
+            isinstance(view, MultiGetMixin)
+            and self.action == "list"
+            and view.multi_get_param in request.query_params
+        ):
+            # Multi-gets are answered by `MultiGetMixin.list`
+            return False
+        try:
+            renderer, media_type = view.perform_content_negotiation(request)
+            if isinstance(view, StreamingListMixin) and self.action == "list":
+                if view.get_stream_format() is not None:
+                    return False
+            self.reader = FastReader(view.get_serializer())
+        except (APIException, FastReadUnsupported):
+            return False
+        if renderer.media_type.startswith("text/html"):
+            return False
+        request.accepted_renderer = renderer
+        request.accepted_media_type = media_type
+
+        if view.get_throttles() or not all(
+            isinstance(permission, AllowAny)
+            for permission in view.get_permissions()
+        ):
+            return False
+        paginator = view.paginator
+        return self.action == "retrieve" or paginator is None or hasattr(
+            paginator, "apaginate_queryset"
+        )
+
+    async def read(self, view):
+        try:
+            response = await self.cached_response(view)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        response = view.finalize_response(view.request, response)
+        if not isinstance(response, Response):
+            return response
+
+        # A DRF response would be rendered by Django in a thread
+        with measure("render"):
+            response.render()
+        rendered = HttpResponse(response.content, status=response.status_code)
+        for name, value in response.items():
+            rendered[name] = value
+        return rendered
+
+    async def cached_response(self, view):
+        """
+        Async version of `CachedResponseMixin.cached_response`.
+        """
+
+        if not isinstance(view, CachedResponseMixin):
+            return await self.conditional_get(view)
+
+        request = view.request
+        cache = get_cache()
+        key = await abuild_response_cache_key(
+            request, view.cache_models, get_date_variant(view)
+        )
+        cached = await cache.aget(key)
+        if cached is not None:
+            await arecord_cache_event("hit")
+            data, headers = cached
+            response = conditional_response(
+                request, headers.get("ETag"), headers.get("Last-Modified")
+            )
+            if response is None:
+                response = Response(data)
+                for name, value in headers.items():
+                    response[name] = value
+            response["X-Cache"] = "HIT"
+            return response
+
+        await arecord_cache_event("miss")
+        response = await self.conditional_get(view)
+        if isinstance(response, Response) and response.status_code == 200:
+            headers = {
+                name: response[name]
+                for name in view.cached_headers
+                if response.has_header(name)
+            }
+            await cache.aset(
+                key, (response.data, headers), view.get_cache_timeout()
+            )
+        response["X-Cache"] = "MISS"
+        return response
+
+    async def conditional_get(self, view):
+        """
+        Async version of `ConditionalGetMixin.conditional_get`.
+        """
+
+        if not isinstance(view, ConditionalGetMixin):
+            return Response(await self.get_data(view))
+
+        request = view.request
+        try:
+            aggregates = [
+                await queryset.order_by().aaggregate(**fingerprint_aggregates())
+                for queryset in view.get_fingerprint_querysets()
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        etag, last_modified = fingerprint_validators(
+            request, aggregates, view.get_fingerprint_extra()
+        )
+        response = conditional_response(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        response = Response(await self.get_data(view))
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = last_modified
+        return response
+
+    async def get_data(self, view):
+        """
+        Return the serialized object or page of objects requested.
+        """
+
+        queryset = view.filter_queryset(view.get_queryset())
+        if self.action == "retrieve":
+            lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+            lookup = {view.lookup_field: view.kwargs[lookup_url_kwarg]}
+            try:
+                row = await self.reader.rows(queryset.filter(**lookup)).aget()
+            except (ObjectDoesNotExist, TypeError, ValueError, ValidationError):
+                raise Http404
+            return (await self.reader.arepresent([row]))[0]
+
+        if isinstance(view, FragmentCacheMixin) and view.use_fragment_cache():
+            rows = view.get_version_rows(queryset)
+            represent = partial(self.get_fragments, view)
+        else:
+            ordering = [item.lstrip("-") for item in get_view_ordering(view)]
+            rows = self.reader.rows(queryset, extra=ordering)
+            represent = self.reader.arepresent
+        paginator = view.paginator
+        if paginator is None:
+            return await represent([row async for row in rows])
+        page = await paginator.apaginate_queryset(rows, view.request, view)
+        return paginator.get_paginated_data(await represent(page))
+
+    async def get_fragments(self, view, rows):
+        """
+        Async version of `FragmentCacheMixin.get_fragments`.
+        """
+
+        keys = view.get_fragment_keys(rows)
+        found = await fragments.aget_many(keys)
+        missing = view.get_missing_fragments(rows, keys, found)
+        if missing:
+            queryset = view.get_queryset().filter(pk__in=list(missing))
+            rows = [row async for row in self.reader.rows(queryset)]
+            items = await self.reader.arepresent(rows)
+            encoded = view.encode_fragments(
+                missing,
+                zip((row[self.reader.pk_column] for row in rows), items),
+            )
+            await fragments.aset_many(encoded)
+            found.update(encoded)
+        return view.assemble_fragments(keys, found)
+
+
+def async_urlpatterns(patterns):
+    """
+    Return a copy of `patterns` where the routes of DRF views whose GET
+    action is list or retrieve are served by `AsyncReadView`.
+    """
+
+    result = []
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            pattern = URLResolver(
+                pattern.pattern,
+                async_urlpatterns(pattern.url_patterns),
+                pattern.default_kwargs,
+                pattern.app_name,
+                pattern.namespace,
+            )
+        elif _is_read_view(pattern.callback):
+            view = AsyncReadView.as_view(sync_view=pattern.callback)
+            view.csrf_exempt = True
+            pattern = URLPattern(
+                pattern.pattern, view, pattern.default_args, pattern.name
+            )
+        result.append(pattern)
+    return result
+
+
+def _is_read_view(callback):
+    cls = getattr(callback, "cls", None)
+    if cls is None or not issubclass(cls, GenericAPIView):
+        return False
+    actions = getattr(callback, "actions", None)
+    if actions is None:
+        return hasattr(cls, "get")
+    return actions.get("get") in ("list", "retrieve")
@@ -0,0 +1,572 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.base import BaseHandler
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from django.urls import ResolverMatch, URLResolver, reverse
+from rest_framework.test import APIClient
+
+from myapp import urls
+from myapp import renderers
+from myapp.cache import get_cache
+from myapp.changelog import encode_token
+from myapp.eager_loading import plan_queryset
+from myapp.fast_serializers import FastReader
+from myapp.fragments import fragments
+from myapp.models import Author, Book, DeletionJob
+from myapp.profiling import PROFILE_HEADER, make_token, profiles
+from myapp.seeding import generate_catalog
+from myapp.serializers import AuthorSerializer, BookSerializer
+
+
+class BenchmarkCase:
+    """
+    A request of the endpoint benchmark suite, see `run_benchmarks`.
+
+    Attributes:
+        name (str): The name of the case in the results.
+        url_name (str): The name of the route requested, from `myapp.urls`.
+        query_budget (int): The maximum number of queries the request may
+            run, whatever the size of the catalogue.
+        params (dict): The query parameters of the request, or a callable
+            returning them, read from the seeded catalogue.
+        url_kwargs (callable): Returns the arguments of the route, read
+            from the seeded catalogue.
+        headers (callable): Returns the headers of the request.
+        user (callable): Returns the user the request is authenticated as.
+        method (str): The method of the request, ``get`` or ``post``.
+        data (callable): Returns the JSON body of the request.
+    """
+
+    def __init__(self, name, url_name, query_budget, params=None,
+                 url_kwargs=None, headers=None, user=None, method="get",
+                 data=None):
+        self.name = name
+        self.url_name = url_name
+        self.query_budget = query_budget
+        self.params = params or {}
+        self.url_kwargs = url_kwargs
+        self.headers = headers
+        self.user = user
+        self.method = method
+        self.data = data
+
+    def get_params(self):
+        return self.params() if callable(self.params) else self.params
+
+    def get_url(self):
+        kwargs = self.url_kwargs() if self.url_kwargs else None
+        return reverse(self.url_name, kwargs=kwargs)
+
+
+def prolific_author():
+    return {"pk": Author.objects.order_by("-book_count", "pk")[0].pk}
+
+
+def first_book():
+    return {"pk": Book.objects.order_by("pk")[0].pk}
+
+
+def latest_ids(model, count=100):
+    # Latest first, not in the order of the primary key index
+    queryset = model.objects.order_by("-pk").values_list("pk", flat=True)
+    return list(queryset[:count])
+
+
+def book_ids():
+    return {"ids": latest_ids(Book)}
+
+
+def author_ids():
+    return {"ids": latest_ids(Author)}
+
+
+def deletion_job():
+    author = Author.objects.order_by("pk")[0]
+    job = DeletionJob.objects.create(
+        author_id=author.pk, total_books=author.book_count
+    )
+    return {"pk": job.pk}
+
+
+def latest_profile():
+    return {"pk": profiles.list()[0]["id"]}
+
+
+def profile_headers():
+    return {PROFILE_HEADER: make_token()}
+
+
+def staff_user():
+    return User(username="benchmark", is_staff=True)
+
+
+CASES = [
+    # The lists read the versions of the page's rows, then the rows missing
+    # from the fragment cache (see `myapp.mixins.FragmentCacheMixin`), all
+    # of them as it is cleared
+    BenchmarkCase("api root", "api-root", 0),
+    BenchmarkCase("author list", "author-list", 4),
+    BenchmarkCase(
+        "author list, selected fields",
+        "author-list",
+        4,
+        params={"fields": "name,books.title"},
+    ),
+    BenchmarkCase("author list, fast", "author-list", 4, {"fast": "true"}),
+    BenchmarkCase(
+        "author list, latest books",
+        "author-list",
+        4,
+        params={"books_limit": "3", "books_ordering": "-published_date"},
+    ),
+    BenchmarkCase(
+        "author detail", "author-detail", 3, url_kwargs=prolific_author
+    ),
+    BenchmarkCase("book list", "book-list", 4),
+    BenchmarkCase(
+        "book list, expanded author",
+        "book-list",
+        4,
+        params={"expand": "author"},
+    ),
+    BenchmarkCase("book list, fast", "book-list", 4, {"fast": "true"}),
+    BenchmarkCase(
+        "book list, by age",
+        "book-list",
+        4,
+        params={"max_age_days": "3650", "ordering": "since_creation_in_days"},
+    ),
+    BenchmarkCase("book detail", "book-detail", 3, url_kwargs=first_book),
+    BenchmarkCase("book search", "book-search", 1, {"q": "shadow riv"}),
+    # The fingerprint of the requested books and of the authors, then the
+    # books
+    BenchmarkCase(
+        "book multi-get",
+        "book-list",
+        3,
+        params=lambda: {"ids": ",".join(map(str, latest_ids(Book)))},
+    ),
+    BenchmarkCase(
+        "book multi-get, POST", "book-multi-get", 1, method="post",
+        data=book_ids,
+    ),
+    BenchmarkCase(
+        "author multi-get, POST", "author-multi-get", 2, method="post",
+        data=author_ids,
+    ),
+    BenchmarkCase(
+        "authors with multiple books", "authors_with_multiple_books_api", 4
+    ),
+    BenchmarkCase(
+        "books published after",
+        "published-after-book-list",
+        4,
+        url_kwargs=lambda: {"date": "2020-01-01"},
+    ),
+    BenchmarkCase("catalogue statistics", "catalog-stats", 2),
+    # The compaction horizon, then the changes
+    BenchmarkCase(
+        "changes, first page", "changes", 2, {"since": encode_token(0)}
+    ),
+    BenchmarkCase(
+        "deletion job", "deletion-job-detail", 1, url_kwargs=deletion_job
+    ),
+    BenchmarkCase("metrics", "metrics", 0),
+    # Four queries and their plans
+    BenchmarkCase(
+        "book list, profiled", "book-list", 8, headers=profile_headers
+    ),
+    BenchmarkCase("profile list", "profile-list", 0, user=staff_user),
+    BenchmarkCase(
+        "profile detail",
+        "profile-detail",
+        0,
+        url_kwargs=latest_profile,
+        user=staff_user,
+    ),
+]
+
+
+def route_names(patterns=urls.urlpatterns):
+    """
+    Return the names of the routes of `patterns`.
+    """
+
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= route_names(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def uncovered_routes(cases=CASES):
+    """
+    Return the names of the routes of `myapp.urls` no case requests.
+    """
+
+    return route_names() - {case.url_name for case in cases}
+
+
+def run_benchmarks(sizes, repeat=5, seed=0, cases=CASES, stdout=None):
+    """
+    Time every case of `cases` against catalogues of every size of `sizes`
+    (a number of books, with one author per ten books) and return the
+    results, one dict per case and size.
+
+    Every catalogue is generated in a transaction rolled back once its
+    cases are timed. The response and fragment caches are cleared before
+    every request, so the timings are those of a cache miss.
+    """
+
+    results = []
+    client = APIClient()
+    for size in sizes:
+        with transaction.atomic():
+            generate_catalog(max(size // 10, 1), size, seed)
+            for case in cases:
+                results.append(run_case(client, case, size, repeat))
+                if stdout is not None:
+                    stdout.write(format_result(results[-1]))
+            transaction.set_rollback(True)
+    return results
+
+
+def run_case(client, case, size, repeat):
+    url = case.get_url()
+    params = case.get_params()
+    data = case.data() if case.data else None
+    headers = case.headers() if case.headers else None
+    client.force_authenticate(case.user() if case.user else None)
+    timings = []
+    for _ in range(repeat):
+        get_cache().clear()
+        fragments.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            if case.method == "post":
+                response = client.post(
+                    url, data, format="json", headers=headers
+                )
+            else:
+                response = client.get(url, params, headers=headers)
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise AssertionError(
+                f"{case.name}: {url} returned {response.status_code}."
+            )
+    return {
+        "case": case.name,
+        "size": size,
+        "queries": len(queries),
+        "query_budget": case.query_budget,
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+    }
+
+
+def format_result(result):
+    return (
+        f"{result['case']} ({result['size']} books): "
+        f"{result['queries']}/{result['query_budget']} queries, "
+        f"{result['median_ms']:.1f} ms"
+    )
+
+
+def over_budget(results):
+    """
+    Return a message for every result whose request ran more queries than
+    its budget.
+    """
+
+    return [
+        f"{result['case']} ({result['size']} books) ran "
+        f"{result['queries']} queries, its budget is "
+        f"{result['query_budget']}."
+        for result in results
+        if result["queries"] > result["query_budget"]
+    ]
+
+
+def regressions(results, baseline, threshold=0.25, min_delta_ms=1.0):
+    """
+    Return a message for every result whose median time exceeds the one of
+    the same case and size in `baseline` (previous results) by more than
+    `threshold` (a fraction) and `min_delta_ms`, which keeps the noise of
+    the fastest requests from failing the benchmark.
+    """
+
+    previous = {
+        (result["case"], result["size"]): result["median_ms"]
+        for result in baseline
+    }
+    messages = []
+    for result in results:
+        before = previous.get((result["case"], result["size"]))
+        if before is None:
+            continue
+        delta = result["median_ms"] - before
+        if delta > before * threshold and delta > min_delta_ms:
+            messages.append(
+                f"{result['case']} ({result['size']} books) took "
+                f"{result['median_ms']:.1f} ms, {before:.1f} ms in the "
+                "baseline."
+            )
+    return messages
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Run the block against a test database, created for it and destroyed
+    after it, with a private response cache.
+    """
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        with override_settings(
+            CACHES={
+                **settings.CACHES,
+                "benchmark": {
+                    "BACKEND": "django.core.cache.backends.locmem."
+                    "LocMemCache",
+                },
+            },
+            RESPONSE_CACHE_ALIAS="benchmark",
+        ):
+            yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+def available_encoders():
+    """
+    Return the (name, encode) pairs of the response encoders of
+    `myapp.renderers`, including the accelerated ones that are installed.
+    """
+
+    encoders = [("json", renderers.stdlib_json_dumps)]
+    if renderers.orjson is not None:
+        encoders.append(("orjson", renderers.orjson_dumps))
+    encoders.append(("msgpack, pure Python", renderers.pack))
+    if renderers.msgpack is not None:
+        encoders.append(("msgpack", renderers.msgpack_packb))
+    return encoders
+
+
+def run_renderer_benchmarks(size, repeat=5, seed=0, stdout=None):
+    """
+    Time every available encoder (see `available_encoders`) on the
+    representation of a catalogue of `size` books, with one author per ten
+    books, and return the results, one dict per dataset and encoder with
+    the payload size in bytes.
+
+    The datasets are the books and the authors with their books, as the
+    serializers represent them, and the books as the fast read path does,
+    with dates left for the encoders.
+    """
+
+    with transaction.atomic():
+        generate_catalog(max(size // 10, 1), size, seed)
+        books = Book.objects.order_by("pk")
+        authors = Author.objects.order_by("pk")
+        datasets = {
+            "books": BookSerializer(
+                plan_queryset(books, BookSerializer()), many=True
+            ).data,
+            "authors": AuthorSerializer(
+                plan_queryset(authors, AuthorSerializer()), many=True
+            ).data,
+            "books, fast read": FastReader(BookSerializer()).serialize(books),
+        }
+        transaction.set_rollback(True)
+
+    results = []
+    for dataset, data in datasets.items():
+        for name, encode in available_encoders():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                content = encode(data)
+                timings.append((time.perf_counter() - started) * 1000)
+            results.append(
+                {
+                    "dataset": dataset,
+                    "encoder": name,
+                    "size": size,
+                    "bytes": len(content),
+                    "median_ms": round(statistics.median(timings), 3),
+                    "min_ms": round(min(timings), 3),
+                }
+            )
+            if stdout is not None:
+                stdout.write(
+                    f"{dataset} ({size} books), {name}: "
+                    f"{len(content)} bytes, {results[-1]['median_ms']:.1f} ms"
+                )
+    return results
+
+
+# Settings modules of the profiles compared by `run_startup_benchmarks`
+SETTINGS_PROFILES = {
+    "default": "apexiveproject.settings",
+    "api": "apexiveproject.settings_api",
+}
+
+# Run by the processes of `measure_startup`, printing their measurements
+STARTUP_SCRIPT = """
+import json
+import time
+
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+
+get_wsgi_application()
+get_resolver().url_patterns
+import_ms = (time.perf_counter() - started) * 1000
+
+from myapp.benchmarks import time_middleware
+
+print(json.dumps({
+    "import_ms": import_ms,
+    "middleware_us": time_middleware(%(requests)d),
+}))
+"""
+
+
+def empty_view(request):
+    return HttpResponse(b"{}", content_type="application/json")
+
+
+class MiddlewareOnlyHandler(BaseHandler):
+    """
+    Request handler serving every request with `empty_view`, without
+    resolving its URL, so that only the middleware is timed.
+    """
+
+    def resolve_request(self, request):
+        match = ResolverMatch(empty_view, (), {}, route="benchmark/")
+        request.resolver_match = match
+        return match
+
+
+def time_middleware(requests=1000, rounds=5):
+    """
+    Return the time in microseconds the middleware of the `MIDDLEWARE`
+    setting adds to a GET request of the book list: the median of `rounds`
+    rounds of `requests` requests, less the one of a handler without
+    middleware.
+    """
+
+    path = reverse("book-list")
+    factory = RequestFactory()
+
+    def time_requests():
+        handler = MiddlewareOnlyHandler()
+        handler.load_middleware()
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(requests):
+                request = factory.get(path, HTTP_HOST="localhost")
+                handler.get_response(request).close()
+            timings.append((time.perf_counter() - started) / requests)
+        return statistics.median(timings)
+
+    with_middleware = time_requests()
+    with override_settings(MIDDLEWARE=[]):
+        without_middleware = time_requests()
+    return round((with_middleware - without_middleware) * 1_000_000, 1)
+
+
+def measure_startup(settings_module, requests=1000):
+    """
+    Return the startup and overhead measurements of a new process running
+    with `settings_module`: the time in milliseconds it takes to load the
+    WSGI application and the URL configuration, with the views it imports,
+    the time in milliseconds of ``manage.py check`` (a process of its own,
+    the interpreter's startup included) and the per request middleware
+    time in microseconds (see `time_middleware`).
+    """
+
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+    process = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT % {"requests": requests}],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    measurements = json.loads(process.stdout.splitlines()[-1])
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "manage.py", "check"],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        check=True,
+    )
+    measurements["check_ms"] = (time.perf_counter() - started) * 1000
+    return measurements
+
+
+def run_startup_benchmarks(
+    profiles=SETTINGS_PROFILES, repeat=5, requests=1000, stdout=None
+):
+    """
+    Measure the startup and per request overhead of every settings profile
+    of `profiles` (a dict of names and settings modules) `repeat` times,
+    with `measure_startup`, and return the results, one dict per profile
+    with the median of every measurement.
+
+    A worker process pays the startup once and the middleware time on
+    every request, so comparing the profiles tells what a worker saves.
+    """
+
+    results = []
+    for name, settings_module in profiles.items():
+        runs = [
+            measure_startup(settings_module, requests)
+            for _ in range(repeat)
+        ]
+        results.append(
+            {
+                "profile": name,
+                "settings": settings_module,
+                **{
+                    key: round(statistics.median(run[key] for run in runs), 1)
+                    for key in ("import_ms", "check_ms", "middleware_us")
+                },
+            }
+        )
+        if stdout is not None:
+            stdout.write(
+                f"{name} ({settings_module}): import "
+                f"{results[-1]['import_ms']:.1f} ms, check "
+                f"{results[-1]['check_ms']:.1f} ms, middleware "
+                f"{results[-1]['middleware_us']:.1f} us per request"
+            )
+    return results
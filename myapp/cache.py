@@ -0,0 +1,160 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from myapp.db_router import use_replicas
+
+GENERATION_KEY = "myapp:generation:{}"
+STATS_KEY = "myapp:response-cache:{}"
+
+
+def get_cache():
+    """
+    Return the cache backend used for API responses, selected with the
+    `RESPONSE_CACHE_ALIAS` setting.
+    """
+
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def _generation_key(model):
+    return GENERATION_KEY.format(model._meta.label_lower)
+
+
+def get_generations(models):
+    """
+    Return the current generation of each model in `models`.
+
+    A missing generation, never set or evicted, is initialized to the
+    current time in milliseconds so that it can not fall back to a value
+    used by entries cached before the eviction.
+    """
+
+    cache = get_cache()
+    keys = [_generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+async def aget_generations(models):
+    """
+    Async version of `get_generations`.
+    """
+
+    cache = get_cache()
+    keys = [_generation_key(model) for model in models]
+    generations = await cache.aget_many(keys)
+    for key in keys:
+        if key not in generations:
+            await cache.aadd(key, int(time.time() * 1000), timeout=None)
+            generations[key] = await cache.aget(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(model):
+    """
+    Invalidate every cached response depending on `model`.
+
+    The generation is bumped immediately and once more when the current
+    transaction commits, so that a response cached from the pre-commit
+    state in between is not served after the commit.
+    """
+
+    def bump():
+        key = _generation_key(model)
+        try:
+            get_cache().incr(key)
+        except ValueError:
+            get_generations([model])
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def record_cache_event(event):
+    """
+    Count a response cache `event` ("hit" or "miss").
+    """
+
+    cache = get_cache()
+    key = STATS_KEY.format(event)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+async def arecord_cache_event(event):
+    """
+    Async version of `record_cache_event`.
+    """
+
+    cache = get_cache()
+    key = STATS_KEY.format(event)
+    if not await cache.aadd(key, 1, timeout=None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aadd(key, 1, timeout=None)
+
+
+def get_cache_stats():
+    """
+    Return the number of response cache hits and misses.
+    """
+
+    cache = get_cache()
+    counts = cache.get_many([STATS_KEY.format(e) for e in ("hit", "miss")])
+    return {
+        "hits": counts.get(STATS_KEY.format("hit"), 0),
+        "misses": counts.get(STATS_KEY.format("miss"), 0),
+    }
+
+
+def build_response_cache_key(request, models, extra=()):
+    """
+    Return the cache key of the response to `request`, covering the host,
+    path, query parameters, negotiated media type, the generations of
+    `models`, whether the request reads from the replicas and the `extra`
+    values the response depends on, such as the current date.
+    """
+
+    return _response_cache_key(request, get_generations(models), extra)
+
+
+async def abuild_response_cache_key(request, models, extra=()):
+    """
+    Async version of `build_response_cache_key`.
+    """
+
+    return _response_cache_key(
+        request, await aget_generations(models), extra
+    )
+
+
+def _response_cache_key(request, generations, extra):
+    query = sorted(
+        (name, value)
+        for name, values in request.GET.lists()
+        for value in values
+    )
+    parts = [
+        request.get_host(),
+        request.path,
+        repr(query),
+        getattr(request, "accepted_media_type", ""),
+        repr(generations),
+        # Replica reads may lag, they are not served to pinned clients
+        repr(use_replicas.get()),
+        repr(tuple(extra)),
+    ]
+    digest = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+    return f"myapp:response:{digest}"
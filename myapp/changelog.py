@@ -0,0 +1,127 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from myapp.models import ChangeLog, ChangeLogCompaction
+
+TOKEN_PREFIX = "changes:"
+
+
+class ChangesExpired(APIException):
+    """
+    Raised when the change feed is read from a position whose following
+    entries were deleted by the compaction: the client has to pull the
+    lists again.
+    """
+
+    status_code = status.HTTP_410_GONE
+    default_detail = (
+        "The changes since this token are no longer available, pull the "
+        "lists again."
+    )
+    default_code = "gone"
+
+
+def encode_token(position):
+    """
+    Return the opaque token of the change feed `position`, the primary key
+    of the last `ChangeLog` entry the client has read.
+    """
+
+    data = f"{TOKEN_PREFIX}{position}".encode()
+    return urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_token(token):
+    """
+    Return the position of the change feed `token`, raising ValueError when
+    it is not a token of `encode_token`.
+    """
+
+    try:
+        data = urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+    except (Base64Error, UnicodeDecodeError):
+        raise ValueError(token)
+    if not data.startswith(TOKEN_PREFIX):
+        raise ValueError(token)
+    position = int(data[len(TOKEN_PREFIX):])
+    if position < 0:
+        raise ValueError(token)
+    return position
+
+
+def get_horizon():
+    """
+    Return the position up to which entries were deleted by the compaction,
+    0 when none was.
+    """
+
+    horizon = ChangeLogCompaction.objects.aggregate(Max("horizon"))
+    return horizon["horizon__max"] or 0
+
+
+def get_current_position():
+    """
+    Return the position of the latest change.
+    """
+
+    latest = ChangeLog.objects.aggregate(Max("pk"))["pk__max"]
+    return max(latest or 0, get_horizon())
+
+
+def read_changes(position, limit):
+    """
+    Return the first `limit` entries after `position`, as dicts, and whether
+    more follow. Raises `ChangesExpired` when some of them were deleted.
+    """
+
+    if position < get_horizon():
+        raise ChangesExpired
+    entries = list(
+        ChangeLog.objects.filter(pk__gt=position)
+        .order_by("pk")
+        .values("pk", "model_name", "object_id", "action", "changed_at")[
+            : limit + 1
+        ]
+    )
+    return [
+        {
+            "token": encode_token(entry["pk"]),
+            "model": entry["model_name"],
+            "id": entry["object_id"],
+            "action": entry["action"],
+            "changed_at": entry["changed_at"],
+        }
+        for entry in entries[:limit]
+    ], len(entries) > limit
+
+
+def compact(retention, collapse=True):
+    """
+    Delete the entries older than `retention` (a timedelta), recording the
+    position clients can no longer read from, and with `collapse` the
+    entries followed by a later entry of the same row, which clients
+    applying the latest entry of every row do not need. Returns the numbers
+    of expired and superseded entries deleted.
+    """
+
+    with transaction.atomic():
+        cutoff = timezone.now() - retention
+        horizon = ChangeLog.objects.filter(changed_at__lt=cutoff).aggregate(
+            Max("pk")
+        )["pk__max"]
+        expired = 0
+        if horizon is not None:
+            # Up to the latest expired entry, so that the deleted entries
+            # are the ones before the horizon
+            expired, _ = ChangeLog.objects.filter(pk__lte=horizon).delete()
+            ChangeLogCompaction.objects.create(horizon=horizon)
+        superseded = 0
+        if collapse:
+            superseded, _ = ChangeLog.objects.superseded().delete()
+    return expired, superseded
@@ -0,0 +1,49 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Whether the reads of the current request may be served by a replica, set
+# by `myapp.middleware.PrimaryReplicaMiddleware`. Off outside requests, so
+# that management commands and shells always read the primary.
+use_replicas = ContextVar("use_replicas", default=False)
+
+
+def get_replicas():
+    """
+    Return the database aliases of the read replicas, from the
+    `DATABASE_REPLICAS` setting.
+    """
+
+    return list(getattr(settings, "DATABASE_REPLICAS", ()))
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router sending the reads of read requests to a random replica
+    and every other query to the primary (``default``) database.
+
+    Replicas only receive reads while `use_replicas` is set, which
+    `PrimaryReplicaMiddleware` does for safe requests of clients that have
+    not written recently, so that a client reads its own writes even when
+    the replicas lag behind the primary.
+    """
+
+    primary = "default"
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if replicas and use_replicas.get():
+            return random.choice(replicas)
+        return self.primary
+
+    def db_for_write(self, model, **hints):
+        return self.primary
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db not in get_replicas()
@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from myapp.cache import bump_generation
+from myapp.models import (
+    Author,
+    Book,
+    ChangeLog,
+    DeletionJob,
+    MonthlyBookCount,
+)
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the executor of the process running the deletion jobs, with a
+    single worker, so that the jobs do not compete for the write lock.
+    """
+
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="deletion"
+            )
+        return _executor
+
+
+def start_author_deletion(author):
+    """
+    Hide `author` and its books from the API, the statistics included, and
+    return the `DeletionJob` deleting them in the background, started once
+    the transaction commits.
+    """
+
+    with transaction.atomic():
+        Author.objects.filter(pk=author.pk).update(
+            is_hidden=True, updated_at=timezone.now()
+        )
+        # Gone for the clients of the change feed from now on
+        ChangeLog.objects.record(Author, ChangeLog.DELETE, [author.pk])
+        # And from the statistics
+        months = Counter()
+        months.subtract(
+            Book.objects.filter(author_id=author.pk).count_by_month()
+        )
+        MonthlyBookCount.objects.apply_changes(months)
+        job = DeletionJob.objects.create(
+            author_id=author.pk, total_books=author.book_count
+        )
+        transaction.on_commit(lambda: submit(job.pk))
+    bump_generation(Author)
+    bump_generation(Book)
+    bump_generation(MonthlyBookCount)
+    return job
+
+
+def submit(job_id):
+    """
+    Run the deletion job `job_id` on the background worker, or right away
+    with the `DELETION_JOBS_INLINE` setting.
+    """
+
+    if getattr(settings, "DELETION_JOBS_INLINE", False):
+        run_deletion_job(job_id)
+    else:
+        get_executor().submit(_run_in_worker, job_id)
+
+
+def _run_in_worker(job_id):
+    try:
+        run_deletion_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def run_deletion_job(job_id):
+    """
+    Delete the books of the author of the job `job_id` in batches of
+    `DELETION_BATCH_SIZE`, one transaction each, then the author. The write
+    lock is released between batches, for `DELETION_BATCH_PAUSE` seconds,
+    so that other writes are not held up for the whole deletion.
+
+    The book counts, the change log and the response cache follow every
+    batch (see `BookQuerySet.bulk_delete`). A failed or interrupted job can
+    be run again, ``manage.py run_deletion_jobs`` resumes them.
+    """
+
+    batch_size = getattr(settings, "DELETION_BATCH_SIZE", 500)
+    pause = getattr(settings, "DELETION_BATCH_PAUSE", 0.05)
+    job = DeletionJob.objects.get(pk=job_id)
+    DeletionJob.objects.filter(pk=job.pk).update(
+        status=DeletionJob.RUNNING, error=""
+    )
+    try:
+        while True:
+            with transaction.atomic():
+                pks = list(
+                    Book.objects.filter(author_id=job.author_id)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)[:batch_size]
+                )
+                deleted = Book.objects.filter(pk__in=pks).bulk_delete()
+                DeletionJob.objects.filter(pk=job.pk).update(
+                    deleted_books=F("deleted_books") + deleted
+                )
+            if len(pks) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+        with transaction.atomic():
+            # The books added since the last batch, then the author
+            Book.objects.filter(author_id=job.author_id).bulk_delete()
+            Author.objects.filter(pk=job.author_id).delete()
+            DeletionJob.objects.filter(pk=job.pk).update(
+                status=DeletionJob.DONE, finished_at=timezone.now()
+            )
+    except Exception as error:
+        logger.exception("Deletion job %s failed", job.pk)
+        DeletionJob.objects.filter(pk=job.pk).update(
+            status=DeletionJob.FAILED,
+            error=str(error),
+            finished_at=timezone.now(),
+        )
@@ -0,0 +1,265 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+class QueryPlan:
+    """
+    Describes how to load the rows a serializer reads.
+
+    A plan is built for one model and collects the columns to load with
+    ``only()``, the forward relations to join with ``select_related()`` and,
+    for every reverse or many-to-many relation, a nested plan used as the
+    queryset of a ``Prefetch``.
+
+    Attributes:
+        - model (Model): The model the plan loads.
+        - columns (set): Lookups (``"title"``, ``"author__name"``) of the
+          columns to load.
+        - full (set): Lookups of the relations whose rows are loaded with all
+          their columns, ``""`` standing for the model itself. Used when a
+          field reads something the plan can not see through, such as a
+          model property.
+        - related (set): Lookups joined with ``select_related()``.
+        - prefetches (dict): Maps lookups loaded with ``prefetch_related()``
+          to the plan of the prefetched model.
+        - parent_field (str): For the plan of a reverse foreign key
+          prefetch, the foreign key to the parent rows.
+        - ordering (tuple): The ordering of the prefetched rows, the primary
+          key by default.
+        - limit (int): The maximum number of rows prefetched per parent row
+          of a reverse foreign key, None for all of them.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.columns = set()
+        self.full = set()
+        self.related = set()
+        self.prefetches = {}
+        self.parent_field = None
+        self.ordering = ()
+        self.limit = None
+
+    def get_columns(self):
+        """
+        Return the columns to pass to ``only()``, or None to load full rows.
+        """
+
+        if "" in self.full:
+            return None
+        columns = {self.model._meta.pk.name} | self.related | self.full
+        for column in self.columns:
+            if not any(column.startswith(path + "__") for path in self.full):
+                columns.add(column)
+        return sorted(columns)
+
+    def apply(self, queryset):
+        """
+        Return the queryset with the eager loading and column restrictions
+        of this plan applied.
+        """
+
+        if self.related:
+            queryset = queryset.select_related(*sorted(self.related))
+        for lookup, plan in sorted(self.prefetches.items()):
+            queryset = queryset.prefetch_related(
+                Prefetch(lookup, queryset=plan.prefetch_queryset())
+            )
+        columns = self.get_columns()
+        if columns is not None:
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def prefetch_queryset(self):
+        """
+        Return the queryset prefetching the rows of this plan.
+        """
+
+        queryset = self.model._default_manager.all()
+        if self.parent_field is None:
+            queryset = queryset.order_by(
+                *order_with_pk(self.model, self.ordering)
+            )
+        else:
+            queryset = limit_per_parent(
+                queryset, self.parent_field, self.ordering, self.limit
+            )
+        return self.apply(queryset)
+
+    def add_serializer(self, serializer, path=()):
+        """
+        Add the fields read by `serializer` for the model reached through
+        `path`.
+        """
+
+        dependencies = getattr(
+            getattr(serializer, "Meta", None), "field_dependencies", {}
+        )
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in dependencies:
+                for lookup in dependencies[name]:
+                    self.add_source(lookup.split("__"), path=path)
+                continue
+            if not field.source_attrs:
+                nested = _nested_serializer(field)
+                if nested is not None:
+                    self.add_serializer(nested, path=path)
+                else:
+                    self.full.add("__".join(path))
+                continue
+            self.add_source(field.source_attrs, field=field, path=path)
+
+    def add_source(self, attrs, field=None, path=()):
+        """
+        Add the dotted source `attrs` read by `field`, relative to the model
+        reached through `path`.
+        """
+
+        model = self._model_at(path)
+        try:
+            model_field = model._meta.get_field(attrs[0])
+        except FieldDoesNotExist:
+            self.full.add("__".join(path))
+            return
+
+        lookup = (*path, attrs[0])
+        rest = attrs[1:]
+        nested = _nested_serializer(field) if not rest else None
+        if not model_field.is_relation:
+            self.columns.add("__".join(lookup))
+        elif model_field.one_to_many or model_field.many_to_many:
+            self._add_prefetch(model_field, lookup, rest, field, nested)
+        elif not rest and nested is None and _reads_pk_only(field):
+            self.columns.add("__".join(lookup))
+        else:
+            self.related.add("__".join(lookup))
+            if rest:
+                self.add_source(rest, field=field, path=lookup)
+            elif nested is not None:
+                self.add_serializer(nested, path=lookup)
+            else:
+                self.full.add("__".join(lookup))
+
+    def _add_prefetch(self, model_field, lookup, rest, field, nested):
+        key = "__".join(lookup)
+        plan = self.prefetches.get(key)
+        if plan is None:
+            plan = self.prefetches[key] = QueryPlan(model_field.related_model)
+            if model_field.one_to_many:
+                # The prefetched rows are matched to their parent by the
+                # foreign key, which has to be loaded as well.
+                plan.columns.add(model_field.field.name)
+                plan.parent_field = model_field.field.name
+        if isinstance(field, ListSerializer):
+            plan.ordering = getattr(field, "nested_ordering", ())
+            plan.limit = getattr(field, "nested_limit", None)
+        if rest:
+            plan.add_source(rest, field=field)
+        elif nested is not None:
+            plan.add_serializer(nested)
+        elif not isinstance(field, ManyRelatedField):
+            plan.full.add("")
+
+    def _model_at(self, path):
+        model = self.model
+        for attr in path:
+            model = model._meta.get_field(attr).related_model
+        return model
+
+
+def _nested_serializer(field):
+    if isinstance(field, ListSerializer):
+        return field.child
+    if isinstance(field, BaseSerializer):
+        return field
+    return None
+
+
+def _reads_pk_only(field):
+    if field is None:
+        return True
+    return isinstance(field, RelatedField) and field.use_pk_only_optimization()
+
+
+def order_with_pk(model, ordering=()):
+    """
+    Return `ordering` ended by the primary key, which makes it total.
+    """
+
+    pk = model._meta.pk.name
+    ordering = tuple(ordering)
+    if not any(item.lstrip("-") in (pk, "pk") for item in ordering):
+        ordering += (pk,)
+    return ordering
+
+
+def limit_per_parent(queryset, parent_field, ordering=(), limit=None):
+    """
+    Return `queryset` ordered by `ordering`, then the primary key, and with
+    a `limit`, restricted to the first `limit` rows of every parent.
+
+    The rows are numbered per value of the `parent_field` foreign key with
+    a window function, so the first rows of any number of parents are read
+    with one query, without loading the others.
+
+    Example:
+    ```python
+    # The three latest books of every author
+    limit_per_parent(Book.objects.all(), "author", ["-published_date"], 3)
+    ```
+    """
+
+    ordering = order_with_pk(queryset.model, ordering)
+    if limit is not None:
+        queryset = queryset.annotate(
+            nested_row_number=Window(
+                RowNumber(),
+                partition_by=F(parent_field),
+                order_by=list(ordering),
+            )
+        ).filter(nested_row_number__lte=limit)
+    return queryset.order_by(*ordering)
+
+
+def build_query_plan(model, serializer):
+    """
+    Build the `QueryPlan` loading what `serializer` reads from `model` rows.
+
+    The plan follows the dotted ``source`` of every field and the fields of
+    nested serializers. Fields whose source is not a model attribute, such as
+    ``SerializerMethodField``, can declare the lookups they read in the
+    ``field_dependencies`` mapping of the serializer's ``Meta``::
+
+        class Meta:
+            field_dependencies = {"since_creation_in_days": ("published_date",)}
+
+    Without it the whole row is loaded for them.
+
+    The nested list serializer of a reverse foreign key can carry a
+    ``nested_ordering`` for its rows and a ``nested_limit`` of rows per
+    parent, see `limit_per_parent`.
+    """
+
+    plan = QueryPlan(model)
+    plan.add_serializer(_nested_serializer(serializer))
+    return plan
+
+
+def plan_queryset(queryset, serializer):
+    """
+    Apply the eager loading and column restrictions needed by `serializer`
+    to `queryset`, so that serializing any number of rows runs a constant
+    number of queries.
+
+    Example:
+    ```python
+    queryset = plan_queryset(Book.objects.all(), BookSerializer())
+    ```
+    """
+
+    return build_query_plan(queryset.model, serializer).apply(queryset)
@@ -0,0 +1,262 @@
+from collections import defaultdict, namedtuple
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, fields as drf_fields
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+from rest_framework.settings import api_settings
+
+from myapp.eager_loading import limit_per_parent
+from myapp.instrumentation import measure
+
+
+class FastReadUnsupported(Exception):
+    """
+    Raised when a serializer has a field the fast read path can not compile.
+    """
+
+
+class FastReader:
+    """
+    Read-only serialization of querysets from ``values()`` rows.
+
+    The fields of a model serializer are compiled once into the columns to
+    select and one extractor per field, which turns a row into the field's
+    representation without building model instances or going through DRF's
+    per-field ``get_attribute``/``to_representation`` dispatch. The output is
+    identical to ``serializer.data`` once encoded: ISO 8601 dates are left
+    as ``date`` objects for the renderers to encode.
+
+    Supported fields:
+        - Model fields and dotted sources through forward relations
+          (``source="author.name"``).
+        - Primary key related fields.
+        - Nested serializers of forward relations (one row each) and of
+          reverse relations (one additional query for all the rows), with
+          the ``nested_ordering`` and ``nested_limit`` of their list
+          serializer (see `myapp.eager_loading.limit_per_parent`).
+        - ``SerializerMethodField`` listed in the serializer's
+          ``Meta.field_dependencies``: the method is called with a light row
+          object holding the declared columns.
+
+    Other fields raise `FastReadUnsupported` when the reader is built.
+
+    Example:
+    ```python
+    reader = FastReader(BookSerializer(context={"request": request}))
+    data = reader.serialize(Book.objects.all())
+    ```
+    """
+
+    def __init__(self, serializer, path=()):
+        self.ordering = getattr(serializer, "nested_ordering", ())
+        self.limit = getattr(serializer, "nested_limit", None)
+        if isinstance(serializer, ListSerializer):
+            serializer = serializer.child
+        self.serializer = serializer
+        self.model = serializer.Meta.model
+        self.path = path
+        self.pk_column = self._lookup(self.model._meta.pk.name)
+        self.columns = [self.pk_column]
+        self.extractors = []
+        self.nested_many = []
+        for name, field in serializer.fields.items():
+            if not field.write_only:
+                self.extractors.append((name, self._compile(name, field)))
+
+    def serialize(self, queryset):
+        """
+        Return the representation of every row of `queryset`.
+        """
+
+        return self.represent(self.rows(queryset))
+
+    def rows(self, queryset, extra=()):
+        """
+        Return `queryset` as ``values()`` rows holding the reader's columns
+        and the `extra` ones.
+        """
+
+        columns = self.columns + [c for c in extra if c not in self.columns]
+        return queryset.prefetch_related(None).values(*columns)
+
+    def represent(self, rows):
+        """
+        Return the representation of ``values()`` rows returned by `rows`.
+        """
+
+        with measure("serialize"):
+            rows = list(rows)
+            nested = {
+                name: reader.group_by_parent(self._pks(rows), remote_field)
+                for name, reader, remote_field in self.nested_many
+            }
+            return self._represent(rows, nested)
+
+    async def arepresent(self, rows):
+        """
+        Async version of `represent`, reading the nested rows with the async
+        ORM. `rows` must already be loaded.
+        """
+
+        rows = list(rows)
+        nested = {}
+        for name, reader, remote_field in self.nested_many:
+            nested[name] = await reader.agroup_by_parent(
+                self._pks(rows), remote_field
+            )
+        with measure("serialize"):
+            return self._represent(rows, nested)
+
+    def represent_row(self, row):
+        return {name: extract(row) for name, extract in self.extractors}
+
+    def group_by_parent(self, parent_pks, remote_field):
+        """
+        Return the representations of the rows related to `parent_pks`
+        through the foreign key `remote_field`, grouped by parent.
+        """
+
+        if not parent_pks:
+            return {}
+        rows = list(self._children(parent_pks, remote_field))
+        return self._group(rows, self.represent(rows), remote_field)
+
+    async def agroup_by_parent(self, parent_pks, remote_field):
+        """
+        Async version of `group_by_parent`.
+        """
+
+        if not parent_pks:
+            return {}
+        rows = [
+            row async for row in self._children(parent_pks, remote_field)
+        ]
+        return self._group(rows, await self.arepresent(rows), remote_field)
+
+    def _represent(self, rows, nested):
+        extractors = self.extractors
+        data = []
+        for row in rows:
+            item = {}
+            for name, extract in extractors:
+                if extract is None:
+                    item[name] = nested[name].get(row[self.pk_column], [])
+                else:
+                    item[name] = extract(row)
+            data.append(item)
+        return data
+
+    def _pks(self, rows):
+        return [row[self.pk_column] for row in rows]
+
+    def _children(self, parent_pks, remote_field):
+        queryset = self.model._default_manager.filter(
+            **{f"{remote_field}__in": parent_pks}
+        ).values(remote_field, *self.columns)
+        return limit_per_parent(
+            queryset, remote_field, self.ordering, self.limit
+        )
+
+    @staticmethod
+    def _group(rows, items, remote_field):
+        grouped = defaultdict(list)
+        for row, item in zip(rows, items):
+            grouped[row[remote_field]].append(item)
+        return grouped
+
+    def _lookup(self, name):
+        return "__".join((*self.path, name))
+
+    def _column(self, lookup):
+        if lookup not in self.columns:
+            self.columns.append(lookup)
+        return lookup
+
+    def _compile(self, name, field):
+        dependencies = getattr(self.serializer.Meta, "field_dependencies", {})
+        if isinstance(field, drf_fields.SerializerMethodField):
+            if name not in dependencies:
+                raise FastReadUnsupported(name)
+            return self._compile_method(field, dependencies[name])
+
+        attrs = field.source_attrs
+        if not attrs:
+            raise FastReadUnsupported(name)
+        model = self.model
+        path = list(self.path)
+        for attr in attrs[:-1]:
+            model_field = self._get_field(model, attr, name)
+            if not (model_field.many_to_one or model_field.one_to_one):
+                raise FastReadUnsupported(name)
+            path.append(attr)
+            model = model_field.related_model
+        model_field = self._get_field(model, attrs[-1], name)
+        lookup = "__".join((*path, attrs[-1]))
+
+        if isinstance(field, ListSerializer):
+            if not model_field.one_to_many or path != list(self.path):
+                raise FastReadUnsupported(name)
+            self.nested_many.append(
+                (name, FastReader(field), model_field.field.name)
+            )
+            return None
+        if isinstance(field, BaseSerializer):
+            if not (model_field.many_to_one or model_field.one_to_one):
+                raise FastReadUnsupported(name)
+            reader = FastReader(field, path=(*path, attrs[-1]))
+            if reader.nested_many:
+                raise FastReadUnsupported(name)
+            for column in reader.columns:
+                self._column(column)
+            key = self._column(lookup)
+            represent = reader.represent_row
+            return lambda row: None if row[key] is None else represent(row)
+        if model_field.is_relation:
+            if not isinstance(field, PrimaryKeyRelatedField):
+                raise FastReadUnsupported(name)
+            convert = _pk_converter(field)
+        else:
+            convert = _converter(field)
+        key = self._column(lookup)
+        if convert is None:
+            return lambda row: row[key]
+        return lambda row: None if row[key] is None else convert(row[key])
+
+    def _compile_method(self, field, dependencies):
+        if any("__" in lookup for lookup in dependencies):
+            raise FastReadUnsupported(field.field_name)
+        row_type = namedtuple("Row", dependencies)
+        keys = [self._column(self._lookup(lookup)) for lookup in dependencies]
+        method = getattr(field.parent, field.method_name)
+        return lambda row: method(row_type(*[row[key] for key in keys]))
+
+    @staticmethod
+    def _get_field(model, attr, name):
+        try:
+            return model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            raise FastReadUnsupported(name)
+
+
+def _pk_converter(field):
+    if field.pk_field is not None:
+        return field.pk_field.to_representation
+    return None
+
+
+def _converter(field):
+    """
+    Return the function converting a column value to the representation of
+    `field`, None when the value is its own representation.
+    """
+
+    if isinstance(field, (drf_fields.CharField, drf_fields.IntegerField)):
+        return None
+    if isinstance(field, drf_fields.DateField):
+        output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+        if output_format is None or output_format.lower() == ISO_8601:
+            # The renderers encode dates in ISO 8601, natively with orjson
+            # (see `myapp.renderers`)
+            return None
+    return field.to_representation
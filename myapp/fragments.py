@@ -0,0 +1,202 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.cache import caches
+
+FRAGMENT_KEY = "myapp:fragment:{}:{}"
+
+
+class EncodedList(Sequence):
+    """
+    A list of JSON documents kept as the bytes they are encoded to.
+
+    `myapp.renderers.JSONRenderer` splices the bytes into the response
+    instead of encoding the items again. Reading the items, e.g. from
+    ``response.data`` in tests or with another renderer, decodes them.
+    """
+
+    def __init__(self, fragments):
+        self.fragments = list(fragments)
+        self._items = None
+
+    def encode(self):
+        return b"[" + b",".join(self.fragments) + b"]"
+
+    def decode(self):
+        if self._items is None:
+            self._items = [json.loads(fragment) for fragment in self.fragments]
+        return self._items
+
+    def tolist(self):
+        # Read by DRF's JSON encoder
+        return self.decode()
+
+    def __getitem__(self, index):
+        return self.decode()[index]
+
+    def __len__(self):
+        return len(self.fragments)
+
+    def __eq__(self, other):
+        if isinstance(other, EncodedList):
+            return self.fragments == other.fragments
+        if isinstance(other, (list, tuple)):
+            return self.decode() == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"EncodedList({self.decode()!r})"
+
+    def __getstate__(self):
+        return {"fragments": self.fragments, "_items": None}
+
+
+class LRUFragmentStore:
+    """
+    In-process store of encoded fragments, evicting the least recently used
+    ones once their total size exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._fragments = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                fragment = self._fragments.get(key)
+                if fragment is not None:
+                    self._fragments.move_to_end(key)
+                    found[key] = fragment
+        return found
+
+    def set_many(self, fragments):
+        with self._lock:
+            for key, fragment in fragments.items():
+                previous = self._fragments.pop(key, None)
+                if previous is not None:
+                    self.size -= len(key) + len(previous)
+                if len(key) + len(fragment) > self.max_bytes:
+                    continue
+                self._fragments[key] = fragment
+                self.size += len(key) + len(fragment)
+            while self.size > self.max_bytes:
+                key, fragment = self._fragments.popitem(last=False)
+                self.size -= len(key) + len(fragment)
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._fragments)
+
+
+class FragmentCache:
+    """
+    Cache of the encoded representation of single rows, in two tiers: a
+    `LRUFragmentStore` of the process, bounded by the
+    `FRAGMENT_CACHE_MAX_BYTES` setting, in front of the Django cache named
+    by the `FRAGMENT_CACHE_ALIAS` setting, shared by the workers, when set.
+
+    The keys (see `fragment_key`) hold the version of the row, so a write
+    makes the previous fragments of a row unreachable rather than stale and
+    nothing has to be invalidated.
+
+    Example:
+    ```python
+    found = fragments.get_many(keys)
+    fragments.set_many({key: encode(item) for key, item in missing})
+    ```
+    """
+
+    def __init__(self):
+        self.local = LRUFragmentStore(
+            getattr(settings, "FRAGMENT_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+        )
+
+    def get_shared(self):
+        """
+        Return the shared Django cache, None when there is none.
+        """
+
+        alias = getattr(settings, "FRAGMENT_CACHE_ALIAS", None)
+        return caches[alias] if alias else None
+
+    def get_timeout(self):
+        return getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 24 * 60 * 60)
+
+    def get_many(self, keys):
+        """
+        Return a dict mapping the keys of `keys` that are cached to their
+        fragment.
+        """
+
+        found = self.local.get_many(keys)
+        shared = self.get_shared()
+        missing = [key for key in keys if key not in found]
+        if shared is not None and missing:
+            promoted = shared.get_many(missing)
+            self.local.set_many(promoted)
+            found.update(promoted)
+        return found
+
+    async def aget_many(self, keys):
+        """
+        Async version of `get_many`.
+        """
+
+        found = self.local.get_many(keys)
+        shared = self.get_shared()
+        missing = [key for key in keys if key not in found]
+        if shared is not None and missing:
+            promoted = await shared.aget_many(missing)
+            self.local.set_many(promoted)
+            found.update(promoted)
+        return found
+
+    def set_many(self, fragments):
+        self.local.set_many(fragments)
+        shared = self.get_shared()
+        if shared is not None and fragments:
+            shared.set_many(fragments, self.get_timeout())
+
+    async def aset_many(self, fragments):
+        """
+        Async version of `set_many`.
+        """
+
+        self.local.set_many(fragments)
+        shared = self.get_shared()
+        if shared is not None and fragments:
+            await shared.aset_many(fragments, self.get_timeout())
+
+    def clear(self):
+        """
+        Clear the fragments of the process. The shared tier, whose entries
+        can not be stale, expires on its own.
+        """
+
+        self.local.clear()
+
+
+def fragment_key(model, variant, pk, version):
+    """
+    Return the key of the fragment of the `model` row `pk` at `version` (a
+    sequence of values changing whenever the row's representation does), in
+    the representation `variant`.
+    """
+
+    digest = hashlib.sha1(repr((variant, pk, *version)).encode()).hexdigest()
+    return FRAGMENT_KEY.format(model._meta.label_lower, digest)
+
+
+fragments = FragmentCache()
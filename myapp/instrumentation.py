@@ -0,0 +1,221 @@
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+# Upper bounds, in seconds, of the request duration histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+
+# Metrics of the request being served, set by
+# `myapp.middleware.RequestMetricsMiddleware`.
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Where the time of a request goes.
+
+    Attributes:
+        started (float): `perf_counter()` at the start of the request.
+        db_time (float): Seconds spent running queries.
+        queries (int): Number of queries run.
+        phases (dict): Seconds spent in every phase measured with
+            `measure()`, "serialize" and "render", excluding the queries run
+            during the phase.
+        statements (list): (alias, sql, params, seconds) of every query
+            when they are recorded, for `myapp.profiling`, None otherwise.
+    """
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.phases = {"serialize": 0.0, "render": 0.0}
+        self.statements = None
+        self._active = set()
+
+    def server_timing(self, total):
+        """
+        Return the ``Server-Timing`` header value for a request that took
+        `total` seconds. The "app" metric is the time spent outside of the
+        queries and the measured phases.
+        """
+
+        app = total - self.db_time - sum(self.phases.values())
+        metrics = [
+            f'db;desc="{self.queries} queries";dur={self.db_time * 1000:.2f}',
+            *(
+                f"{phase};dur={elapsed * 1000:.2f}"
+                for phase, elapsed in self.phases.items()
+            ),
+            f"app;dur={max(app, 0) * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ]
+        return ", ".join(metrics)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding the queries to the metrics of the
+    current request, installed on every connection by `myapp.receivers`.
+    """
+
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = perf_counter() - started
+        metrics.db_time += elapsed
+        metrics.queries += 1
+        if metrics.statements is not None and not many:
+            metrics.statements.append(
+                (context["connection"].alias, sql, params, elapsed)
+            )
+
+
+@contextmanager
+def measure(phase):
+    """
+    Add the time spent in the block, minus its queries, to `phase` of the
+    current request's metrics. Nested blocks of the same phase, such as
+    nested serializers, are only counted once.
+    """
+
+    metrics = current_metrics.get()
+    if metrics is None or phase in metrics._active:
+        yield
+        return
+    metrics._active.add(phase)
+    db_time = metrics.db_time
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        metrics._active.discard(phase)
+        elapsed = perf_counter() - started - (metrics.db_time - db_time)
+        metrics.phases[phase] += elapsed
+
+
+class _Series:
+    __slots__ = ("buckets", "count", "sum", "db", "queries", "phases")
+
+    def __init__(self, size):
+        self.buckets = [0] * size
+        self.count = 0
+        self.sum = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self.phases = {}
+
+
+class LatencyHistograms:
+    """
+    Request duration histograms and time counters per route, method and
+    status class, in the Prometheus text format.
+
+    Every series is a fixed set of counters, updated in place: the memory
+    used depends on the number of routes, not of requests. The counters are
+    those of the current process.
+
+    Example:
+    ```python
+    histograms.observe("^books/$", "GET", 200, metrics, 0.012)
+    histograms.render()
+    ```
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route, method, status, metrics, total):
+        """
+        Count a request to `route` that took `total` seconds, with its
+        `RequestMetrics`.
+        """
+
+        labels = (
+            route,
+            method if method in METHODS else "OTHER",
+            f"{status // 100}xx",
+        )
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = _Series(
+                    len(self.buckets) + 1
+                )
+            series.buckets[bisect_left(self.buckets, total)] += 1
+            series.count += 1
+            series.sum += total
+            series.db += metrics.db_time
+            series.queries += metrics.queries
+            for phase, elapsed in metrics.phases.items():
+                series.phases[phase] = series.phases.get(phase, 0) + elapsed
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+
+        name = "apexive_http_request_duration_seconds"
+        lines = [
+            f"# HELP {name} Duration of the requests.",
+            f"# TYPE {name} histogram",
+        ]
+        counters = {
+            "db_seconds": ("Time spent running queries.", []),
+            "queries": ("Number of queries run.", []),
+            "serialize_seconds": ("Time spent serializing.", []),
+            "render_seconds": ("Time spent rendering.", []),
+        }
+        with self._lock:
+            series = sorted(self._series.items())
+            for labels, values in series:
+                route, method, status = (_escape(label) for label in labels)
+                labels = (
+                    f'route="{route}",method="{method}",status="{status}"'
+                )
+                cumulative = 0
+                bounds = [*map(str, self.buckets), "+Inf"]
+                for bound, count in zip(bounds, values.buckets):
+                    cumulative += count
+                    lines.append(
+                        f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f"{name}_sum{{{labels}}} {values.sum}")
+                lines.append(f"{name}_count{{{labels}}} {values.count}")
+                counters["db_seconds"][1].append((labels, values.db))
+                counters["queries"][1].append((labels, values.queries))
+                for phase in ("serialize", "render"):
+                    counters[f"{phase}_seconds"][1].append(
+                        (labels, values.phases.get(phase, 0.0))
+                    )
+
+        for counter, (help, samples) in counters.items():
+            counter = f"apexive_http_request_{counter}_total"
+            lines.append(f"# HELP {counter} {help}")
+            lines.append(f"# TYPE {counter} counter")
+            for labels, value in samples:
+                lines.append(f"{counter}{{{labels}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+histograms = LatencyHistograms()
@@ -0,0 +1,116 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.benchmarks import (
+    benchmark_database,
+    over_budget,
+    regressions,
+    run_benchmarks,
+    uncovered_routes,
+)
+
+
+class Command(BaseCommand):
+    """
+    Time the API endpoints against generated catalogues of several sizes.
+
+    Every route of `myapp.urls` is requested (see `myapp.benchmarks.CASES`)
+    in a test database, which is created for the run and destroyed after
+    it, with a private response cache. The query count and timings of every
+    request are written to a JSON file.
+
+    The command fails when a request runs more queries than its budget,
+    which catches N+1 queries, or when compared with a baseline (the
+    results file of a previous run) a request got slower than the
+    threshold allows.
+
+    Usage:
+    ```bash
+    python manage.py benchmark_endpoints --sizes 100,1000,10000 \\
+        --output benchmark.json
+
+    # Fail on a regression of more than 25% from a stored baseline
+    python manage.py benchmark_endpoints --baseline benchmark-baseline.json
+    ```
+    """
+
+    help = "Time the API endpoints against generated catalogues."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="100,1000,10000",
+            help="Comma separated numbers of books of the catalogues.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of times every request is timed.",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the catalogues."
+        )
+        parser.add_argument(
+            "--output",
+            default="benchmark.json",
+            help="The JSON file the results are written to.",
+        )
+        parser.add_argument(
+            "--baseline", help="The results file of a previous run."
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Slowdown from the baseline, as a fraction, failing the "
+            "benchmark.",
+        )
+
+    def handle(self, *args, sizes="100,1000,10000", repeat=5, seed=0,
+               output="benchmark.json", baseline=None, threshold=0.25,
+               **options):
+        try:
+            sizes = [int(size) for size in sizes.split(",")]
+        except ValueError:
+            raise CommandError("--sizes must be comma separated integers.")
+        if repeat < 1 or any(size < 1 for size in sizes):
+            raise CommandError("--sizes and --repeat must be positive.")
+        uncovered = uncovered_routes()
+        if uncovered:
+            raise CommandError(
+                f"No benchmark case for the routes {sorted(uncovered)}."
+            )
+        previous = None
+        if baseline:
+            try:
+                with open(baseline) as file:
+                    previous = json.load(file)["results"]
+            except (OSError, ValueError, KeyError) as error:
+                raise CommandError(f"Can not read the baseline: {error}")
+
+        results = self.run(sizes, repeat, seed)
+        with open(output, "w") as file:
+            json.dump(
+                {
+                    "sizes": sizes,
+                    "repeat": repeat,
+                    "seed": seed,
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+        self.stdout.write(f"Results written to {output}.")
+
+        failures = over_budget(results)
+        if previous is not None:
+            failures += regressions(results, previous, threshold)
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("All endpoints are in budget."))
+
+    def run(self, sizes, repeat, seed):
+        with benchmark_database():
+            return run_benchmarks(sizes, repeat, seed, stdout=self.stdout)
@@ -0,0 +1,68 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.benchmarks import benchmark_database, run_renderer_benchmarks
+
+
+class Command(BaseCommand):
+    """
+    Compare the encode time and payload size of the response encoders of
+    `myapp.renderers` on a generated catalogue.
+
+    Every available encoder is timed (the standard library JSON encoder,
+    the pure Python MessagePack encoder and, when they are installed,
+    orjson and msgpack) in a test database, which is created for the run
+    and destroyed after it. The results are written to a JSON file.
+
+    Usage:
+    ```bash
+    python manage.py benchmark_renderers --size 10000 \\
+        --output renderers.json
+    ```
+    """
+
+    help = "Compare the response encoders on a generated catalogue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=10000,
+            help="Number of books of the catalogue.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of times every encoder is timed.",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the catalogue."
+        )
+        parser.add_argument(
+            "--output",
+            default="renderers.json",
+            help="The JSON file the results are written to.",
+        )
+
+    def handle(self, *args, size=10000, repeat=5, seed=0,
+               output="renderers.json", **options):
+        if size < 1 or repeat < 1:
+            raise CommandError("--size and --repeat must be positive.")
+        with benchmark_database():
+            results = run_renderer_benchmarks(
+                size, repeat, seed, stdout=self.stdout
+            )
+        with open(output, "w") as file:
+            json.dump(
+                {
+                    "size": size,
+                    "repeat": repeat,
+                    "seed": seed,
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+        self.stdout.write(f"Results written to {output}.")
@@ -0,0 +1,73 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.benchmarks import SETTINGS_PROFILES, run_startup_benchmarks
+
+
+class Command(BaseCommand):
+    """
+    Compare the startup and per request overhead of the settings profiles,
+    `apexiveproject.settings` ("default") and `apexiveproject.settings_api`
+    ("api").
+
+    Every profile is measured in new processes: the time to load the WSGI
+    application and the URL configuration, the time of ``manage.py check``
+    and the time the middleware adds to a request. The medians are written
+    to a JSON file.
+
+    Usage:
+    ```bash
+    python manage.py benchmark_startup --repeat 10 --output startup.json
+
+    # Only the "api" profile
+    python manage.py benchmark_startup --profile api
+    ```
+    """
+
+    help = "Compare the startup and request overhead of the settings profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            action="append",
+            choices=sorted(SETTINGS_PROFILES),
+            help="Profile to measure, can be repeated. Defaults to all.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of processes started per profile.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=1000,
+            help="Number of requests of every round of the middleware timing.",
+        )
+        parser.add_argument(
+            "--output",
+            default="startup.json",
+            help="The JSON file the results are written to.",
+        )
+
+    def handle(self, *args, profile=None, repeat=5, requests=1000,
+               output="startup.json", **options):
+        if repeat < 1 or requests < 1:
+            raise CommandError("--repeat and --requests must be positive.")
+        profiles = {
+            name: settings_module
+            for name, settings_module in SETTINGS_PROFILES.items()
+            if not profile or name in profile
+        }
+        results = run_startup_benchmarks(
+            profiles, repeat, requests, stdout=self.stdout
+        )
+        with open(output, "w") as file:
+            json.dump(
+                {"repeat": repeat, "requests": requests, "results": results},
+                file,
+                indent=2,
+            )
+        self.stdout.write(f"Results written to {output}.")
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.changelog import compact
+
+
+class Command(BaseCommand):
+    """
+    Delete the change feed entries older than the retention period and the
+    entries superseded by a later change of the same row.
+
+    Clients holding a token older than the retention period get a 410 from
+    ``/changes/`` and pull the lists again.
+
+    Usage:
+    ```bash
+    # Keep CHANGE_LOG_RETENTION_DAYS days of changes
+    python manage.py compact_change_log
+
+    # Keep a week of changes, every superseded entry included
+    python manage.py compact_change_log --retention-days 7 --keep-superseded
+    ```
+    """
+
+    help = "Delete the expired and superseded entries of the change log."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=getattr(settings, "CHANGE_LOG_RETENTION_DAYS", 30),
+            help="Number of days of changes to keep.",
+        )
+        parser.add_argument(
+            "--keep-superseded",
+            action="store_true",
+            help="Keep the entries followed by a later change of the same "
+            "row.",
+        )
+
+    def handle(self, *args, retention_days, keep_superseded=False,
+               **options):
+        if retention_days < 0:
+            raise CommandError("--retention-days must not be negative.")
+        expired, superseded = compact(
+            timedelta(days=retention_days), collapse=not keep_superseded
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {expired} expired and {superseded} superseded "
+                "change(s)."
+            )
+        )
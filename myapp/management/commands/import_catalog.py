@@ -0,0 +1,247 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+
+from myapp.models import Author, Book
+from myapp.streaming import batched
+
+
+class Command(BaseCommand):
+    """
+    Import authors or books from a CSV or NDJSON file.
+
+    The file is read line by line and written in batches of `--batch-size`
+    rows, each in its own transaction, so memory use does not depend on the
+    size of the file. Columns:
+        - author: ``name``, ``email``. Authors are upserted on their unique
+          email: an existing author gets the imported name.
+        - book: ``title``, ``published_date`` (YYYY-MM-DD), ``author_email``.
+          Authors are looked up by email once per batch and kept in memory
+          for the following ones.
+
+    Invalid rows are reported and skipped. After every batch the command
+    prints the byte offset the next batch starts at; when an import fails,
+    rerun it with ``--offset`` set to the last reported offset to resume
+    after the last written batch.
+
+    Usage:
+    ```bash
+    python manage.py import_catalog authors.csv --model author
+    python manage.py import_catalog books.ndjson --model book --batch-size 5000
+
+    # Resume a failed import
+    python manage.py import_catalog books.ndjson --model book --offset 73400320
+    ```
+    """
+
+    help = "Import authors or books from a CSV or NDJSON file."
+
+    formats = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="The CSV or NDJSON file to import.")
+        parser.add_argument(
+            "--model",
+            choices=("author", "book"),
+            required=True,
+            help="The kind of rows in the file.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=("csv", "ndjson"),
+            help="The file format, guessed from the file extension by "
+            "default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows written per query and transaction.",
+        )
+        parser.add_argument(
+            "--offset",
+            type=int,
+            default=0,
+            help="Byte offset to resume a failed import from.",
+        )
+
+    def handle(self, path, model, format=None, batch_size=1000, offset=0,
+               **options):
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+        format = format or self.formats.get(Path(path).suffix.lower())
+        if format is None:
+            raise CommandError(
+                "Can not guess the file format, use --format."
+            )
+        read = self.read_csv if format == "csv" else self.read_ndjson
+        write = self.write_authors if model == "author" else self.write_books
+        self.author_ids = {}
+
+        imported = skipped = 0
+        started = time.monotonic()
+        try:
+            with open(path, "rb") as stream:
+                for batch in batched(read(stream, offset), batch_size):
+                    with transaction.atomic():
+                        written = write(batch)
+                    imported += written
+                    skipped += len(batch) - written
+                    offset = batch[-1][1]
+                    self.stdout.write(
+                        f"{imported} rows imported, {skipped} skipped, "
+                        f"{self.rate(imported, started):.0f} rows/sec, "
+                        f"offset {offset}"
+                    )
+        except OSError as error:
+            raise CommandError(error)
+        except (DatabaseError, UnicodeDecodeError, csv.Error) as error:
+            raise CommandError(
+                f"Import failed: {error}. Resume with --offset {offset}."
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} {model}(s) in "
+                f"{time.monotonic() - started:.1f}s "
+                f"({self.rate(imported, started):.0f} rows/sec), "
+                f"skipped {skipped}."
+            )
+        )
+
+    def read_csv(self, stream, offset):
+        """
+        Yield (row, end offset) for every record of a CSV file after byte
+        `offset`, the header line being read from the start of the file.
+        """
+
+        header = stream.readline().decode("utf-8-sig")
+        fieldnames = next(csv.reader([header]), None)
+        if not fieldnames:
+            return
+        stream.seek(max(offset, stream.tell()))
+        position = stream.tell()
+
+        def lines():
+            nonlocal position
+            for line in iter(stream.readline, b""):
+                position += len(line)
+                yield line.decode("utf-8")
+
+        # The reader only pulls the lines of the record it returns, so
+        # `position` is the end of that record, quoted line breaks included.
+        for row in csv.DictReader(lines(), fieldnames=fieldnames):
+            yield row, position
+
+    def read_ndjson(self, stream, offset):
+        """
+        Yield (row, end offset) for every line of an NDJSON file after byte
+        `offset`. Malformed lines are yielded as None.
+        """
+
+        stream.seek(offset)
+        position = offset
+        for line in iter(stream.readline, b""):
+            position += len(line)
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield (row if isinstance(row, dict) else None), position
+
+    def write_authors(self, batch):
+        authors = {}
+        valid = 0
+        for row, end in batch:
+            if row is None:
+                self.skip(end, "not an object")
+                continue
+            author = self.build(
+                Author, end, name=self.value(row, "name"),
+                email=self.value(row, "email"),
+            )
+            if author is not None:
+                # The last row of a batch wins, as it would across batches
+                authors[author.email] = author
+                valid += 1
+        if not authors:
+            return 0
+        Author.objects.bulk_create(
+            list(authors.values()),
+            update_conflicts=True,
+            unique_fields=["email"],
+            update_fields=["name", "updated_at"],
+        )
+        self.author_ids.update(
+            Author.objects.filter(email__in=authors).values_list("email", "pk")
+        )
+        return valid
+
+    def write_books(self, batch):
+        emails = {
+            self.value(row, "author_email") for row, end in batch
+            if row is not None
+        }
+        missing = emails - self.author_ids.keys() - {None}
+        if missing:
+            self.author_ids.update(dict.fromkeys(missing))
+            self.author_ids.update(
+                Author.objects.filter(email__in=missing).values_list(
+                    "email", "pk"
+                )
+            )
+
+        books = []
+        for row, end in batch:
+            if row is None:
+                self.skip(end, "not an object")
+                continue
+            email = self.value(row, "author_email")
+            author_id = self.author_ids.get(email)
+            if author_id is None:
+                self.skip(end, f"unknown author {email!r}")
+                continue
+            book = self.build(
+                Book, end, exclude=["author"],
+                title=self.value(row, "title"),
+                published_date=self.value(row, "published_date"),
+                author_id=author_id,
+            )
+            if book is not None:
+                books.append(book)
+        Book.objects.bulk_create(books)
+        return len(books)
+
+    def build(self, model, end, exclude=(), **values):
+        """
+        Return a `model` instance with `values`, or None after reporting the
+        row when the values are not valid.
+        """
+
+        instance = model(**values)
+        try:
+            instance.clean_fields(exclude=exclude)
+        except ValidationError as error:
+            self.skip(end, error.message_dict)
+            return None
+        return instance
+
+    def skip(self, end, reason):
+        self.stderr.write(f"Skipped the row ending at byte {end}: {reason}")
+
+    @staticmethod
+    def value(row, name):
+        value = row.get(name)
+        return value.strip() if isinstance(value, str) else value
+
+    @staticmethod
+    def rate(rows, started):
+        elapsed = time.monotonic() - started
+        return rows / elapsed if elapsed else 0
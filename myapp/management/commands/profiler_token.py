@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from myapp.profiling import make_token
+
+
+class Command(BaseCommand):
+    """
+    Print a value of the ``X-Profile`` request header, which gets requests
+    profiled by `myapp.middleware.ProfilerMiddleware` for
+    `PROFILER_TOKEN_MAX_AGE` seconds.
+
+    Usage:
+    ```bash
+    curl -H "X-Profile: $(python manage.py profiler_token)" \\
+        http://localhost:8000/books/
+    ```
+    """
+
+    help = "Print a token of the X-Profile request header."
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_token())
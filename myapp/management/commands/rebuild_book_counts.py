@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from myapp.cache import bump_generation
+from myapp.models import Author
+
+
+class Command(BaseCommand):
+    """
+    Rebuild or verify the denormalized `Author.book_count`.
+
+    Usage:
+    ```bash
+    # Report the authors whose count differs from the books table
+    python manage.py rebuild_book_counts --verify
+
+    # Recompute every count
+    python manage.py rebuild_book_counts
+    ```
+    """
+
+    help = "Rebuild or verify the denormalized book count of every author."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare the stored counts with the books table and "
+            "fail if they differ.",
+        )
+
+    def handle(self, *args, verify=False, **options):
+        mismatches = Author.objects.book_count_mismatches()
+        for author_id, stored, actual in mismatches:
+            self.stdout.write(
+                f"Author {author_id}: stored {stored}, actual {actual}"
+            )
+
+        if verify:
+            if mismatches:
+                raise CommandError(
+                    f"{len(mismatches)} author(s) have an incorrect book count."
+                )
+            self.stdout.write(self.style.SUCCESS("All book counts are correct."))
+            return
+
+        updated = Author.objects.refresh_book_counts()
+        if updated:
+            bump_generation(Author)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt the book counts, {len(updated)} author(s) were "
+                "incorrect."
+            )
+        )
+
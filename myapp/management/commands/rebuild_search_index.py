@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from myapp.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the book search index from the books and authors tables.
+
+    The index is kept up to date on every write; rebuilding it is only
+    needed after restoring data by means that bypass the database triggers,
+    or to compact it.
+
+    Usage:
+    ```bash
+    python manage.py rebuild_search_index
+    ```
+    """
+
+    help = "Rebuild the book search index."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = get_search_backend().rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {indexed} book(s).")
+        )
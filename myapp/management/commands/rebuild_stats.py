@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from myapp.cache import bump_generation
+from myapp.models import Author, Book, MonthlyBookCount
+
+
+class Command(BaseCommand):
+    """
+    Rebuild or verify the rollups the catalogue statistics are read from:
+    the book count of every publication month (`MonthlyBookCount`) and of
+    every author (`Author.book_count`).
+
+    Usage:
+    ```bash
+    # Report the rollups that differ from a GROUP BY of the books table
+    python manage.py rebuild_stats --verify
+
+    # Recompute every rollup
+    python manage.py rebuild_stats
+    ```
+    """
+
+    help = "Rebuild or verify the rollups of the catalogue statistics."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare the rollups with the books table and fail if "
+            "they differ.",
+        )
+
+    def handle(self, *args, verify=False, **options):
+        mismatches = self.find_mismatches()
+        for bucket, stored, actual in mismatches:
+            self.stdout.write(f"{bucket}: stored {stored}, actual {actual}")
+
+        if verify:
+            if mismatches:
+                raise CommandError(
+                    f"{len(mismatches)} rollup count(s) are incorrect."
+                )
+            self.stdout.write(self.style.SUCCESS("All rollups are correct."))
+            return
+
+        with transaction.atomic():
+            months = MonthlyBookCount.objects.rebuild()
+            authors = Author.objects.refresh_book_counts()
+            bump_generation(MonthlyBookCount)
+            if authors:
+                # The statistics and representations of the authors
+                bump_generation(Author)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt the book counts of {months} month(s) and "
+                f"{len(authors)} author(s), {len(mismatches)} were incorrect."
+            )
+        )
+
+    def find_mismatches(self):
+        """
+        Return (bucket, stored count, actual count) for every month and
+        author whose stored count differs from the books table.
+        """
+
+        mismatches = []
+        actual = Book.objects.visible().count_by_month()
+        stored = {
+            (year, month): count
+            for year, month, count in MonthlyBookCount.objects.values_list(
+                "year", "month", "book_count"
+            )
+        }
+        for year, month in sorted(actual.keys() | stored.keys()):
+            counts = stored.get((year, month), 0), actual.get((year, month), 0)
+            if counts[0] != counts[1]:
+                mismatches.append((f"Month {year}-{month:02}", *counts))
+
+        for author_id, *counts in Author.objects.book_count_mismatches():
+            mismatches.append((f"Author {author_id}", *counts))
+        return mismatches
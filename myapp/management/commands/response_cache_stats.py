@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from myapp.cache import get_cache_stats
+
+
+class Command(BaseCommand):
+    """
+    Print the hit and miss counts of the API response cache.
+
+    Usage:
+    ```bash
+    python manage.py response_cache_stats
+    ```
+    """
+
+    help = "Print the hit and miss counts of the API response cache."
+
+    def handle(self, *args, **options):
+        stats = get_cache_stats()
+        total = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / total if total else 0
+        self.stdout.write(
+            f"hits: {stats['hits']}\nmisses: {stats['misses']}\n"
+            f"hit ratio: {ratio:.2%}"
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from myapp.deletion import run_deletion_job
+from myapp.models import DeletionJob
+
+
+class Command(BaseCommand):
+    """
+    Run the background deletions of authors that did not finish, e.g. as
+    the process running them stopped, or that failed.
+
+    Usage:
+    ```bash
+    python manage.py run_deletion_jobs
+    ```
+    """
+
+    help = "Run the unfinished and failed deletion jobs."
+
+    def handle(self, *args, **options):
+        jobs = DeletionJob.objects.exclude(status=DeletionJob.DONE).order_by(
+            "pk"
+        )
+        for job_id in jobs.values_list("pk", flat=True):
+            run_deletion_job(job_id)
+            job = DeletionJob.objects.get(pk=job_id)
+            message = (
+                f"Deletion job {job.pk} (author {job.author_id}): "
+                f"{job.status}, {job.deleted_books} book(s) deleted."
+            )
+            if job.status == DeletionJob.DONE:
+                self.stdout.write(self.style.SUCCESS(message))
+            else:
+                self.stderr.write(f"{message} {job.error}")
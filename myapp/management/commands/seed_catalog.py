@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from myapp.models import Author
+from myapp.seeding import generate_catalog
+
+
+class Command(BaseCommand):
+    """
+    Fill the database with a generated catalogue of authors and books, for
+    benchmarks and manual testing.
+
+    The catalogue only depends on the arguments, see
+    `myapp.seeding.generate_catalog` for its distributions.
+
+    Usage:
+    ```bash
+    python manage.py seed_catalog --authors 1000 --books 100000
+
+    # Another catalogue, replacing every existing author and book
+    python manage.py seed_catalog --authors 1000 --books 100000 --seed 2 \\
+        --clear
+    ```
+    """
+
+    help = "Fill the database with a generated catalogue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--authors", type=int, default=100, help="Number of authors."
+        )
+        parser.add_argument(
+            "--books", type=int, default=1000, help="Number of books."
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Seed of the generator, the same seed produces the same "
+            "catalogue.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows inserted per query.",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete every author and book first.",
+        )
+
+    def handle(self, *args, authors=100, books=1000, seed=0,
+               batch_size=1000, clear=False, **options):
+        if authors < 0 or books < 0:
+            raise CommandError("The sizes must not be negative.")
+        if batch_size < 1:
+            raise CommandError("The batch size must be positive.")
+        if books and not authors:
+            raise CommandError("Books need at least one author.")
+
+        started = time.monotonic()
+        try:
+            with transaction.atomic():
+                if clear:
+                    Author.objects.all().delete()
+                generate_catalog(authors, books, seed, batch_size)
+        except IntegrityError:
+            raise CommandError(
+                f"The authors of seed {seed} already exist, use --clear or "
+                "another --seed."
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {authors} author(s) and {books} book(s) in "
+                f"{time.monotonic() - started:.1f}s."
+            )
+        )
@@ -0,0 +1,45 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from myapp.db_router import get_replicas
+
+
+class Command(BaseCommand):
+    """
+    Copy the primary SQLite database to the replica files of the production
+    database profile, standing in for replication on a single machine.
+
+    Usage:
+    ```bash
+    APEXIVE_DB_PROFILE=production APEXIVE_DB_REPLICAS=replica.sqlite3 \\
+        python manage.py sync_replicas
+    ```
+    """
+
+    help = "Copy the primary SQLite database to the read replicas."
+
+    def handle(self, *args, **options):
+        replicas = get_replicas()
+        if not replicas:
+            raise CommandError("No replica is configured.")
+        primary = connections["default"].settings_dict
+        if primary["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("Only SQLite databases can be copied.")
+
+        source = sqlite3.connect(primary["NAME"])
+        try:
+            for alias in replicas:
+                connections[alias].close()
+                name = connections[alias].settings_dict["NAME"]
+                target = sqlite3.connect(name)
+                try:
+                    # Consistent online copy, pages are read under a read
+                    # transaction
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f"Copied the primary to {alias}.")
+        finally:
+            source.close()
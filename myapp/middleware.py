@@ -0,0 +1,151 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+from myapp.db_router import get_replicas, use_replicas
+from myapp.instrumentation import RequestMetrics, current_metrics, histograms
+from myapp.profiling import RequestProfile, profiles, should_profile
+
+
+class AsyncReadViewsMiddleware(MiddlewareMixin):
+    """
+    Resolve ASGI requests with the URL configuration named by the
+    `ASYNC_ROOT_URLCONF` setting, which serves the API reads with
+    `myapp.async_views.AsyncReadView`. WSGI requests keep `ROOT_URLCONF`.
+    """
+
+    def process_request(self, request):
+        urlconf = getattr(settings, "ASYNC_ROOT_URLCONF", None)
+        if urlconf and isinstance(request, ASGIRequest):
+            request.urlconf = urlconf
+
+
+class PrimaryReplicaMiddleware(MiddlewareMixin):
+    """
+    Let `myapp.db_router.PrimaryReplicaRouter` serve the reads of safe
+    requests from the replicas, with read-your-writes consistency.
+
+    A successful write request sets a cookie expiring after the replication
+    lag allowance (the `DATABASE_REPLICA_LAG` setting, in seconds); while it
+    is present, the client's reads go to the primary too.
+    """
+
+    cookie_name = "apexive_primary"
+
+    def process_request(self, request):
+        use_replicas.set(
+            bool(get_replicas())
+            and request.method in SAFE_METHODS
+            and self.cookie_name not in request.COOKIES
+        )
+
+    def process_response(self, request, response):
+        use_replicas.set(False)
+        if (
+            get_replicas()
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            response.set_cookie(
+                self.cookie_name,
+                "1",
+                max_age=getattr(settings, "DATABASE_REPLICA_LAG", 5),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class RequestMetricsMiddleware(MiddlewareMixin):
+    """
+    Measure where the time of every request goes and report it in a
+    ``Server-Timing`` header:
+        - db: the queries, counted by the execute wrapper of
+          `myapp.instrumentation.record_query`.
+        - serialize: the serializers and the fast read path.
+        - render: the renderer of the response.
+        - app: the remaining time in the middleware and the view.
+        - total: the whole request, from this middleware on.
+
+    The metrics are also added to the per route histograms of
+    `myapp.instrumentation.histograms`, exposed by the ``/metrics``
+    endpoint. Place it first in `MIDDLEWARE` to measure the other
+    middleware; the body of streamed responses is not measured.
+    """
+
+    def process_request(self, request):
+        request.metrics = RequestMetrics()
+        current_metrics.set(request.metrics)
+
+    def process_template_response(self, request, response):
+        metrics = getattr(request, "metrics", None)
+        if metrics is None:
+            return response
+        started = perf_counter()
+
+        def rendered(response):
+            metrics.phases["render"] += perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def process_response(self, request, response):
+        current_metrics.set(None)
+        metrics = getattr(request, "metrics", None)
+        if metrics is None:
+            return response
+        total = perf_counter() - metrics.started
+        response["Server-Timing"] = metrics.server_timing(total)
+        match = request.resolver_match
+        histograms.observe(
+            match.route if match else "unmatched",
+            request.method,
+            response.status_code,
+            metrics,
+            total,
+        )
+        return response
+
+
+class ProfilerMiddleware(MiddlewareMixin):
+    """
+    Profile the sampled requests and keep their profiles in
+    `myapp.profiling.profiles`, viewable by staff at ``/profiles/``.
+
+    A request is profiled when it carries a valid ``X-Profile`` header
+    (``manage.py profiler_token`` prints one), or at random with the
+    probability of the `PROFILER_SAMPLE_RATE` setting. A profile holds the
+    cProfile statistics of the request and its slowest queries
+    (`PROFILER_SLOW_QUERIES`) with their plans; the response gets an
+    ``X-Profile-Id`` header. The Python profile is only taken for WSGI
+    requests: the code of an ASGI request runs in several threads.
+
+    Requests that are not sampled only pay for the header lookup and a
+    random number. Place it after `RequestMetricsMiddleware`, whose metrics
+    record the queries.
+    """
+
+    def process_request(self, request):
+        request.profile = None
+        if not should_profile(request):
+            return
+        if current_metrics.get() is None:
+            request.own_metrics = RequestMetrics()
+            current_metrics.set(request.own_metrics)
+        request.profile = RequestProfile(
+            request, python=not isinstance(request, ASGIRequest)
+        )
+        request.profile.start()
+
+    def process_response(self, request, response):
+        profile = getattr(request, "profile", None)
+        if profile is None:
+            return response
+        request.profile = None
+        response["X-Profile-Id"] = profiles.add(profile.finish(response))
+        if getattr(request, "own_metrics", None) is not None:
+            current_metrics.set(None)
+        return response
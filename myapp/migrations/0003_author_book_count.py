@@ -0,0 +1,34 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:41
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_book_counts(apps, schema_editor):
+    Author = apps.get_model("myapp", "Author")
+    Book = apps.get_model("myapp", "Book")
+    counts = (
+        Book.objects.filter(author=OuterRef("pk"))
+        .order_by()
+        .values("author")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Author.objects.update(book_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0002_book_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='author',
+            name='book_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(populate_book_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+from django.db import migrations
+
+# FTS5 index of the book titles and author names, keyed by book id (rowid)
+# and kept up to date by triggers, see `myapp.search.SQLiteFTSBackend`.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE myapp_book_search USING fts5(
+        title, author_name, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER myapp_book_search_insert AFTER INSERT ON myapp_book
+    BEGIN
+        INSERT INTO myapp_book_search (rowid, title, author_name)
+        VALUES (
+            NEW.id,
+            NEW.title,
+            (SELECT name FROM myapp_author WHERE id = NEW.author_id)
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER myapp_book_search_update
+    AFTER UPDATE OF title, author_id ON myapp_book
+    BEGIN
+        UPDATE myapp_book_search
+        SET title = NEW.title,
+            author_name = (
+                SELECT name FROM myapp_author WHERE id = NEW.author_id
+            )
+        WHERE rowid = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER myapp_book_search_delete AFTER DELETE ON myapp_book
+    BEGIN
+        DELETE FROM myapp_book_search WHERE rowid = OLD.id;
+    END
+    """,
+    """
+    CREATE TRIGGER myapp_book_search_author_update
+    AFTER UPDATE OF name ON myapp_author
+    BEGIN
+        UPDATE myapp_book_search
+        SET author_name = NEW.name
+        WHERE rowid IN (SELECT id FROM myapp_book WHERE author_id = NEW.id);
+    END
+    """,
+    """
+    INSERT INTO myapp_book_search (rowid, title, author_name)
+    SELECT myapp_book.id, myapp_book.title, myapp_author.name
+    FROM myapp_book JOIN myapp_author ON myapp_author.id = myapp_book.author_id
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS myapp_book_search_author_update",
+    "DROP TRIGGER IF EXISTS myapp_book_search_delete",
+    "DROP TRIGGER IF EXISTS myapp_book_search_update",
+    "DROP TRIGGER IF EXISTS myapp_book_search_insert",
+    "DROP TABLE IF EXISTS myapp_book_search",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # Other databases need their own search backend and migration
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in CREATE_SQL:
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in DROP_SQL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0004_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.9 on 2026-10-18 09:02
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def populate_monthly_book_counts(apps, schema_editor):
+    Book = apps.get_model("myapp", "Book")
+    MonthlyBookCount = apps.get_model("myapp", "MonthlyBookCount")
+    rows = (
+        Book.objects.order_by()
+        .annotate(
+            year=ExtractYear("published_date"),
+            month=ExtractMonth("published_date"),
+        )
+        .values("year", "month")
+        .annotate(count=Count("pk"))
+    )
+    MonthlyBookCount.objects.bulk_create(
+        MonthlyBookCount(
+            year=row["year"], month=row["month"], book_count=row["count"]
+        )
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0005_book_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyBookCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('book_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='monthlybookcount',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='monthly_book_count_month'),
+        ),
+        migrations.RunPython(
+            populate_monthly_book_counts, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.9 on 2026-10-18 09:30
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.utils.timezone
+
+# SQLite rebuilds the authors table to add a column, which the triggers of
+# the search index reference: they are dropped during the rebuild
+search = import_module("myapp.migrations.0005_book_search")
+CREATE_TRIGGERS_SQL = search.CREATE_SQL[1:5]
+DROP_TRIGGERS_SQL = search.DROP_SQL[:4]
+
+
+def create_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in CREATE_TRIGGERS_SQL:
+            schema_editor.execute(statement)
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in DROP_TRIGGERS_SQL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0007_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author_id', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=7)),
+                ('total_books', models.PositiveIntegerField(default=0)),
+                ('deleted_books', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(drop_search_triggers, create_search_triggers),
+        migrations.AddField(
+            model_name='author',
+            name='is_hidden',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,1155 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.http import Http404, StreamingHttpResponse
+from rest_framework import serializers
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from myapp.cache import (
+    build_response_cache_key,
+    get_cache,
+    record_cache_event,
+)
+from myapp.db_router import use_replicas
+from myapp.eager_loading import build_query_plan
+from myapp.fast_serializers import FastReader, FastReadUnsupported
+from myapp.fragments import EncodedList, fragment_key, fragments
+from myapp.instrumentation import measure
+from myapp.pagination import get_view_ordering
+from myapp.streaming import (
+    async_stream,
+    batched,
+    encode,
+    json_array_stream,
+    ndjson_stream,
+)
+from myapp.serializers import (
+    FilteredListURLField,
+    PrefetchedPrimaryKeyRelatedField,
+    get_request_date,
+    has_date_relative_fields,
+    parse_field_selection,
+)
+
+
+def is_read_request(view):
+    """
+    Return whether the request of `view` only reads: a safe method, or one
+    of the view's `read_actions`, such as a ``POST`` carrying a query.
+    """
+
+    request = view.request
+    if request is None:
+        return False
+    return request.method in SAFE_METHODS or getattr(
+        view, "action", None
+    ) in getattr(view, "read_actions", ())
+
+
+def get_date_variant(view):
+    """
+    Return the date of the request of `view` as a one item tuple when the
+    response depends on it, an empty tuple otherwise: when the view sets
+    `date_dependent` (e.g. it filters rows on their age) or its serializer
+    has date relative fields (see `has_date_relative_fields`). Keys and
+    validators of such responses change with the date.
+    """
+
+    if getattr(view, "_date_dependent", None) is None:
+        get_serializer = getattr(view, "get_serializer", None)
+        view._date_dependent = getattr(view, "date_dependent", False) or (
+            get_serializer is not None
+            and has_date_relative_fields(get_serializer())
+        )
+    if not view._date_dependent:
+        return ()
+    return (get_request_date(view.request),)
+
+
+class EagerLoadingMixin:
+    """
+    View mixin loading exactly what the view's serializer reads.
+
+    On read requests the queryset returned by `get_queryset()` is planned
+    with `myapp.eager_loading.plan_queryset`, so forward relations are
+    joined, reverse relations are prefetched and only the needed columns are
+    loaded. Views overriding `get_queryset()` call `plan_queryset()` on the
+    queryset they build.
+
+    The fields of the view's ordering (see
+    `myapp.pagination.get_view_ordering`) are always loaded, as the
+    pagination reads them to build its cursors.
+    """
+
+    def get_queryset(self):
+        return self.plan_queryset(super().get_queryset())
+
+    def get_ordering(self):
+        """
+        Return the ordering of the listed rows, the ``ordering`` attribute
+        by default.
+        """
+
+        return tuple(getattr(self, "ordering", None) or ())
+
+    def plan_queryset(self, queryset):
+        """
+        Apply the query plan of the serializer to `queryset`.
+        """
+
+        if not is_read_request(self):
+            return queryset
+        plan = build_query_plan(queryset.model, self.get_serializer())
+        for item in get_view_ordering(self):
+            name = item.lstrip("-")
+            try:
+                queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # An annotation, such as a search rank
+                continue
+            plan.columns.add(name)
+        return plan.apply(queryset)
+
+
+class DynamicFieldsViewMixin(EagerLoadingMixin):
+    """
+    View mixin exposing `DynamicFieldsMixin` through query parameters.
+
+    Query Parameters:
+        - fields: comma separated list of fields to include
+          (``?fields=title,published_date``).
+        - omit: comma separated list of fields to exclude (``?omit=books``).
+        - expand: comma separated list of fields to expand
+          (``?expand=author``).
+
+    Dotted names address nested serializers (``?fields=name,books.title``).
+    The selection only applies to safe (read) requests, so that write
+    payloads are always validated against the full serializer. As the query
+    is planned from the restricted serializer, unselected columns and
+    relations are not loaded.
+    """
+
+    selection_params = ("fields", "omit", "expand")
+
+    def get_field_selection(self):
+        """
+        Return the field selection requested by the client as keyword
+        arguments for the serializer.
+        """
+
+        if not is_read_request(self):
+            return {}
+        selection = {}
+        for param in self.selection_params:
+            values = self.request.query_params.getlist(param)
+            if values:
+                selection[param] = parse_field_selection(",".join(values))
+        return selection
+
+    def get_serializer(self, *args, **kwargs):
+        for param, tree in self.get_field_selection().items():
+            kwargs.setdefault(param, tree)
+        return super().get_serializer(*args, **kwargs)
+
+
+class NestedLimitMixin:
+    """
+    View mixin bounding a nested list of the serialized rows, such as the
+    books of authors.
+
+    With a limit, only the first nested rows of every row are serialized,
+    and every row gets the total number of nested rows and a link to their
+    full list. The nested rows of all the rows of a page are read with one
+    query numbering them per parent with a window function (see
+    `myapp.eager_loading.limit_per_parent`), on the regular and the fast
+    read paths alike.
+
+    Query Parameters:
+        - <nested_field>_limit: at most that many nested rows per row
+          (``?books_limit=5``), from 0 to `max_nested_limit`.
+        - <nested_field>_ordering: the ordering of the nested rows, one of
+          `nested_orderings` (``?books_ordering=-published_date``). The
+          primary key by default.
+
+    Attributes:
+        - nested_field (str): The name of the nested list field.
+        - nested_count_source (str): The column holding the number of nested
+          rows, serialized as ``<nested_field>_count``.
+        - nested_list_view (str): The name of the route listing the nested
+          rows, linked as ``<nested_field>_url``.
+        - nested_filter_param (str): The query parameter of that route
+          filtering on the parent.
+    """
+
+    nested_field = "books"
+    nested_count_source = "book_count"
+    nested_list_view = "book-list"
+    nested_filter_param = "author"
+    nested_orderings = (
+        "id", "-id", "published_date", "-published_date", "title", "-title",
+    )
+    max_nested_limit = 1000
+
+    def get_nested_limit(self):
+        param = f"{self.nested_field}_limit"
+        value = self.request.query_params.get(param)
+        if value is None:
+            return None
+        try:
+            limit = int(value)
+            if not 0 <= limit <= self.max_nested_limit:
+                raise ValueError
+        except ValueError:
+            raise ValidationError(
+                {
+                    param: "Expected an integer from 0 to "
+                    f"{self.max_nested_limit}."
+                }
+            )
+        return limit
+
+    def get_nested_ordering(self):
+        param = f"{self.nested_field}_ordering"
+        value = self.request.query_params.get(param)
+        if value is None:
+            return ()
+        if value not in self.nested_orderings:
+            choices = ", ".join(self.nested_orderings)
+            raise ValidationError({param: f"Expected one of {choices}."})
+        return (value,)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if not is_read_request(self):
+            return serializer
+        parent = getattr(serializer, "child", serializer)
+        field = parent.fields.get(self.nested_field)
+        if field is None or not hasattr(field, "child"):
+            return serializer
+
+        field.nested_ordering = self.get_nested_ordering()
+        field.nested_limit = self.get_nested_limit()
+        if field.nested_limit is not None:
+            parent.fields[f"{self.nested_field}_count"] = (
+                serializers.IntegerField(
+                    source=self.nested_count_source, read_only=True
+                )
+            )
+            parent.fields[f"{self.nested_field}_url"] = FilteredListURLField(
+                self.nested_list_view,
+                self.nested_filter_param,
+                source=parent.Meta.model._meta.pk.name,
+            )
+        return serializer
+
+
+class AgeFilterMixin:
+    """
+    View mixin filtering and ordering rows by their age in days, with range
+    predicates on the date field they are aged from.
+
+    The age is computed from one ``today`` per request, passed to the
+    serializer in the ``today`` context entry and to
+    `BookQuerySet.with_age()`, so that every row of a response is aged from
+    the same date. Filters become ``published_date`` bounds and the age
+    ordering becomes the reverse date ordering, which the
+    ``(published_date, id)`` index answers, instead of expressions evaluated
+    on every row. The view is `date_dependent`, so that its ETag and cache
+    key change with the date.
+
+    Query Parameters:
+        - max_age_days: only the rows at most that many days old.
+        - ordering: ``since_creation_in_days`` for the youngest rows first,
+          ``-since_creation_in_days`` for the oldest first.
+
+    Attributes:
+        - age_field (str): The date field rows are aged from.
+        - age_name (str): The name of the age in the API.
+    """
+
+    age_field = "published_date"
+    age_name = "since_creation_in_days"
+    max_age_param = "max_age_days"
+    ordering_param = "ordering"
+    # The rows filtered on their age change with the date
+    date_dependent = True
+
+    def get_today(self):
+        return get_request_date(self.request)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["today"] = self.get_today()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if (
+            is_read_request(self)
+            and hasattr(queryset, "with_age")
+            and self.age_name in self.get_serializer().fields
+        ):
+            # Not on writes, as the annotation would not follow the update
+            queryset = queryset.with_age(self.get_today())
+        value = self.request.query_params.get(self.max_age_param)
+        if value is not None:
+            try:
+                days = int(value)
+                if days < 0:
+                    raise ValueError
+                oldest = self.get_today() - timedelta(days=days)
+            except (ValueError, OverflowError):
+                raise ValidationError(
+                    {self.max_age_param: "Expected a non-negative integer."}
+                )
+            queryset = queryset.filter(**{f"{self.age_field}__gte": oldest})
+        return queryset
+
+    def get_ordering(self):
+        ordering = super().get_ordering()
+        value = self.request.query_params.get(self.ordering_param)
+        if value is None:
+            return ordering
+        if value == self.age_name:
+            reverse = True
+        elif value == f"-{self.age_name}":
+            reverse = False
+        else:
+            raise ValidationError(
+                {
+                    self.ordering_param: f"Expected {self.age_name} or "
+                    f"-{self.age_name}."
+                }
+            )
+        # Ties on the date are broken on the primary key, in the same
+        # direction so that the index can be read backwards
+        prefix = "-" if reverse else ""
+        return (f"{prefix}{self.age_field}", f"{prefix}id")
+
+
+class CachedResponseMixin:
+    """
+    View mixin caching the data of successful list and retrieve responses.
+
+    The cache key covers the request path and query parameters, the
+    current date when the response depends on it (see `get_date_variant`)
+    and the current generation of every model in `cache_models`. Generations are
+    bumped by the receivers in `myapp.receivers` on every write to those
+    models, which invalidates the cached responses without having to find
+    them. A hit returns the cached data without querying the database or
+    running the serializer.
+
+    Responses carry an ``X-Cache: HIT`` or ``X-Cache: MISS`` header and the
+    totals are available from `myapp.cache.get_cache_stats()` or
+    ``manage.py response_cache_stats``.
+
+    The validators set by `ConditionalGetMixin` are cached with the data, so
+    a hit answers conditional requests with 304 without any query.
+
+    Attributes:
+        - cache_models (tuple): The models the responses are built from.
+        - cache_timeout (int): Seconds a response stays cached, defaults to
+          the `RESPONSE_CACHE_TIMEOUT` setting. Responses read from a
+          replica are cached for the replication lag allowance at most.
+    """
+
+    cache_models = ()
+    cache_timeout = None
+    cached_headers = ("ETag", "Last-Modified")
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """
+        Return the cached response to `request`, or build it with `handler`
+        and cache it.
+        """
+
+        cache = get_cache()
+        key = build_response_cache_key(
+            request, self.cache_models, get_date_variant(self)
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            record_cache_event("hit")
+            data, headers = cached
+            response = conditional_response(
+                request, headers.get("ETag"), headers.get("Last-Modified")
+            )
+            if response is None:
+                response = Response(data)
+                for name, value in headers.items():
+                    response[name] = value
+            response["X-Cache"] = "HIT"
+            return response
+
+        record_cache_event("miss")
+        response = handler(request, *args, **kwargs)
+        if (
+            isinstance(response, Response)
+            and response.status_code == status.HTTP_200_OK
+        ):
+            headers = {
+                name: response[name]
+                for name in self.cached_headers
+                if response.has_header(name)
+            }
+            cache.set(key, (response.data, headers), self.get_cache_timeout())
+        response["X-Cache"] = "MISS"
+        return response
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            timeout = self.cache_timeout
+        else:
+            timeout = getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300)
+        if use_replicas.get():
+            # A response read from a lagging replica may miss writes made
+            # before the generation it is cached under
+            lag = getattr(settings, "DATABASE_REPLICA_LAG", 5)
+            timeout = min(timeout, lag)
+        return timeout
+
+
+def conditional_response(request, etag=None, last_modified=None):
+    """
+    Return a 304 (or 412) response if the conditional headers of `request`
+    match the `etag` and `last_modified` (HTTP date) validators, None
+    otherwise.
+    """
+
+    timestamp = parse_http_date_safe(last_modified) if last_modified else None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+    if response is not None and response.status_code == 304:
+        if etag:
+            response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = last_modified
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    View mixin answering conditional list and retrieve requests
+    (``If-None-Match``, ``If-Modified-Since``) before serializing anything.
+
+    The validators are derived from a fingerprint of the rows the response
+    is built from: the latest ``updated_at`` and the row count of the
+    filtered queryset (the requested object for retrieve), plus the latest
+    ``updated_at`` of every model in `fingerprint_models`, and the current
+    date when the response depends on it. Computing it takes one aggregate
+    query per queryset. The row count makes the ETag change when rows are
+    deleted, which the ``Last-Modified`` date alone can not reflect.
+
+    Attributes:
+        - fingerprint_models (tuple): Other models the serialized data reads,
+          e.g. `Author` for the books' ``author_name``.
+    """
+
+    fingerprint_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def conditional_get(self, handler, request, *args, **kwargs):
+        """
+        Return a 304 response if the client's copy is current, or the
+        response built by `handler` with ``ETag`` and ``Last-Modified``
+        headers.
+        """
+
+        etag, last_modified = self.get_validators(request)
+        response = conditional_response(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = last_modified
+        return response
+
+    def get_fingerprint_querysets(self):
+        """
+        Return the querysets whose rows the response is built from.
+        """
+
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        querysets = [queryset]
+        for model in self.fingerprint_models:
+            querysets.append(model._default_manager.all())
+        return querysets
+
+    def get_validators(self, request):
+        """
+        Return the weak ETag and the Last-Modified HTTP date of the response
+        to `request`.
+        """
+
+        try:
+            aggregates = [
+                queryset.order_by().aggregate(**fingerprint_aggregates())
+                for queryset in self.get_fingerprint_querysets()
+            ]
+        except (TypeError, ValueError, DjangoValidationError):
+            # An invalid lookup value, as `get_object_or_404` handles it
+            raise Http404
+        return fingerprint_validators(
+            request, aggregates, self.get_fingerprint_extra()
+        )
+
+    def get_fingerprint_extra(self):
+        """
+        Return the values other than the rows the response depends on: the
+        current date for the responses computed from it (see
+        `get_date_variant`).
+        """
+
+        return get_date_variant(self)
+
+
+def fingerprint_aggregates():
+    """
+    Return the aggregates computed over every queryset of a response
+    fingerprint, see `ConditionalGetMixin`.
+    """
+
+    return {"updated_at": Max("updated_at"), "count": Count("pk")}
+
+
+def fingerprint_validators(request, aggregates, extra=()):
+    """
+    Return the weak ETag and the Last-Modified HTTP date of the response to
+    `request` from the `fingerprint_aggregates()` of its querysets and the
+    `extra` values the response depends on.
+    """
+
+    fingerprint = [
+        request.get_full_path(),
+        request.accepted_media_type,
+        *extra,
+    ]
+    latest = None
+    for row in aggregates:
+        fingerprint.append(f"{row['updated_at']}:{row['count']}")
+        if row["updated_at"] and (
+            latest is None or row["updated_at"] > latest
+        ):
+            latest = row["updated_at"]
+    digest = hashlib.sha1("|".join(map(str, fingerprint)).encode())
+    last_modified = http_date(latest.timestamp()) if latest else None
+    return f'W/"{digest.hexdigest()}"', last_modified
+
+
+class FastReadMixin:
+    """
+    View mixin serving list requests through `myapp.fast_serializers`.
+
+    The fast path builds the output from ``values()`` rows with precompiled
+    field extractors instead of model instances and DRF fields, producing
+    the same data. It is opt-in: enabled for every request with the
+    `fast_read` attribute, or per request with ``?fast=true``. Serializers
+    with fields the fast path can not compile fall back to the regular path.
+    """
+
+    fast_read = False
+    fast_read_param = "fast"
+
+    def use_fast_read(self):
+        value = self.request.query_params.get(self.fast_read_param)
+        if value is None:
+            return self.fast_read
+        return value.lower() in ("1", "true", "yes")
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_read():
+            return super().list(request, *args, **kwargs)
+        try:
+            reader = FastReader(self.get_serializer())
+        except FastReadUnsupported:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = [item.lstrip("-") for item in get_view_ordering(self)]
+        rows = reader.rows(queryset, extra=ordering)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(reader.represent(page))
+        return Response(reader.represent(rows))
+
+
+class FragmentCacheMixin:
+    """
+    View mixin assembling list responses from the cached encoded
+    representation of every row (see `myapp.fragments`).
+
+    The page is read as the primary key and version columns of its rows
+    only. Their fragments are fetched from the fragment cache in bulk, the
+    missing rows alone are loaded, serialized (through the fast read path
+    when it is requested, see `FastReadMixin`) and encoded, and
+    `myapp.renderers.JSONRenderer` splices the bytes of the page together.
+    A page of unchanged rows is served without serializing or encoding any
+    of them, even after a write to other rows has invalidated the cached
+    responses of `CachedResponseMixin`.
+
+    A fragment is keyed by the row's primary key, the values of
+    `fragment_version_fields`, the serializer, the host (for links), the
+    query parameters other than `fragment_row_params` (such as ``fields``)
+    and, when the representation depends on it, the current date (see
+    `get_date_variant`), which ``since_creation_in_days`` is computed from.
+
+    Attributes:
+        - fragment_cache (bool): Whether list responses are assembled from
+          fragments.
+        - fragment_version_fields (tuple): Lookups whose values change
+          whenever the representation of a row does.
+        - fragment_row_params (tuple): Query parameters selecting or
+          ordering the rows without changing their representation.
+    """
+
+    fragment_cache = True
+    fragment_version_fields = ("updated_at",)
+    fragment_row_params = (
+        "cursor", "page_size", "ordering", "fast", "stream", "format",
+    )
+
+    def use_fragment_cache(self):
+        return self.fragment_cache and self.request.method in SAFE_METHODS
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fragment_cache():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = self.get_version_rows(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.get_fragments(page))
+        return Response(self.get_fragments(list(rows)))
+
+    def get_version_rows(self, queryset):
+        """
+        Return `queryset` as ``values()`` rows holding the primary key, the
+        version and the ordering columns.
+        """
+
+        ordering = [item.lstrip("-") for item in get_view_ordering(self)]
+        columns = dict.fromkeys(
+            [
+                queryset.model._meta.pk.name,
+                *self.fragment_version_fields,
+                *ordering,
+            ]
+        )
+        return queryset.prefetch_related(None).values(*columns)
+
+    def get_fragment_variant(self):
+        """
+        Return a digest of what the representation of the rows depends on,
+        besides the rows.
+        """
+
+        serializer_class = self.get_serializer_class()
+        params = sorted(
+            (name, value)
+            for name, values in self.request.query_params.lists()
+            if name not in self.fragment_row_params
+            for value in values
+        )
+        variant = [
+            f"{serializer_class.__module__}.{serializer_class.__qualname__}",
+            self.request.build_absolute_uri("/"),
+            params,
+            *get_date_variant(self),
+        ]
+        return hashlib.sha1(repr(variant).encode()).hexdigest()
+
+    def get_fragment_keys(self, rows):
+        """
+        Return the fragment key of every row of `rows`, read by
+        `get_version_rows`.
+        """
+
+        model = self.get_queryset().model
+        pk = model._meta.pk.name
+        variant = self.get_fragment_variant()
+        return [
+            fragment_key(
+                model,
+                variant,
+                row[pk],
+                [row[field] for field in self.fragment_version_fields],
+            )
+            for row in rows
+        ]
+
+    def get_fragments(self, rows):
+        """
+        Return the `EncodedList` of the representations of `rows`, read by
+        `get_version_rows`.
+        """
+
+        keys = self.get_fragment_keys(rows)
+        found = fragments.get_many(keys)
+        missing = self.get_missing_fragments(rows, keys, found)
+        if missing:
+            encoded = self.encode_fragments(
+                missing, self.serialize_rows(list(missing))
+            )
+            fragments.set_many(encoded)
+            found.update(encoded)
+        return self.assemble_fragments(keys, found)
+
+    def get_missing_fragments(self, rows, keys, found):
+        """
+        Return a dict mapping the primary keys of the rows whose fragment
+        was not `found` to their fragment key.
+        """
+
+        pk = self.get_queryset().model._meta.pk.name
+        return {
+            row[pk]: key for row, key in zip(rows, keys) if key not in found
+        }
+
+    def serialize_rows(self, pks):
+        """
+        Return (primary key, representation) pairs of the rows of `pks`.
+        """
+
+        queryset = self.get_queryset().filter(pk__in=pks)
+        if isinstance(self, FastReadMixin) and self.use_fast_read():
+            try:
+                reader = FastReader(self.get_serializer())
+            except FastReadUnsupported:
+                pass
+            else:
+                rows = list(reader.rows(queryset))
+                items = reader.represent(rows)
+                return zip((row[reader.pk_column] for row in rows), items)
+        instances = list(queryset)
+        data = self.get_serializer(instances, many=True).data
+        return zip((instance.pk for instance in instances), data)
+
+    @staticmethod
+    def encode_fragments(missing, items):
+        """
+        Return a dict mapping the fragment keys of `missing` to the encoded
+        `items`, (primary key, representation) pairs.
+        """
+
+        with measure("render"):
+            return {missing[pk]: encode(item) for pk, item in items}
+
+    @staticmethod
+    def assemble_fragments(keys, found):
+        # Rows deleted since the page was read have no fragment
+        return EncodedList(found[key] for key in keys if key in found)
+
+
+class StreamingListMixin:
+    """
+    View mixin streaming list responses instead of paginating them.
+
+    The queryset is read with a server-side cursor in chunks of
+    `stream_chunk_size` rows, each chunk is serialized (through the fast read
+    path when the serializer supports it) and encoded, and its bytes are
+    sent before the next chunk is read. Memory usage is bounded by one chunk
+    regardless of the size of the result.
+
+    Query Parameters:
+        - stream: ``json`` for a JSON array or ``ndjson`` for one JSON
+          document per line. Views default to `streaming`, None (paginated
+          responses) unless set.
+
+    Responses are sent as `StreamingHttpResponse` under both WSGI and ASGI;
+    under ASGI the chunks are produced by an async iterator so that they are
+    not buffered.
+    """
+
+    stream_param = "stream"
+    stream_chunk_size = 1000
+    streaming = None
+    stream_formats = {
+        "json": (json_array_stream, "application/json"),
+        "ndjson": (ndjson_stream, "application/x-ndjson"),
+    }
+
+    def get_stream_format(self):
+        """
+        Return the requested streaming format, or None for a regular
+        response.
+        """
+
+        value = self.request.query_params.get(self.stream_param)
+        if value is None:
+            return self.streaming
+        if value not in self.stream_formats:
+            choices = ", ".join(self.stream_formats)
+            raise ValidationError(
+                {self.stream_param: f"Expected one of {choices}."}
+            )
+        return value
+
+    def list(self, request, *args, **kwargs):
+        stream_format = self.get_stream_format()
+        if stream_format is None:
+            return super().list(request, *args, **kwargs)
+
+        encode, content_type = self.stream_formats[stream_format]
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = get_view_ordering(self)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        content = encode(self.serialize_chunks(queryset))
+        if isinstance(request._request, ASGIRequest):
+            content = async_stream(content)
+        return StreamingHttpResponse(content, content_type=content_type)
+
+    def serialize_chunks(self, queryset):
+        """
+        Yield the representation of `queryset` one chunk of rows at a time.
+        """
+
+        try:
+            reader = FastReader(self.get_serializer())
+        except FastReadUnsupported:
+            reader = None
+
+        size = self.stream_chunk_size
+        if reader is not None:
+            rows = reader.rows(queryset).iterator(chunk_size=size)
+            for chunk in batched(rows, size):
+                yield reader.represent(chunk)
+        else:
+            for chunk in batched(queryset.iterator(chunk_size=size), size):
+                yield self.get_serializer(chunk, many=True).data
+
+
+class BulkWriteMixin:
+    """
+    ViewSet mixin accepting lists of objects to create or partially update.
+
+    ``POST`` of a JSON list to the list route creates every valid row, and
+    ``PATCH`` of a JSON list of objects with an ``id`` updates them (the
+    route is added by `myapp.routers.BulkRouter`). Rows are validated with
+    the view's serializer, with the objects referenced by
+    `PrefetchedPrimaryKeyRelatedField` fields and the updated objects loaded
+    in one query each. Valid rows are written with ``bulk_create`` or
+    ``bulk_update`` in batches of `bulk_batch_size`, in one transaction.
+
+    Response:
+    ```
+    {"results": [<object or null>, ...], "errors": [{"index": 1, "errors": {...}}]}
+    ```
+    ``results`` has one entry per row of the payload, null for invalid rows.
+    The status is 201 (200 for updates) when every row is written, 207 when
+    some rows are invalid and 400 when none is written.
+
+    Query Parameters:
+        - atomic: ``true`` to write nothing unless every row is valid.
+    """
+
+    bulk_max_size = 10000
+    bulk_batch_size = 500
+    bulk_lookup_field = "id"
+
+    def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return self.bulk_create(request)
+        return super().create(request, *args, **kwargs)
+
+    def bulk_create(self, request):
+        rows = self.get_bulk_rows(request)
+        context = self.get_bulk_serializer_context(rows)
+        serializers = [
+            self.get_serializer_class()(data=row, context=context)
+            for row in rows
+        ]
+        objs = self.validate_bulk(serializers)
+        if objs is None:
+            return self.bulk_response(rows, {}, status.HTTP_400_BAD_REQUEST)
+        model = self.get_queryset().model
+        objs = {index: model(**data) for index, data in objs.items()}
+        with transaction.atomic():
+            model._default_manager.bulk_create(
+                list(objs.values()), batch_size=self.bulk_batch_size
+            )
+        return self.bulk_response(rows, objs, status.HTTP_201_CREATED)
+
+    def bulk_partial_update(self, request, *args, **kwargs):
+        rows = self.get_bulk_rows(request)
+        queryset = self.get_queryset()
+        pk = queryset.model._meta.pk
+        instances = queryset.in_bulk(
+            self._coerce_pks(
+                pk, (row.get(self.bulk_lookup_field) for row in rows)
+            )
+        )
+        context = self.get_bulk_serializer_context(rows)
+        serializers = []
+        for row in rows:
+            instance = instances.get(
+                self._coerce_pk(pk, row.get(self.bulk_lookup_field))
+            )
+            serializers.append(
+                self.get_serializer_class()(
+                    instance, data=row, partial=True, context=context
+                )
+            )
+        objs = self.validate_bulk(serializers)
+        if objs is None:
+            return self.bulk_response(rows, {}, status.HTTP_400_BAD_REQUEST)
+
+        fields = set()
+        for index, data in objs.items():
+            instance = serializers[index].instance
+            for name, value in data.items():
+                setattr(instance, name, value)
+            fields.update(data)
+            objs[index] = instance
+        if objs and fields:
+            with transaction.atomic():
+                queryset.model._default_manager.bulk_update(
+                    list(objs.values()),
+                    sorted(fields),
+                    batch_size=self.bulk_batch_size,
+                )
+        return self.bulk_response(rows, objs, status.HTTP_200_OK)
+
+    def get_bulk_rows(self, request):
+        rows = request.data
+        if not isinstance(rows, list) or not all(
+            isinstance(row, dict) for row in rows
+        ):
+            raise ValidationError("Expected a list of objects.")
+        if len(rows) > self.bulk_max_size:
+            raise ValidationError(
+                f"At most {self.bulk_max_size} objects can be written at once."
+            )
+        return rows
+
+    def get_bulk_serializer_context(self, rows):
+        """
+        Return the serializer context with the related objects referenced by
+        `rows` loaded in one query per related field.
+        """
+
+        context = self.get_serializer_context()
+        prefetched = {}
+        for name, field in self.get_serializer_class()().fields.items():
+            if not isinstance(field, PrefetchedPrimaryKeyRelatedField):
+                continue
+            queryset = field.get_queryset()
+            pks = self._coerce_pks(
+                queryset.model._meta.pk, (row.get(name) for row in rows)
+            )
+            prefetched.setdefault(queryset.model, {}).update(
+                queryset.in_bulk(pks)
+            )
+        context["prefetched"] = prefetched
+        return context
+
+    def validate_bulk(self, serializers):
+        """
+        Validate every serializer and return the validated data of the valid
+        ones by row index, or None when nothing should be written: no row is
+        valid, or some row is invalid and the request asks for an atomic
+        write.
+        """
+
+        valid, self.bulk_errors = {}, []
+        for index, serializer in enumerate(serializers):
+            if serializer.instance is None and serializer.partial:
+                self.bulk_errors.append({"index": index, "errors": {
+                    self.bulk_lookup_field: ["Not found."]
+                }})
+            elif serializer.is_valid():
+                valid[index] = serializer.validated_data
+            else:
+                self.bulk_errors.append(
+                    {"index": index, "errors": serializer.errors}
+                )
+        atomic = self.request.query_params.get("atomic", "").lower()
+        if self.bulk_errors and (not valid or atomic in ("1", "true", "yes")):
+            return None
+        return valid
+
+    def bulk_response(self, rows, objs, success_status):
+        """
+        Return the response listing the written `objs`, by row index, and the
+        errors of the invalid rows. `success_status` is used unless only some
+        rows were written.
+        """
+
+        data = self.get_serializer(list(objs.values()), many=True).data
+        results = [None] * len(rows)
+        for index, item in zip(objs, data):
+            results[index] = item
+        return Response(
+            {"results": results, "errors": self.bulk_errors},
+            status=status.HTTP_207_MULTI_STATUS
+            if self.bulk_errors and objs
+            else success_status,
+        )
+
+    @staticmethod
+    def _coerce_pk(pk, value):
+        if value is None or isinstance(value, bool):
+            return None
+        try:
+            return pk.to_python(value)
+        except DjangoValidationError:
+            return None
+
+    @classmethod
+    def _coerce_pks(cls, pk, values):
+        return {
+            value
+            for value in (cls._coerce_pk(pk, value) for value in values)
+            if value is not None
+        }
+
+
+class MultiGetMixin:
+    """
+    ViewSet mixin reading many objects by primary key in one request.
+
+    ``GET`` of the list route with ``?ids=3,1,2``, or ``POST`` of
+    ``{"ids": [3, 1, 2]}`` to the ``multi-get`` route for id sets too long
+    for a URL, returns the objects in the requested order. They are read
+    with one ``in_bulk`` query through the view's query plan (see
+    `EagerLoadingMixin`), plus one per prefetched relation, and the query
+    parameters of the list (``fields``, ``expand``, filters...) apply.
+    Place it after `ConditionalGetMixin`, so that ``GET`` responses are
+    cached and validated like the list.
+
+    Response:
+    ```
+    {"results": [<object or null>, ...], "not_found": [<id>, ...]}
+    ```
+    ``results`` has one entry per requested id, duplicates included, null
+    for the ids matching no object, which are listed once in ``not_found``.
+    Invalid ids and more than `multi_get_max_ids` ids are rejected with
+    400.
+
+    Attributes:
+        - multi_get_param (str): The query parameter and body key of the
+          ids.
+        - multi_get_max_ids (int): The maximum number of ids per request.
+    """
+
+    multi_get_param = "ids"
+    multi_get_max_ids = 1000
+    read_actions = ("multi_get",)
+
+    def list(self, request, *args, **kwargs):
+        ids = request.query_params.get(self.multi_get_param)
+        if ids is None:
+            return super().list(request, *args, **kwargs)
+        return self.multi_get_response(ids.split(","))
+
+    @action(detail=False, methods=["post"], url_path="multi-get")
+    def multi_get(self, request, *args, **kwargs):
+        """
+        Return the objects whose ids are listed in the body, see
+        `MultiGetMixin`.
+        """
+
+        ids = None
+        if isinstance(request.data, dict):
+            ids = request.data.get(self.multi_get_param)
+        if not isinstance(ids, list):
+            raise ValidationError(
+                {self.multi_get_param: "Expected a list of ids."}
+            )
+        return self.multi_get_response(ids)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        ids = self.request.query_params.get(self.multi_get_param)
+        if ids is not None and getattr(self, "action", None) == "list":
+            # The ETag of `ConditionalGetMixin` then covers the requested
+            # rows only
+            queryset = queryset.filter(
+                pk__in=set(self.get_multi_get_pks(ids.split(",")))
+            )
+        return queryset
+
+    def get_multi_get_pks(self, ids):
+        """
+        Return the primary keys of `ids`, in order, raising a validation
+        error when one is invalid or when there are too many.
+        """
+
+        if not ids:
+            raise ValidationError({self.multi_get_param: "Expected ids."})
+        if len(ids) > self.multi_get_max_ids:
+            raise ValidationError(
+                {
+                    self.multi_get_param: "At most "
+                    f"{self.multi_get_max_ids} ids can be read at once."
+                }
+            )
+        pk = self.queryset.model._meta.pk
+        pks = []
+        for value in ids:
+            if isinstance(value, str):
+                value = value.strip()
+            try:
+                if value is None or value == "" or isinstance(value, bool):
+                    raise DjangoValidationError("Missing id.")
+                pks.append(pk.to_python(value))
+            except DjangoValidationError:
+                raise ValidationError(
+                    {self.multi_get_param: f"Invalid id: {value!r}."}
+                )
+        return pks
+
+    def multi_get_response(self, ids):
+        pks = self.get_multi_get_pks(ids)
+        queryset = self.filter_queryset(self.get_queryset())
+        objs = queryset.in_bulk(set(pks))
+        found = [pk for pk in dict.fromkeys(pks) if pk in objs]
+        data = self.get_serializer(
+            [objs[pk] for pk in found], many=True
+        ).data
+        items = dict(zip(found, data))
+        return Response(
+            {
+                "results": [items.get(pk) for pk in pks],
+                "not_found": [
+                    pk for pk in dict.fromkeys(pks) if pk not in objs
+                ],
+            }
+        )
@@ -1,14 +1,194 @@
-from django.db import models
-from django.db.models import  Subquery, Count
+from collections import defaultdict
+from datetime import date
 
+from django.db import models, router, transaction
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    Func,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+from django.utils import timezone
 
-class Author(models.Model):
+from myapp.signals import (
+    post_bulk_create,
+    post_bulk_delete,
+    post_bulk_update,
+)
+
+
+class ChangeLoggedModel(models.Model):
+    """
+    Abstract model whose saves run in one transaction with their
+    ``post_save`` receivers, which record the change in the `ChangeLog` and
+    update the denormalized data (see `myapp.receivers`). Deletes already
+    run with their ``post_delete`` receivers in one transaction.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+
+def fill_upserted_pks(queryset, objs, unique_fields):
+    """
+    Set the primary key of the `objs` upserted by ``bulk_create()`` on
+    `unique_fields`, which the database does not return for updated rows,
+    with one query.
+    """
+
+    missing = [obj for obj in objs if obj.pk is None]
+    if not missing or not unique_fields:
+        return
+    fields = [
+        queryset.model._meta.get_field(name).attname for name in unique_fields
+    ]
+    rows = queryset.filter(
+        **{f"{fields[0]}__in": {getattr(obj, fields[0]) for obj in missing}}
+    ).values_list("pk", *fields)
+    pks = {tuple(row[1:]): row[0] for row in rows}
+    for obj in missing:
+        obj.pk = pks.get(tuple(getattr(obj, field) for field in fields))
+
+
+class AuthorQuerySet(models.QuerySet):
+    """
+    Custom queryset for the Author model.
+
+    `bulk_create` and `update` send the `post_bulk_create` and
+    `post_bulk_update` signals of `myapp.signals`, as the model signals are
+    not sent for bulk writes, so that the change log and the response cache
+    follow them.
+
+    Example:
+    ```python
+    # Recompute the denormalized book counts of every author
+    Author.objects.refresh_book_counts()
+
+    # The authors the API exposes
+    Author.objects.visible()
+    ```
+    """
+
+    def visible(self):
+        """
+        Exclude the hidden authors, whose deletion is in progress.
+        """
+        return self.filter(is_hidden=False)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            upsert = bool(kwargs.get("update_conflicts"))
+            if upsert:
+                fill_upserted_pks(self, objs, kwargs.get("unique_fields"))
+            post_bulk_create.send(
+                sender=self.model, objs=objs, update_conflicts=upsert
+            )
+        return objs
+
+    def update(self, **kwargs):
+        kwargs.setdefault("updated_at", timezone.now())
+        fields = [self.model._meta.get_field(name).name for name in kwargs]
+        previous = {row["pk"]: row for row in self.values("pk")}
+        with transaction.atomic(using=self.db):
+            rows = super().update(**kwargs)
+            if previous:
+                post_bulk_update.send(
+                    sender=self.model, fields=fields, previous=previous
+                )
+        return rows
+
+    def add_book_counts(self, changes):
+        """
+        Add the deltas of `changes`, a mapping of author ids to book count
+        deltas, to `book_count` and mark the authors as modified, as their
+        representation includes their books. Runs one query per distinct
+        delta and sends `post_bulk_update` once.
+        """
+        now = timezone.now()
+        author_ids = defaultdict(list)
+        for author_id, delta in changes.items():
+            author_ids[delta].append(author_id)
+        with transaction.atomic(using=self.db):
+            for delta, pks in author_ids.items():
+                # The primary keys are known, the signal is sent below
+                models.QuerySet.update(
+                    self.filter(pk__in=pks),
+                    book_count=F("book_count") + delta,
+                    updated_at=now,
+                )
+            if changes:
+                post_bulk_update.send(
+                    sender=self.model,
+                    fields=["book_count", "updated_at"],
+                    previous={pk: {} for pk in changes},
+                )
+
+    def book_count_mismatches(self):
+        """
+        Return (author id, stored count, actual count) for every author of
+        the queryset whose `book_count` differs from the books table.
+        """
+        return list(
+            self.annotate(actual_count=_book_count())
+            .exclude(book_count=F("actual_count"))
+            .order_by("pk")
+            .values_list("pk", "book_count", "actual_count")
+        )
+
+    def refresh_book_counts(self):
+        """
+        Recompute `book_count` of the authors in the queryset from the books
+        table. The authors whose count changes are updated, which marks them
+        as modified (see `update`). Returns their primary keys.
+        """
+        with transaction.atomic(using=self.db):
+            pks = [pk for pk, _, _ in self.book_count_mismatches()]
+            if pks:
+                self.model.objects.filter(pk__in=pks).update(
+                    book_count=_book_count()
+                )
+        return pks
+
+
+def _book_count():
+    # The number of books of the author of the outer queryset
+    counts = (
+        Book.objects.filter(author=OuterRef("pk"))
+        .order_by()
+        .values("author")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+class Author(ChangeLoggedModel):
     """
     Model representing an author.
 
     Attributes:
         name (str): The name of the author (up to 100 characters).
         email (str): The email address of the author (must be unique).
+        book_count (int): The number of books of the author. Denormalized
+            from the books table and kept up to date by the receivers in
+            `myapp.receivers`; `manage.py rebuild_book_counts` rebuilds it.
+        updated_at (datetime): When the author or one of its books was last
+            modified.
+        is_hidden (bool): Whether the author is being deleted in the
+            background (see `DeletionJob`), which hides it and its books
+            from the API.
 
     Methods:
         __str__(): Returns the string representation of the author, which is the author's name.
@@ -16,6 +196,13 @@ class Author(models.Model):
 
     name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
+    book_count = models.PositiveIntegerField(
+        default=0, db_index=True, editable=False
+    )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    is_hidden = models.BooleanField(default=False, editable=False)
+
+    objects = AuthorQuerySet.as_manager()
 
     def __str__(self):
         """
@@ -25,39 +212,177 @@ class Author(models.Model):
         return self.name
 
 
+class DaysSince(Func):
+    """
+    Number of days from a date expression to `today`, computed by the
+    database.
+
+    Example:
+    ```python
+    Book.objects.annotate(age=DaysSince("published_date", date(2024, 1, 1)))
+    ```
+    """
+
+    output_field = models.IntegerField()
+
+    def __init__(self, expression, today, **extra):
+        super().__init__(
+            Value(today, output_field=models.DateField()),
+            F(expression) if isinstance(expression, str) else expression,
+            **extra,
+        )
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # Subtracting PostgreSQL dates gives a number of days
+        return super().as_sql(
+            compiler,
+            connection,
+            template="(%(expressions)s)",
+            arg_joiner=" - ",
+            **extra_context,
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler,
+            connection,
+            template="CAST(JULIANDAY(%(expressions)s) AS INTEGER)",
+            arg_joiner=") - JULIANDAY(",
+            **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, function="DATEDIFF", **extra_context
+        )
+
+
+# Fields of a book the book counts of its author and month depend on
+TRACKED_BOOK_FIELDS = ("author", "published_date")
+
+
 class BookQuerySet(models.QuerySet):
     """
     Custom queryset for the Book model.
 
     This queryset provides additional methods for filtering and querying Book objects.
 
+    The bulk write methods, which bypass the model signals, send the
+    `post_bulk_create`, `post_bulk_update` and `post_bulk_delete` signals of
+    `myapp.signals` instead, so that denormalized data can follow them.
+
     Example:
     ```python
     # Usage of the published_after method
     books = Book.objects.published_after(date(2022, 1, 1))
+
+    # The books the API exposes, of authors not being deleted
+    books = Book.objects.visible()
+
+    # Books annotated with their age in days
+    books = Book.objects.with_age()
     ```
     """
 
+    def visible(self):
+        """
+        Exclude the books of hidden authors, whose deletion is in progress.
+        """
+        # Usually an empty set, cheaper than joining the authors
+        return self.exclude(author__in=Author.objects.filter(is_hidden=True))
+
     def published_after(self, date):
         """
         Returns a queryset of books who have published after the given date.
         """
         return self.filter(published_date__gt=date)
     
+    def with_age(self, today=None):
+        """
+        Annotate every book with `since_creation_in_days`, the number of
+        days from its publication to `today` (the current date by default).
+        """
+        return self.annotate(
+            since_creation_in_days=DaysSince(
+                "published_date", today or date.today()
+            )
+        )
+
+    def count_by_month(self):
+        """
+        Return a dict mapping (year, month) to the number of books published
+        that month, grouped by the database.
+        """
+        rows = (
+            self.order_by()
+            .annotate(
+                year=ExtractYear("published_date"),
+                month=ExtractMonth("published_date"),
+            )
+            .values("year", "month")
+            .annotate(count=Count("pk"))
+            .values_list("year", "month", "count")
+        )
+        return {(year, month): count for year, month, count in rows}
+
     def authors_with_multiple_books(self):
         """
         Returns a queryset of authors who have written multiple books.
+
+        Reads the indexed `Author.book_count` rather than grouping the books
+        table.
         """
-        subquery = (
-            self.values('author')
-            .annotate(book_count=Count('author'))
-            .filter(book_count__gt=1)
-            .values('author')
-        )
+        return Author.objects.visible().filter(book_count__gt=1)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            upsert = bool(kwargs.get("update_conflicts"))
+            if upsert:
+                fill_upserted_pks(self, objs, kwargs.get("unique_fields"))
+            post_bulk_create.send(
+                sender=self.model, objs=objs, update_conflicts=upsert
+            )
+        return objs
+
+    def update(self, **kwargs):
+        kwargs.setdefault("updated_at", timezone.now())
+        fields = [self.model._meta.get_field(name).name for name in kwargs]
+        # Only the previous values the counts depend on, the receivers need
+        # the primary keys of the other updates
+        tracked = [name for name in fields if name in TRACKED_BOOK_FIELDS]
+        previous = {
+            row["pk"]: row for row in self.values("pk", *tracked)
+        }
+        with transaction.atomic(using=self.db):
+            rows = super().update(**kwargs)
+            if previous:
+                post_bulk_update.send(
+                    sender=self.model, fields=fields, previous=previous
+                )
+        return rows
 
-        return Author.objects.filter(pk__in=Subquery(subquery))
+    def bulk_delete(self):
+        """
+        Delete the books of the queryset with one query, without loading
+        them or sending a ``post_delete`` signal per book, and send the
+        `post_bulk_delete` signal. Returns the number of deleted books.
+        """
+        with transaction.atomic(using=self.db):
+            previous = {
+                row["pk"]: row
+                for row in self.values("pk", "author", "published_date")
+            }
+            if not previous:
+                return 0
+            # Nothing references books, so nothing cascades from them
+            deleted = self.model.objects.filter(pk__in=previous)._raw_delete(
+                self.db
+            )
+            post_bulk_delete.send(sender=self.model, previous=previous)
+        return deleted
 
-class Book(models.Model):
+class Book(ChangeLoggedModel):
     """
     Represents a book in the database.
 
@@ -65,22 +390,268 @@ class Book(models.Model):
         title (str): The title of the book, with a maximum length of 200 characters.
         published_date (Date): The date when the book was published.
         author (Author): The author of the book, linked via a ForeignKey relationship to the Author model.
+        updated_at (datetime): When the book was last modified.
 
     Methods:
         __str__(): Returns a string representation of the book, using its title.
 
     Relationships:
         Each book is associated with an author through a ForeignKey relationship.
+
+    Indexes:
+        - (published_date, id): Keyset pagination of book lists.
+        - (author, published_date): Books of an author in publication order.
     """
 
     title = models.CharField(max_length=200)
     published_date = models.DateField()
     author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name="books")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     objects = BookQuerySet.as_manager()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["published_date", "id"], name="book_published_id_idx"
+            ),
+            models.Index(
+                fields=["author", "published_date"],
+                name="book_author_published_idx",
+            ),
+        ]
+
     def __str__(self):
         """
         Returns a string representation of the book, using its title.
         """
         return self.title
+
+
+class MonthlyBookCountQuerySet(models.QuerySet):
+    """
+    Custom queryset for the MonthlyBookCount model.
+
+    Example:
+    ```python
+    # Two more books published in January 2024, one less in March
+    MonthlyBookCount.objects.apply_changes({(2024, 1): 2, (2024, 3): -1})
+
+    # Recompute every month from the books table
+    MonthlyBookCount.objects.rebuild()
+    ```
+    """
+
+    def apply_changes(self, changes):
+        """
+        Add a mapping of (year, month) to book count deltas to the stored
+        counts, creating the missing months.
+        """
+        for (year, month), delta in changes.items():
+            if not delta:
+                continue
+            month_counts = self.filter(year=year, month=month)
+            if not month_counts.update(book_count=F("book_count") + delta):
+                self.get_or_create(year=year, month=month)
+                month_counts.update(book_count=F("book_count") + delta)
+
+    def rebuild(self):
+        """
+        Replace every stored count with the counts of the books table,
+        without the books of the hidden authors. Returns the number of
+        months with books.
+        """
+        counts = Book.objects.visible().count_by_month()
+        self.all().delete()
+        self.bulk_create(
+            self.model(year=year, month=month, book_count=count)
+            for (year, month), count in counts.items()
+        )
+        return len(counts)
+
+
+class MonthlyBookCount(models.Model):
+    """
+    Number of books published in a month, the rollup the catalogue
+    statistics are read from.
+
+    The counts are kept up to date by the receivers in `myapp.receivers` on
+    every book write, so reading the statistics takes one row per month
+    instead of a scan of the books table. ``manage.py rebuild_stats``
+    rebuilds or verifies them.
+
+    Attributes:
+        year (int): The publication year.
+        month (int): The publication month, from 1 to 12.
+        book_count (int): The number of books published that month. Months
+            whose books were all deleted or moved keep a row with a count of
+            0 until the next rebuild.
+    """
+
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    book_count = models.PositiveIntegerField(default=0)
+
+    objects = MonthlyBookCountQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["year", "month"], name="monthly_book_count_month"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02}: {self.book_count}"
+
+
+class ChangeLogQuerySet(models.QuerySet):
+    """
+    Custom queryset for the ChangeLog model.
+
+    Example:
+    ```python
+    # Record the deletion of two books
+    ChangeLog.objects.record(Book, ChangeLog.DELETE, [3, 4])
+
+    # Entries of the books and authors changed again since
+    ChangeLog.objects.superseded()
+    ```
+    """
+
+    def record(self, model, action, pks):
+        """
+        Record the `action` on the `model` rows of primary keys `pks`.
+        """
+        now = timezone.now()
+        self.bulk_create(
+            self.model(
+                model_name=model._meta.model_name,
+                object_id=pk,
+                action=action,
+                changed_at=now,
+            )
+            for pk in pks
+        )
+
+    def superseded(self):
+        """
+        Return the entries followed by a later entry of the same row.
+        """
+        return self.filter(
+            Exists(
+                self.model.objects.filter(
+                    model_name=OuterRef("model_name"),
+                    object_id=OuterRef("object_id"),
+                    pk__gt=OuterRef("pk"),
+                )
+            )
+        )
+
+
+class ChangeLog(models.Model):
+    """
+    A creation, update or deletion of an author or a book, the change feed
+    of `myapp.changelog` is read from.
+
+    Entries are written by the receivers in `myapp.receivers`, in the
+    transaction of the change, including the deletions cascading from an
+    author to its books. Their increasing primary key is the position of
+    the feed. ``manage.py compact_change_log`` deletes the expired and the
+    superseded entries.
+
+    Attributes:
+        model_name (str): The model of the changed row, ``author`` or
+            ``book``.
+        object_id (int): The primary key of the changed row.
+        action (str): ``create``, ``update`` or ``delete``.
+        changed_at (datetime): When the change was made.
+
+    Indexes:
+        - (model_name, object_id, id): Entries of a row, in order, read by
+          the compaction.
+    """
+
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+    ACTIONS = [(CREATE, "Create"), (UPDATE, "Update"), (DELETE, "Delete")]
+
+    model_name = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=6, choices=ACTIONS)
+    changed_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    objects = ChangeLogQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["model_name", "object_id", "id"],
+                name="changelog_object_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.pk}: {self.action} {self.model_name} {self.object_id}"
+
+
+class ChangeLogCompaction(models.Model):
+    """
+    A run of ``manage.py compact_change_log`` that deleted expired entries.
+
+    Attributes:
+        horizon (int): The position up to which entries were deleted. The
+            feed can not be read from an older position any more.
+        compacted_at (datetime): When the entries were deleted.
+    """
+
+    horizon = models.BigIntegerField()
+    compacted_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.compacted_at}: up to {self.horizon}"
+
+
+class DeletionJob(models.Model):
+    """
+    The deletion of an author in the background, see
+    `myapp.deletion.start_author_deletion`.
+
+    The author is hidden when the job is created, then its books are deleted
+    in batches and the author last.
+
+    Attributes:
+        author_id (int): The primary key of the deleted author.
+        status (str): ``pending``, ``running``, ``done`` or ``failed``.
+        total_books (int): The number of books of the author when the job
+            was created.
+        deleted_books (int): The number of books deleted so far.
+        error (str): Why the job failed.
+        created_at (datetime): When the deletion was requested.
+        finished_at (datetime): When the job was done or failed.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    author_id = models.BigIntegerField()
+    status = models.CharField(
+        max_length=7, choices=STATUSES, default=PENDING, db_index=True
+    )
+    total_books = models.PositiveIntegerField(default=0)
+    deleted_books = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Deletion of author {self.author_id}: {self.status}"
@@ -0,0 +1,243 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def get_view_ordering(view):
+    """
+    Return the ordering of `view`'s rows: the result of its
+    ``get_ordering()`` method, which may depend on the request, or else its
+    ``ordering`` attribute.
+    """
+
+    get_ordering = getattr(view, "get_ordering", None)
+    if get_ordering is not None:
+        return tuple(get_ordering())
+    return tuple(getattr(view, "ordering", None) or ())
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination seeking on the full ordering key.
+
+    Unlike DRF's ``CursorPagination``, which stores the first ordering value
+    and an offset, the cursor holds the values of every ordering field of the
+    boundary row. A page is fetched with a range predicate on those values
+    (``published_date >= d AND (published_date > d OR id > i)``), which an
+    index on the ordering fields answers without scanning the skipped rows,
+    so page N costs the same as page 1.
+
+    The ordering is read from the view with `get_view_ordering` and must
+    end with a unique field, usually the primary key. Ordering on
+    annotations, such as a search rank, is supported. Querysets of model
+    instances and of ``values()`` rows holding the ordering fields can be
+    paginated.
+
+    Query Parameters:
+        - cursor: Opaque position returned in the ``next``/``previous`` links.
+        - page_size: Number of results per page, up to `max_page_size`.
+
+    Response:
+    ```
+    {"next": "<url>", "previous": "<url>", "results": [...]}
+    ```
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = api_settings.PAGE_SIZE or 100
+    max_page_size = 1000
+    ordering = ("id",)
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async version of `paginate_queryset`, reading the page with the async
+        ORM.
+        """
+
+        queryset = self.page_queryset(queryset, request, view)
+        return self.set_page([row async for row in queryset])
+
+    def page_queryset(self, queryset, request, view=None):
+        """
+        Return the queryset of the requested page, with one row more than the
+        page size to tell whether there is a following page.
+        """
+
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.fields = [self._field_name(item) for item in self.ordering]
+        self.page_size = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(
+            request, queryset.model
+        )
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self._reverse(item) for item in ordering]
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._after(ordering, self.position))
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        """
+        Return the page from the rows read from `page_queryset`.
+        """
+
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return OrderedDict(
+            [
+                ("next", self.get_next_link()),
+                ("previous", self.get_previous_link()),
+                ("results", data),
+            ]
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def get_ordering(self, view):
+        """
+        Return the ordering of the paginated view.
+        """
+
+        return get_view_ordering(view) or tuple(self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, reverse):
+        """
+        Return the URL of the page following (or, when `reverse` is set,
+        preceding) `row`.
+        """
+
+        if isinstance(row, dict):
+            values = [row[field] for field in self.fields]
+        else:
+            values = [self._value(row, field) for field in self.fields]
+        position = [
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in values
+        ]
+        token = json.dumps([position, int(reverse)], separators=(",", ":"))
+        encoded = urlsafe_b64encode(token.encode()).decode().rstrip("=")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, model):
+        """
+        Return the position and direction encoded in the request cursor.
+        """
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padding = "=" * (-len(encoded) % 4)
+            token = urlsafe_b64decode(encoded + padding).decode()
+            values, reverse = json.loads(token)
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                self._to_python(model, field, value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(reverse)
+
+    def _after(self, ordering, position):
+        # Rows strictly after `position` are those greater on the first
+        # differing field. The leading bound on the first field lets the
+        # database seek into the index instead of filtering from its start.
+        lookups = [
+            (self._field_name(item), "lt" if item.startswith("-") else "gt")
+            for item in ordering
+        ]
+        condition = Q()
+        for index, (field, op) in enumerate(lookups):
+            equal = {
+                name: value
+                for (name, _), value in zip(lookups, position[:index])
+            }
+            condition |= Q(**equal, **{f"{field}__{op}": position[index]})
+        first, op = lookups[0]
+        return Q(**{f"{first}__{op}e": position[0]}) & condition
+
+    @staticmethod
+    def _value(row, field):
+        try:
+            return row._meta.get_field(field).value_from_object(row)
+        except FieldDoesNotExist:
+            # An annotation, such as a search rank
+            return getattr(row, field)
+
+    @staticmethod
+    def _to_python(model, field, value):
+        try:
+            return model._meta.get_field(field).to_python(value)
+        except FieldDoesNotExist:
+            if not isinstance(value, (int, float, str)):
+                raise ValueError
+            return value
+
+    @staticmethod
+    def _field_name(item):
+        return item.lstrip("-")
+
+    @classmethod
+    def _reverse(cls, item):
+        return cls._field_name(item) if item.startswith("-") else f"-{item}"
+
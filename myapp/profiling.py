@@ -0,0 +1,192 @@
+import io
+import itertools
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core import signing
+from django.db import DatabaseError, connections
+
+from myapp.instrumentation import current_metrics
+
+SIGNER_SALT = "myapp.profiling"
+PROFILE_HEADER = "X-Profile"
+
+
+def make_token():
+    """
+    Return a value of the ``X-Profile`` request header that gets the
+    request profiled, valid for `PROFILER_TOKEN_MAX_AGE` seconds.
+    """
+
+    return signing.TimestampSigner(salt=SIGNER_SALT).sign("profile")
+
+
+def should_profile(request):
+    """
+    Return whether `request` is sampled (see the `PROFILER_SAMPLE_RATE`
+    setting) or carries a valid ``X-Profile`` token.
+    """
+
+    token = request.headers.get(PROFILE_HEADER)
+    if token is not None:
+        try:
+            signing.TimestampSigner(salt=SIGNER_SALT).unsign(
+                token,
+                max_age=getattr(settings, "PROFILER_TOKEN_MAX_AGE", 3600),
+            )
+        except signing.BadSignature:
+            return False
+        return True
+    rate = getattr(settings, "PROFILER_SAMPLE_RATE", 0)
+    return rate > 0 and random.random() < rate
+
+
+class RequestProfile:
+    """
+    Profile of a request: its Python profile, when it ran synchronously,
+    and its slowest queries with their plans.
+
+    Example:
+    ```python
+    profile = RequestProfile(request, python=True)
+    profile.start()
+    response = get_response(request)
+    profiles.add(profile.finish(response))
+    ```
+    """
+
+    def __init__(self, request, python=True):
+        self.request = request
+        self.profiler = None
+        if python:
+            # Imported on the first profile, most workers never take one
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+        self.metrics = current_metrics.get()
+
+    def start(self):
+        self.started = time.time()
+        self.metrics.statements = []
+        if self.profiler is not None:
+            try:
+                self.profiler.enable()
+            except ValueError:
+                # Another profiler is active
+                self.profiler = None
+
+    def finish(self, response):
+        """
+        Stop profiling and return the profile as a dict.
+        """
+
+        if self.profiler is not None:
+            self.profiler.disable()
+        duration = time.time() - self.started
+        statements, self.metrics.statements = self.metrics.statements, None
+        limit = getattr(settings, "PROFILER_SLOW_QUERIES", 5)
+        slowest = sorted(statements, key=lambda item: -item[3])[:limit]
+        return {
+            "method": self.request.method,
+            "path": self.request.get_full_path(),
+            "status": response.status_code,
+            "started": self.started,
+            "duration_ms": round(duration * 1000, 3),
+            "queries": len(statements),
+            "db_ms": round(sum(item[3] for item in statements) * 1000, 3),
+            "slowest_queries": [
+                {
+                    "sql": sql,
+                    "alias": alias,
+                    "duration_ms": round(elapsed * 1000, 3),
+                    "plan": explain(alias, sql, params),
+                }
+                for alias, sql, params, elapsed in slowest
+            ],
+            "profile": self.python_profile(),
+        }
+
+    def python_profile(self, limit=40):
+        if self.profiler is None:
+            return None
+        import pstats
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return stream.getvalue()
+
+
+def explain(alias, sql, params):
+    """
+    Return the plan of a SELECT statement as a list of lines, None for
+    other statements.
+    """
+
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    connection = connections[alias]
+    # The plan queries are not part of the request
+    token = current_metrics.set(None)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"{connection.ops.explain_query_prefix()} {sql}", params
+            )
+            return [
+                " ".join(str(value) for value in row)
+                for row in cursor.fetchall()
+            ]
+    except DatabaseError as error:
+        return [f"EXPLAIN failed: {error}"]
+    finally:
+        current_metrics.reset(token)
+
+
+class ProfileBuffer:
+    """
+    Ring buffer of the last request profiles of the process, holding at
+    most `PROFILER_BUFFER_SIZE` of them.
+    """
+
+    def __init__(self):
+        self._profiles = deque(
+            maxlen=getattr(settings, "PROFILER_BUFFER_SIZE", 20)
+        )
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        """
+        Store `profile` and return its id.
+        """
+
+        with self._lock:
+            profile["id"] = next(self._ids)
+            self._profiles.append(profile)
+        return profile["id"]
+
+    def get(self, id):
+        with self._lock:
+            for profile in self._profiles:
+                if profile["id"] == id:
+                    return profile
+        return None
+
+    def list(self):
+        """
+        Return the stored profiles, latest first.
+        """
+
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+profiles = ProfileBuffer()
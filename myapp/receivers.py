@@ -0,0 +1,249 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from myapp.cache import bump_generation
+from myapp.instrumentation import record_query
+from myapp.models import Author, Book, ChangeLog, MonthlyBookCount
+from myapp.signals import (
+    post_bulk_create,
+    post_bulk_delete,
+    post_bulk_update,
+)
+
+
+def update_authors(changes):
+    """
+    Apply a mapping of author ids to book count deltas to `Author.book_count`
+    and mark the authors as modified, see `AuthorQuerySet.add_book_counts`.
+    """
+
+    Author.objects.add_book_counts(changes)
+
+
+def publication_month(published_date):
+    """
+    Return the (year, month) of a book's publication date, which may still
+    be the string it was assigned as.
+    """
+
+    published_date = Book._meta.get_field("published_date").to_python(
+        published_date
+    )
+    return published_date.year, published_date.month
+
+
+@receiver(pre_save, sender=Book)
+def remember_previous_values(sender, instance, update_fields=None, **kwargs):
+    """
+    Remember the author and publication date a book is saved away from, so
+    that their counts can be decremented after the save.
+    """
+
+    instance._previous_author_id = None
+    instance._previous_published_date = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not {
+        "author", "published_date"
+    } & set(update_fields):
+        return
+    previous = (
+        Book.objects.filter(pk=instance.pk)
+        .values_list("author_id", "published_date")
+        .first()
+    )
+    if previous is not None:
+        (
+            instance._previous_author_id,
+            instance._previous_published_date,
+        ) = previous
+
+
+@receiver(post_save, sender=Book)
+def count_saved_book(sender, instance, created, **kwargs):
+    if created:
+        update_authors({instance.author_id: 1})
+        return
+    previous = getattr(instance, "_previous_author_id", None)
+    if previous is not None and previous != instance.author_id:
+        update_authors({previous: -1, instance.author_id: 1})
+    else:
+        update_authors({instance.author_id: 0})
+
+
+@receiver(post_delete, sender=Book)
+def count_deleted_book(sender, instance, **kwargs):
+    update_authors({instance.author_id: -1})
+
+
+@receiver(post_bulk_create, sender=Book)
+def count_bulk_created_books(sender, objs, **kwargs):
+    update_authors(Counter(obj.author_id for obj in objs))
+
+
+@receiver(post_bulk_delete, sender=Book)
+def count_bulk_deleted_books(sender, previous, **kwargs):
+    changes = Counter()
+    changes.subtract(row["author"] for row in previous.values())
+    update_authors(changes)
+
+
+@receiver(post_save, sender=Book)
+def count_saved_book_month(sender, instance, created, **kwargs):
+    month = publication_month(instance.published_date)
+    if created:
+        MonthlyBookCount.objects.apply_changes({month: 1})
+        return
+    previous = getattr(instance, "_previous_published_date", None)
+    if previous is not None and publication_month(previous) != month:
+        MonthlyBookCount.objects.apply_changes(
+            Counter({publication_month(previous): -1, month: 1})
+        )
+
+
+@receiver(post_delete, sender=Book)
+def count_deleted_book_month(sender, instance, **kwargs):
+    MonthlyBookCount.objects.apply_changes(
+        {publication_month(instance.published_date): -1}
+    )
+
+
+@receiver(post_bulk_create, sender=Book)
+def count_bulk_created_book_months(sender, objs, **kwargs):
+    MonthlyBookCount.objects.apply_changes(
+        Counter(publication_month(obj.published_date) for obj in objs)
+    )
+
+
+@receiver(post_bulk_delete, sender=Book)
+def count_bulk_deleted_book_months(sender, previous, **kwargs):
+    # The books of the hidden authors were left out when they were hidden,
+    # see `myapp.deletion.start_author_deletion`
+    hidden = set(
+        Author.objects.filter(
+            pk__in={row["author"] for row in previous.values()},
+            is_hidden=True,
+        ).values_list("pk", flat=True)
+    )
+    changes = Counter()
+    changes.subtract(
+        publication_month(row["published_date"])
+        for row in previous.values()
+        if row["author"] not in hidden
+    )
+    MonthlyBookCount.objects.apply_changes(changes)
+
+
+@receiver(post_bulk_update, sender=Book)
+def count_bulk_updated_book_months(sender, fields, previous, **kwargs):
+    if "published_date" not in fields:
+        return
+    changes = Counter(
+        publication_month(published_date)
+        for published_date in Book.objects.filter(pk__in=previous)
+        .values_list("published_date", flat=True)
+    )
+    changes.subtract(
+        publication_month(row["published_date"]) for row in previous.values()
+    )
+    MonthlyBookCount.objects.apply_changes(changes)
+
+
+@receiver(post_bulk_update, sender=Book)
+def count_bulk_updated_books(sender, fields, previous, **kwargs):
+    author_ids = set(
+        Book.objects.filter(pk__in=previous).values_list("author_id", flat=True)
+    )
+    if "author" in fields:
+        author_ids.update(row["author"] for row in previous.values())
+        # Marks the authors whose count changed
+        author_ids.difference_update(
+            Author.objects.filter(pk__in=author_ids).refresh_book_counts()
+        )
+    if author_ids:
+        Author.objects.filter(pk__in=author_ids).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Book)
+def log_saved(sender, instance, created, **kwargs):
+    action = ChangeLog.CREATE if created else ChangeLog.UPDATE
+    ChangeLog.objects.record(sender, action, [instance.pk])
+
+
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Book)
+def log_deleted(sender, instance, **kwargs):
+    # Sent for every book an author's deletion cascades to as well. The
+    # tombstone of a hidden author was recorded when it was hidden, see
+    # `myapp.deletion.start_author_deletion`
+    if sender is Author and instance.is_hidden:
+        return
+    ChangeLog.objects.record(sender, ChangeLog.DELETE, [instance.pk])
+
+
+@receiver(post_bulk_create, sender=Author)
+@receiver(post_bulk_create, sender=Book)
+def log_bulk_created(sender, objs, update_conflicts=False, **kwargs):
+    # The rows of an upsert may have existed, clients apply updates as
+    # upserts
+    action = ChangeLog.UPDATE if update_conflicts else ChangeLog.CREATE
+    ChangeLog.objects.record(
+        sender, action, [obj.pk for obj in objs if obj.pk is not None]
+    )
+
+
+@receiver(post_bulk_update, sender=Author)
+@receiver(post_bulk_update, sender=Book)
+def log_bulk_updated(sender, previous, **kwargs):
+    ChangeLog.objects.record(sender, ChangeLog.UPDATE, previous)
+
+
+@receiver(post_bulk_delete, sender=Book)
+def log_bulk_deleted(sender, previous, **kwargs):
+    ChangeLog.objects.record(sender, ChangeLog.DELETE, previous)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_bulk_create, sender=Author)
+@receiver(post_bulk_create, sender=Book)
+@receiver(post_bulk_update, sender=Author)
+@receiver(post_bulk_update, sender=Book)
+@receiver(post_bulk_delete, sender=Book)
+def invalidate_cached_responses(sender, **kwargs):
+    bump_generation(sender)
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """
+    Run the `SQLITE_PRAGMAS` setting on new SQLite connections.
+    """
+
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+    if connection.vendor != "sqlite" or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """
+    Count the queries of every connection in the metrics of the request
+    running them, see `myapp.middleware.RequestMetricsMiddleware`.
+    """
+
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,251 @@
+import json
+import struct
+from collections.abc import Mapping
+
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+from myapp.fragments import EncodedList
+
+# Optional accelerated encoders, see the "fast" extra of pyproject.toml
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_drf_encoder = JSONEncoder()
+
+
+def use_accelerated():
+    """
+    Return whether the installed accelerated libraries are used, see the
+    `FAST_RENDERERS` setting.
+    """
+
+    return getattr(settings, "FAST_RENDERERS", True)
+
+
+def default(value):
+    """
+    Return an encodable representation of `value`, which the encoders do
+    not handle natively, like DRF's JSON encoder: dates as ISO 8601
+    strings, decimals as floats, lazy strings, UUIDs, iterables...
+    """
+
+    return _drf_encoder.default(value)
+
+
+def stdlib_json_dumps(data):
+    """
+    Encode `data` as compact UTF-8 JSON with the standard library, exactly
+    like DRF's `JSONRenderer`.
+    """
+
+    content = json.dumps(
+        data,
+        cls=JSONEncoder,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    )
+    # Valid JSON, but not valid JavaScript, as DRF escapes them
+    content = content.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+    return content.encode()
+
+
+def orjson_dumps(data):
+    """
+    Encode `data` like `stdlib_json_dumps` with orjson, which encodes
+    dates, datetimes and UUIDs natively. Falls back to the standard library
+    for what orjson rejects, such as integers beyond 64 bits.
+    """
+
+    try:
+        content = orjson.dumps(
+            data,
+            default=default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z,
+        )
+    except orjson.JSONEncodeError:
+        return stdlib_json_dumps(data)
+    return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+        b"\xe2\x80\xa9", b"\\u2029"
+    )
+
+
+def json_dumps(data):
+    """
+    Encode `data` as compact UTF-8 JSON, with orjson when it is installed.
+    """
+
+    if orjson is not None and use_accelerated():
+        return orjson_dumps(data)
+    return stdlib_json_dumps(data)
+
+
+def msgpack_packb(data):
+    """
+    Encode `data` as MessagePack with the msgpack library, other values
+    than those of JSON being encoded like `default` does.
+    """
+
+    return msgpack.packb(data, default=default, use_bin_type=True)
+
+
+def pack(data):
+    """
+    Encode `data` as MessagePack in pure Python, with the same output as
+    `msgpack_packb`.
+    """
+
+    buffer = bytearray()
+    _pack(data, buffer)
+    return bytes(buffer)
+
+
+def _pack(value, buffer):
+    if value is None:
+        buffer.append(0xC0)
+    elif value is True:
+        buffer.append(0xC3)
+    elif value is False:
+        buffer.append(0xC2)
+    elif isinstance(value, int):
+        _pack_int(value, buffer)
+    elif isinstance(value, float):
+        buffer += struct.pack(">Bd", 0xCB, value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8", "surrogatepass")
+        _pack_header(len(data), buffer, 0xA0, 32, 0xD9, 0xDA, 0xDB)
+        buffer += data
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        _pack_header(len(data), buffer, None, 0, 0xC4, 0xC5, 0xC6)
+        buffer += data
+    elif isinstance(value, Mapping):
+        _pack_header(len(value), buffer, 0x80, 16, None, 0xDE, 0xDF)
+        for key, item in value.items():
+            _pack(key, buffer)
+            _pack(item, buffer)
+    elif isinstance(value, (list, tuple)):
+        _pack_header(len(value), buffer, 0x90, 16, None, 0xDC, 0xDD)
+        for item in value:
+            _pack(item, buffer)
+    else:
+        _pack(default(value), buffer)
+
+
+def _pack_int(value, buffer):
+    if 0 <= value < 0x80:
+        buffer.append(value)
+    elif -0x20 <= value < 0:
+        buffer.append(value & 0xFF)
+    elif value >= 0:
+        for code, fmt, limit in (
+            (0xCC, ">BB", 1 << 8),
+            (0xCD, ">BH", 1 << 16),
+            (0xCE, ">BI", 1 << 32),
+            (0xCF, ">BQ", 1 << 64),
+        ):
+            if value < limit:
+                buffer += struct.pack(fmt, code, value)
+                return
+        raise OverflowError("Integer value out of range")
+    else:
+        for code, fmt, limit in (
+            (0xD0, ">Bb", 1 << 7),
+            (0xD1, ">Bh", 1 << 15),
+            (0xD2, ">Bi", 1 << 31),
+            (0xD3, ">Bq", 1 << 63),
+        ):
+            if value >= -limit:
+                buffer += struct.pack(fmt, code, value)
+                return
+        raise OverflowError("Integer value out of range")
+
+
+def _pack_header(length, buffer, fixed, fixed_limit, code8, code16, code32):
+    if fixed is not None and length < fixed_limit:
+        buffer.append(fixed | length)
+    elif code8 is not None and length < 1 << 8:
+        buffer += struct.pack(">BB", code8, length)
+    elif length < 1 << 16:
+        buffer += struct.pack(">BH", code16, length)
+    elif length < 1 << 32:
+        buffer += struct.pack(">BI", code32, length)
+    else:
+        raise ValueError("Too large to be encoded as MessagePack")
+
+
+def packb(data):
+    """
+    Encode `data` as MessagePack, with the msgpack library when it is
+    installed.
+    """
+
+    if msgpack is not None and use_accelerated():
+        return msgpack_packb(data)
+    return pack(data)
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """
+    DRF's JSON renderer encoding through `json_dumps`, with orjson when it
+    is installed, and splicing the bytes of `EncodedList` values, at the
+    top level of the data or of a dict such as a page, instead of encoding
+    their items again.
+
+    Indented or ASCII only output, requested with
+    ``Accept: application/json; indent=4`` or the ``UNICODE_JSON`` and
+    ``COMPACT_JSON`` DRF settings, is encoded by DRF's renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if isinstance(data, EncodedList):
+            return data.encode()
+        if isinstance(data, dict) and any(
+            isinstance(value, EncodedList) for value in data.values()
+        ):
+            return b"{" + b",".join(
+                json_dumps(str(key)) + b":" + self._render_value(value)
+                for key, value in data.items()
+            ) + b"}"
+        return json_dumps(data)
+
+    @staticmethod
+    def _render_value(value):
+        if isinstance(value, EncodedList):
+            return value.encode()
+        return json_dumps(value)
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    Renderer encoding responses as MessagePack, a binary equivalent of
+    JSON whose payloads are smaller and faster to decode. Selected with
+    ``Accept: application/msgpack`` or ``?format=msgpack``.
+
+    Values other than those of JSON, such as dates, are represented as in
+    JSON responses (see `default`).
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return packb(data)
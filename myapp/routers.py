@@ -0,0 +1,22 @@
+from rest_framework.routers import DefaultRouter, Route
+
+
+class BulkRouter(DefaultRouter):
+    """
+    Router additionally mapping ``PATCH`` on the list route to the
+    ``bulk_partial_update`` action of viewsets implementing it (see
+    `BulkWriteMixin`).
+    """
+
+    routes = [
+        Route(
+            url=route.url,
+            mapping={**route.mapping, "patch": "bulk_partial_update"},
+            name=route.name,
+            detail=route.detail,
+            initkwargs=route.initkwargs,
+        )
+        if isinstance(route, Route) and route.name == "{basename}-list"
+        else route
+        for route in DefaultRouter.routes
+    ]
@@ -0,0 +1,153 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from myapp.models import Book
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def get_search_backend():
+    """
+    Return the book search backend selected with the `BOOK_SEARCH_BACKEND`
+    setting.
+    """
+
+    path = getattr(
+        settings, "BOOK_SEARCH_BACKEND", "myapp.search.SQLiteFTSBackend"
+    )
+    return import_string(path)()
+
+
+def tokenize(query):
+    """
+    Return the words of a search query.
+    """
+
+    return TOKEN_RE.findall(query)
+
+
+class BaseSearchBackend:
+    """
+    Full-text search over book titles and author names.
+
+    Backends filter a book queryset down to the books matching a query and
+    annotate them with ``search_rank``, lower being more relevant, so that
+    results can be ordered (and keyset paginated) by rank. Backends keep
+    their index up to date themselves and rebuild it on demand.
+    """
+
+    def search(self, queryset, query):
+        """
+        Return the books of `queryset` matching every word of `query`, the
+        last one as a prefix, annotated with ``search_rank``.
+        """
+
+        raise NotImplementedError
+
+    def rebuild(self):
+        """
+        Rebuild the index from the books table. Returns the number of
+        indexed books.
+        """
+
+        raise NotImplementedError
+
+    def no_results(self, queryset):
+        """
+        Return an empty result, which can be ordered by rank like the others.
+        """
+
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        ).none()
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    Search backend using the SQLite FTS5 table created by the
+    ``0005_book_search`` migration.
+
+    The table holds the title and author name of every book under the
+    book's id and is updated by triggers on the books and authors tables,
+    so every write path, bulk and raw ones included, keeps it current.
+    Results are ranked with BM25.
+    """
+
+    table = "myapp_book_search"
+
+    def search(self, queryset, query):
+        match = self.match_expression(query)
+        if match is None:
+            return self.no_results(queryset)
+        table = self.table
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT rowid FROM {table} WHERE {table} MATCH %s", (match,)
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT bm25({table}) FROM {table} "
+                f"WHERE {table} MATCH %s "
+                f"AND rowid = {Book._meta.db_table}.{Book._meta.pk.column}",
+                (match,),
+                output_field=FloatField(),
+            )
+        )
+
+    def match_expression(self, query):
+        """
+        Return the FTS5 query matching the words of `query`, or None when it
+        has none. The words are quoted, so the FTS5 operators of the query
+        are searched as text.
+        """
+
+        words = tokenize(query)
+        if not words:
+            return None
+        phrases = [f'"{word}"' for word in words]
+        phrases[-1] += "*"
+        return " ".join(phrases)
+
+    def rebuild(self):
+        table = self.table
+        with connections["default"].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(
+                f"INSERT INTO {table} (rowid, title, author_name) "
+                "SELECT myapp_book.id, myapp_book.title, myapp_author.name "
+                "FROM myapp_book JOIN myapp_author "
+                "ON myapp_author.id = myapp_book.author_id"
+            )
+            cursor.execute(
+                f"INSERT INTO {table} ({table}) VALUES ('optimize')"
+            )
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            return cursor.fetchone()[0]
+
+
+class ContainsSearchBackend(BaseSearchBackend):
+    """
+    Index-less search backend matching words with ``icontains``, for
+    databases without a search backend of their own. Every match has the
+    same rank.
+    """
+
+    def search(self, queryset, query):
+        words = tokenize(query)
+        if not words:
+            return self.no_results(queryset)
+        for word in words:
+            queryset = queryset.filter(
+                Q(title__icontains=word) | Q(author__name__icontains=word)
+            )
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    def rebuild(self):
+        return Book.objects.count()
@@ -0,0 +1,85 @@
+import random
+from collections import Counter
+from datetime import date, timedelta
+from itertools import accumulate
+
+from myapp.models import Author, Book
+from myapp.streaming import batched
+
+FIRST_NAMES = (
+    "Ada", "Alan", "Barbara", "Chinua", "Doris", "Edith", "Frank", "Grace",
+    "Haruki", "Isabel", "James", "Kazuo", "Leo", "Margaret", "Naguib",
+    "Octavia", "Pablo", "Rosa", "Salman", "Toni", "Ursula", "Virginia",
+    "Wole", "Yasunari", "Zadie",
+)
+LAST_NAMES = (
+    "Achebe", "Atwood", "Butler", "Calvino", "Eco", "Ferrante", "Garcia",
+    "Herbert", "Ishiguro", "Kingsolver", "Le Guin", "Lessing", "Mahfouz",
+    "Morrison", "Murakami", "Neruda", "Okri", "Pamuk", "Rushdie", "Smith",
+    "Soyinka", "Tolstoy", "Walker", "Woolf", "Zola",
+)
+TITLE_WORDS = (
+    "Shadow", "River", "Winter", "House", "Garden", "Night", "Empire",
+    "Silence", "Mirror", "Island", "Memory", "Fire", "Storm", "City",
+    "Dream", "Harvest", "Ocean", "Stranger", "Kingdom", "Light", "Road",
+    "Secret", "Journey", "Machine", "Song", "Desert", "Tide", "Crown",
+)
+
+# The date publication ages are counted back from, fixed so that the same
+# seed always produces the same catalogue.
+REFERENCE_DATE = date(2024, 1, 1)
+
+
+def generate_catalog(authors, books, seed=0, batch_size=1000):
+    """
+    Insert `authors` authors and `books` books generated from `seed` and
+    return the created authors.
+
+    The same arguments always produce the same catalogue, with skewed
+    distributions resembling real ones:
+        - Books per author follow a Zipf law: the first authors have many
+          books, most have a few or none.
+        - Publication ages are exponentially distributed, recent books are
+          more frequent than old ones, over a century at most.
+        - Titles have from one to five words.
+
+    Rows are inserted with ``bulk_create`` in batches of `batch_size`, the
+    books of an author together, so the denormalized counts are updated
+    once per author and batch.
+    """
+
+    rng = random.Random(seed)
+    created = []
+    for batch in batched(range(authors), batch_size):
+        created.extend(
+            Author.objects.bulk_create(
+                Author(
+                    name=f"{rng.choice(FIRST_NAMES)} "
+                    f"{rng.choice(LAST_NAMES)}",
+                    email=f"author{index}@seed{seed}.example.com",
+                )
+                for index in batch
+            )
+        )
+    if not created:
+        return created
+
+    weights = accumulate(1 / rank ** 1.1 for rank in range(1, authors + 1))
+    counts = Counter(
+        rng.choices(range(authors), cum_weights=list(weights), k=books)
+    )
+    rows = (
+        Book(
+            title=" ".join(
+                rng.choice(TITLE_WORDS) for _ in range(rng.randint(1, 5))
+            ),
+            published_date=REFERENCE_DATE
+            - timedelta(days=min(int(rng.expovariate(1 / 3000)), 36500)),
+            author_id=created[index].pk,
+        )
+        for index in sorted(counts)
+        for _ in range(counts[index])
+    )
+    for batch in batched(rows, batch_size):
+        Book.objects.bulk_create(batch)
+    return created
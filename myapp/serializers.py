@@ -1,14 +1,198 @@
 from datetime import date
 
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
+from rest_framework.reverse import reverse
+from rest_framework.utils.urls import replace_query_param
 
+from myapp.instrumentation import measure
 from myapp.models import (
     Author,
     Book,
+    DeletionJob,
 )
 
 
-class BookSerializer(serializers.ModelSerializer):
+def parse_field_selection(value):
+    """
+    Parse a comma separated field selection into a nested tree.
+
+    Dotted names select fields of nested serializers, so
+    ``"name,books.title"`` becomes ``{"name": {}, "books": {"title": {}}}``.
+    An empty subtree means the whole field.
+    """
+
+    tree = {}
+    for item in value.split(","):
+        path = [part for part in item.strip().split(".") if part]
+        node = tree
+        for part in path:
+            node = node.setdefault(part, {})
+    return tree
+
+
+def get_request_date(request):
+    """
+    Return the date the representations of `request` are computed from,
+    the current date when first asked, so that a request spanning midnight
+    uses one date throughout.
+    """
+
+    today = getattr(request, "_today", None)
+    if today is None:
+        today = request._today = date.today()
+    return today
+
+
+def has_date_relative_fields(serializer):
+    """
+    Return whether the representation of `serializer` depends on the current
+    date: whether it, or a serializer nested in it, includes one of the
+    fields listed in its ``Meta.date_relative_fields``.
+    """
+
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    meta = getattr(serializer, "Meta", None)
+    names = getattr(meta, "date_relative_fields", ())
+    for name, field in serializer.fields.items():
+        if name in names:
+            return True
+        if isinstance(field, serializers.BaseSerializer) and (
+            has_date_relative_fields(field)
+        ):
+            return True
+    return False
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin that restricts the serialized output to a subset of
+    fields.
+
+    Accepts three optional keyword arguments, each a tree as returned by
+    `parse_field_selection`:
+
+        - fields: only these fields are kept.
+        - omit: these fields are removed.
+        - expand: these fields are replaced by the serializer declared for
+          them in ``Meta.expandable_fields``.
+
+    Selections addressing nested serializers (``books.title``) are forwarded
+    to the nested serializer, which must use this mixin as well.
+    """
+
+    def __init__(self, *args, fields=None, omit=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.restrict_fields(fields=fields, omit=omit, expand=expand)
+
+    def restrict_fields(self, fields=None, omit=None, expand=None):
+        """
+        Apply a field selection to this serializer and its nested serializers.
+        """
+
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        for name, subtree in (expand or {}).items():
+            if name in expandable and name in self.fields:
+                self.fields[name] = expandable[name](read_only=True)
+            self._restrict_nested(name, expand=subtree)
+
+        if fields:
+            for name in list(self.fields):
+                if name not in fields:
+                    self.fields.pop(name)
+            for name, subtree in fields.items():
+                self._restrict_nested(name, fields=subtree)
+
+        for name, subtree in (omit or {}).items():
+            if not subtree:
+                self.fields.pop(name, None)
+            else:
+                self._restrict_nested(name, omit=subtree)
+
+    def _restrict_nested(self, name, **selection):
+        if not any(selection.values()):
+            return
+        field = self.fields.get(name)
+        field = getattr(field, "child", field)
+        if isinstance(field, DynamicFieldsMixin):
+            field.restrict_fields(**selection)
+
+
+class MeasuredMixin:
+    """
+    Serializer mixin counting the time spent representing instances in the
+    serialization time of the request, see
+    `myapp.middleware.RequestMetricsMiddleware`.
+    """
+
+    def to_representation(self, instance):
+        with measure("serialize"):
+            return super().to_representation(instance)
+
+
+class FilteredListURLField(serializers.Field):
+    """
+    Read-only field linking to a list route filtered on the primary key of
+    the serialized instance, e.g. ``/books/?author=1`` for an author.
+
+    Its source is the primary key column, which the eager loading and the
+    fast read path load like any column.
+    """
+
+    def __init__(self, view_name, filter_param, **kwargs):
+        self.view_name = view_name
+        self.filter_param = filter_param
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        url = reverse(self.view_name, request=self.context.get("request"))
+        return replace_query_param(url, self.filter_param, value)
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key related field resolving its value from instances loaded
+    ahead of validation, when available.
+
+    Bulk writes validate many rows referencing the same related objects;
+    instead of one query per row, the view loads them all at once and passes
+    them in the serializer context as ``{"prefetched": {Model: {pk: obj}}}``.
+    Without that context entry the field behaves like
+    `PrimaryKeyRelatedField`.
+    """
+
+    def to_internal_value(self, data):
+        queryset = self.get_queryset()
+        prefetched = self.context.get("prefetched", {}).get(queryset.model)
+        if prefetched is None or self.pk_field is not None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = queryset.model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in prefetched:
+            self.fail("does_not_exist", pk_value=data)
+        return prefetched[pk]
+
+
+class AuthorSummarySerializer(serializers.ModelSerializer):
+    """
+    Compact Author representation used when a book's author is expanded
+    with ``?expand=author``.
+    """
+
+    class Meta:
+        model = Author
+        fields = ("id", "name", "email")
+
+
+class BookSerializer(
+    MeasuredMixin, DynamicFieldsMixin, serializers.ModelSerializer
+):
     """
     Serializer class for the Book model.
 
@@ -16,8 +200,13 @@ class BookSerializer(serializers.ModelSerializer):
     JSON representations and vice versa. It utilizes the default ModelSerializer
     provided by Django REST framework, which automatically generates fields
     based on the Book model's attributes.
+
+    The `author` primary key can be expanded to an `AuthorSummarySerializer`
+    representation, see `DynamicFieldsMixin`.
     """
 
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+
     author_name = serializers.CharField(source="author.name", read_only=True)
     since_creation_in_days = serializers.SerializerMethodField(
         "get_since_creation_in_days"
@@ -32,13 +221,31 @@ class BookSerializer(serializers.ModelSerializer):
             "author_name",
             "since_creation_in_days",
         )
+        expandable_fields = {"author": AuthorSummarySerializer}
+        # No books are added to the authors being deleted
+        extra_kwargs = {"author": {"queryset": Author.objects.visible()}}
+        field_dependencies = {"since_creation_in_days": ("published_date",)}
+        # Computed from the current date, see `has_date_relative_fields`
+        date_relative_fields = ("since_creation_in_days",)
 
-    def get_since_creation_in_days(self, obj: Book) -> str:
-        days_since_creation = (date.today() - obj.published_date).days
+    def get_since_creation_in_days(self, obj: Book) -> int:
+        # Computed by the database when the queryset has the
+        # `BookQuerySet.with_age()` annotation, otherwise from the `today`
+        # of the serializer context or the date of the request, so that
+        # every row uses the date the cached responses are keyed by.
+        days_since_creation = getattr(obj, "since_creation_in_days", None)
+        if days_since_creation is None:
+            request = self.context.get("request")
+            today = self.context.get("today") or (
+                get_request_date(request) if request else date.today()
+            )
+            days_since_creation = (today - obj.published_date).days
         return days_since_creation
 
 
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(
+    MeasuredMixin, DynamicFieldsMixin, serializers.ModelSerializer
+):
     """
     Serializer for the Author model.
 
@@ -54,13 +261,37 @@ class AuthorSerializer(serializers.ModelSerializer):
     Meta:
         model (Author): The model class that this serializer is associated
           with.
-        fields (str): The fields to include in the serialized representation.
-          Here, "__all__" indicates that all fields from the Author model
-          should be included.
+        exclude (tuple): The fields of the Author model left out of the
+          serialized representation, all the others being included.
     """
 
     books = BookSerializer(many=True, read_only=True)
 
     class Meta:
         model = Author
-        fields = "__all__"
+        exclude = ("is_hidden",)
+
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer of the background deletion of an author, see
+    `myapp.models.DeletionJob`, linking to its status.
+    """
+
+    url = serializers.HyperlinkedIdentityField(
+        view_name="deletion-job-detail"
+    )
+
+    class Meta:
+        model = DeletionJob
+        fields = (
+            "id",
+            "url",
+            "author_id",
+            "status",
+            "total_books",
+            "deleted_books",
+            "error",
+            "created_at",
+            "finished_at",
+        )
@@ -0,0 +1,21 @@
+from django.dispatch import Signal
+
+# Sent by `AuthorQuerySet.bulk_create()` and `BookQuerySet.bulk_create()`
+# after the rows are inserted.
+# Arguments: sender (the model), objs (the created instances),
+# update_conflicts (whether existing rows may have been updated instead, on
+# an upsert).
+post_bulk_create = Signal()
+
+# Sent by `AuthorQuerySet.update()` and `BookQuerySet.update()`, which
+# `bulk_update()` uses as well, after the rows are updated.
+# Arguments: sender (the model), fields (names of the updated fields),
+# previous (dict mapping the primary key of every updated row to a dict of
+# its values of the ``author`` and ``published_date`` fields of `fields`
+# before the update, for books).
+post_bulk_update = Signal()
+
+# Sent by `BookQuerySet.bulk_delete()` after the rows are deleted.
+# Arguments: sender (the model), previous (dict mapping the primary key of
+# every deleted row to a dict of its ``author`` and ``published_date``).
+post_bulk_delete = Signal()
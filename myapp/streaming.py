@@ -0,0 +1,76 @@
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from myapp.renderers import json_dumps
+
+
+def batched(iterable, size):
+    """
+    Yield lists of `size` items (the last one may be shorter) from
+    `iterable`.
+    """
+
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def encode(item):
+    """
+    Encode `item` like `myapp.renderers.JSONRenderer` does.
+    """
+
+    return json_dumps(item)
+
+
+def json_array_stream(chunks):
+    """
+    Encode an iterable of lists of items as one JSON array, one chunk of
+    bytes per list.
+    """
+
+    separator = b"["
+    for chunk in chunks:
+        if chunk:
+            yield separator + b",".join(encode(item) for item in chunk)
+            separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def ndjson_stream(chunks):
+    """
+    Encode an iterable of lists of items as newline delimited JSON, one
+    chunk of bytes per list.
+    """
+
+    for chunk in chunks:
+        if chunk:
+            yield b"".join(encode(item) + b"\n" for item in chunk)
+
+
+def _next_chunk(iterator):
+    return next(iterator, None)
+
+
+async def async_stream(iterator):
+    """
+    Consume a synchronous iterator of bytes from an async context, one item
+    at a time in the thread running synchronous code.
+
+    Django serves a synchronous iterator under ASGI by reading it to the end
+    before sending anything, which defeats streaming; this wrapper keeps the
+    memory usage bounded to one chunk. Database access stays on the thread
+    the queryset iterator was opened on.
+    """
+
+    iterator = iter(iterator)
+    next_chunk = sync_to_async(_next_chunk, thread_sensitive=True)
+    while True:
+        chunk = await next_chunk(iterator)
+        if chunk is None:
+            return
+        yield chunk
@@ -27,4 +27,4 @@ class PublishedAfterBookListTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         # Assert the response data matches the only one books match this criteria
-        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(len(response.json()['results']), 1)
@@ -0,0 +1,99 @@
+from datetime import date
+from asgiref.sync import sync_to_async
+from unittest import mock
+from django.test import AsyncClient, TestCase
+from django.urls import resolve, reverse
+from rest_framework.test import APIClient
+from myapp.async_views import AsyncReadView
+from myapp.cache import get_cache
+from myapp.models import Author, Book
+from myapp.views import AuthorViewSet, BookViewSet
+
+class AsyncReadViewTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author1 = Author.objects.create(name='Author1', email='author1@example.com')
+        self.author2 = Author.objects.create(name='Author2', email='author2@example.com')
+        for i in range(3):
+            Book.objects.create(title=f'Book{i}', published_date=date(2023, 1, i + 1), author=self.author1)
+        self.book = Book.objects.create(title='Other', published_date=date(2022, 1, 1), author=self.author2)
+        self.sync_client = APIClient()
+        self.async_client = AsyncClient()
+
+    async def assertSameResponse(self, url, data=None):
+        # The cache is shared, so compare fresh responses from both paths
+        await get_cache().aclear()
+        response = await self.async_client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        await get_cache().aclear()
+        expected = await self.sync_get(url, data)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response['Content-Type'], expected['Content-Type'])
+        return response
+
+    async def sync_get(self, url, data=None):
+        return await sync_to_async(self.sync_client.get)(url, data)
+
+    def test_reads_resolve_to_async_views(self):
+        match = resolve(reverse('book-list'), urlconf='apexiveproject.async_urls')
+        self.assertIs(match.func.view_class, AsyncReadView)
+        match = resolve('/authors-with-multiple-books/', urlconf='apexiveproject.async_urls')
+        self.assertIs(match.func.view_class, AsyncReadView)
+
+    async def test_book_list_and_detail(self):
+        with mock.patch.object(BookViewSet, 'list', side_effect=AssertionError), \
+                mock.patch.object(BookViewSet, 'retrieve', side_effect=AssertionError):
+            response = await self.async_client.get(reverse('book-list'))
+            self.assertEqual(len(response.json()['results']), 4)
+            response = await self.async_client.get(reverse('book-detail', args=[self.book.pk]))
+            self.assertEqual(response.json()['author_name'], 'Author2')
+        await self.assertSameResponse(reverse('book-list'))
+        await self.assertSameResponse(reverse('book-list'), {'fields': 'title', 'expand': 'author'})
+        await self.assertSameResponse(reverse('book-detail', args=[self.book.pk]))
+
+    async def test_author_list_and_detail_with_nested_books(self):
+        with mock.patch.object(AuthorViewSet, 'list', side_effect=AssertionError):
+            response = await self.async_client.get(reverse('author-list'))
+            self.assertEqual(len(response.json()['results'][0]['books']), 3)
+        await self.assertSameResponse(reverse('author-list'))
+        await self.assertSameResponse(reverse('author-detail', args=[self.author1.pk]))
+        await self.assertSameResponse(reverse('author-list'), {'fields': 'name,books.title'})
+
+    async def test_published_after_and_multiple_books(self):
+        await self.assertSameResponse(reverse('published-after-book-list', kwargs={'date': '2023-01-01'}))
+        response = await self.assertSameResponse('/authors-with-multiple-books/')
+        self.assertEqual([author['name'] for author in response.json()['results']], ['Author1'])
+
+    async def test_pagination_links(self):
+        response = await self.assertSameResponse(reverse('book-list'), {'page_size': 2})
+        next_page = await self.assertSameResponse(response.json()['next'])
+        self.assertEqual([book['title'] for book in next_page.json()['results']], ['Book1', 'Book2'])
+        previous = await self.async_client.get(next_page.json()['previous'])
+        self.assertEqual(previous.json()['results'], response.json()['results'])
+
+    async def test_not_found(self):
+        response = await self.async_client.get(reverse('book-detail', args=[999]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Not found.'})
+        response = await self.async_client.get(reverse('book-detail', args=['abc']))
+        self.assertEqual(response.status_code, 404)
+        response = await self.sync_get(reverse('book-detail', args=['abc']))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_cache_and_conditional_get(self):
+        first = await self.async_client.get(reverse('book-list'))
+        self.assertEqual(first['X-Cache'], 'MISS')
+        second = await self.async_client.get(reverse('book-list'))
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        response = await self.async_client.get(reverse('book-list'), headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_other_requests_use_drf_views(self):
+        data = {'title': 'New', 'published_date': '2023-02-01', 'author': self.author1.pk}
+        response = await self.async_client.post(reverse('book-list'), data, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        response = await self.async_client.get(reverse('book-list'), headers={'Accept': 'text/html'})
+        self.assertIn(b'<html', response.content)
+        response = await self.async_client.get(reverse('book-list'), {'stream': 'ndjson'})
+        self.assertTrue(response.streaming)
@@ -17,7 +17,7 @@ class AuthorViewSetTestCase(TestCase):
         url = reverse('author-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), Author.objects.count())
+        self.assertEqual(len(response.data['results']), Author.objects.count())
 
     def test_retrieve_author(self):
         # Test GET request to retrieve a specific author
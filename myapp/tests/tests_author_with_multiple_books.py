@@ -21,7 +21,7 @@ class AuthorsWithMultipleBooksAPIViewTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         # Ensure only one author returned with their books
-        self.assertEqual(1, len(response.json()))
+        self.assertEqual(1, len(response.json()['results']))
 
     def test_empty_case_authors_with_multiple_books_api(self):
         # Create a new author with a single book
@@ -32,4 +32,4 @@ class AuthorsWithMultipleBooksAPIViewTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         # Ensure that authors with only one book are not included in the response
-        self.assertNotIn(author3.id, [author['id'] for author in response.data])
+        self.assertNotIn(author3.id, [author['id'] for author in response.data['results']])
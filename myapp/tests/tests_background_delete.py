@@ -0,0 +1,128 @@
+from datetime import date
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp import deletion
+from myapp.cache import get_cache
+from myapp.models import Author, Book, BookQuerySet, ChangeLog, DeletionJob, MonthlyBookCount
+
+@override_settings(DELETION_JOBS_INLINE=True, DELETION_BATCH_SIZE=2, DELETION_BATCH_PAUSE=0)
+class BackgroundDeleteTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+        self.other = Author.objects.create(name='Author2', email='author2@example.com')
+        for i in range(5):
+            Book.objects.create(title=f'Book{i}', published_date=date(2020, 1 + i % 2, 1), author=self.author)
+        Book.objects.create(title='Other', published_date=date(2020, 1, 1), author=self.other)
+        self.client = APIClient()
+
+    def delete(self):
+        return self.client.delete(f"{reverse('author-detail', args=[self.author.pk])}?background=true")
+
+    def test_hidden_then_deleted(self):
+        # Cached before the deletion
+        self.assertEqual(len(self.client.get(reverse('book-list')).data['results']), 6)
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.delete()
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertEqual(response.data['total_books'], 5)
+        self.assertEqual(response['Location'], response.data['url'])
+
+        # Hidden from the API before any book is deleted
+        self.assertEqual(Book.objects.count(), 6)
+        self.assertEqual(self.client.get(reverse('author-detail', args=[self.author.pk])).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual([book['title'] for book in self.client.get(reverse('book-list')).data['results']], ['Other'])
+        self.assertEqual([author['name'] for author in self.client.get(reverse('author-list')).data['results']], ['Author2'])
+        self.assertEqual([author['name'] for author in self.client.get(reverse('catalog-stats')).data['books_per_author']], ['Author2'])
+
+        for callback in callbacks:
+            callback()
+        job = self.client.get(response['Location']).data
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['deleted_books'], 5)
+        self.assertIsNotNone(job['finished_at'])
+        self.assertFalse(Author.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(list(Book.objects.values_list('title', flat=True)), ['Other'])
+
+    def test_aggregates_follow_the_batches(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.delete()
+        self.assertEqual(dict(MonthlyBookCount.objects.values_list('month', 'book_count')), {1: 1, 2: 0})
+        stdout = StringIO()
+        call_command('rebuild_stats', '--verify', stdout=stdout)
+        self.assertEqual(self.client.get(reverse('catalog-stats')).data['book_count'], 1)
+        deleted = set(ChangeLog.objects.filter(model_name='book', action='delete').values_list('object_id', flat=True))
+        self.assertEqual(len(deleted), 5)
+
+    def test_author_tombstone_recorded_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.delete()
+        self.assertFalse(Author.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(ChangeLog.objects.filter(model_name='author', action='delete', object_id=self.author.pk).count(), 1)
+
+    def test_stats_during_pending_job(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.delete()
+        self.assertEqual(DeletionJob.objects.get().status, DeletionJob.PENDING)
+        stats = self.client.get(reverse('catalog-stats')).data
+        self.assertEqual(stats['book_count'], 1)
+        self.assertEqual(sum(year['book_count'] for year in stats['books_per_year']), 1)
+        self.assertEqual(sum(month['book_count'] for month in stats['books_per_month']), 1)
+        self.assertEqual([author['name'] for author in stats['books_per_author']], ['Author2'])
+        call_command('rebuild_stats', '--verify', stdout=StringIO())
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(dict(MonthlyBookCount.objects.values_list('month', 'book_count')), {1: 1, 2: 0})
+        call_command('rebuild_stats', '--verify', stdout=StringIO())
+
+    def test_books_deleted_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.delete()
+        book_deletes = [query['sql'] for query in queries if query['sql'].startswith('DELETE FROM "myapp_book"')]
+        self.assertEqual(len(book_deletes), 3)
+
+    def test_no_books_added_to_hidden_author(self):
+        with self.captureOnCommitCallbacks():
+            self.delete()
+        data = {'title': 'New', 'published_date': '2024-01-01', 'author': self.author.pk}
+        response = self.client.post(reverse('book-list'), data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('author', response.data)
+
+    def test_failed_job_is_resumed(self):
+        with mock.patch.object(BookQuerySet, 'bulk_delete', side_effect=DatabaseError('locked')), self.assertLogs('myapp.deletion', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.delete()
+        job = DeletionJob.objects.get(pk=response.data['id'])
+        self.assertEqual(job.status, DeletionJob.FAILED)
+        self.assertEqual(job.error, 'locked')
+        self.assertTrue(Author.objects.get(pk=self.author.pk).is_hidden)
+
+        stdout = StringIO()
+        call_command('run_deletion_jobs', stdout=stdout)
+        self.assertIn('done, 5 book(s) deleted', stdout.getvalue())
+        self.assertFalse(Author.objects.filter(pk=self.author.pk).exists())
+
+    def test_synchronous_delete(self):
+        response = self.client.delete(reverse('author-detail', args=[self.author.pk]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(Book.objects.count(), 1)
+        self.assertFalse(DeletionJob.objects.exists())
+
+    @override_settings(DELETION_JOBS_INLINE=False)
+    def test_jobs_run_on_the_worker(self):
+        with mock.patch.object(deletion, 'get_executor') as get_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.delete()
+        get_executor.return_value.submit.assert_called_once_with(deletion._run_in_worker, response.data['id'])
+        self.assertEqual(Book.objects.count(), 6)
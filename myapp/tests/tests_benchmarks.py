@@ -0,0 +1,69 @@
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from myapp.benchmarks import CASES, over_budget, regressions, run_benchmarks, uncovered_routes
+from myapp.cache import get_cache
+from myapp.models import Author, Book
+
+class SeedCatalogTestCase(TestCase):
+    def catalog(self):
+        return list(Book.objects.order_by('pk').values_list('title', 'published_date', 'author__email'))
+
+    def test_deterministic(self):
+        call_command('seed_catalog', authors=20, books=300, seed=3, stdout=StringIO())
+        first = self.catalog()
+        self.assertEqual(len(first), 300)
+        call_command('seed_catalog', authors=20, books=300, seed=3, clear=True, stdout=StringIO())
+        self.assertEqual(self.catalog(), first)
+        call_command('seed_catalog', authors=20, books=300, seed=4, clear=True, stdout=StringIO())
+        self.assertNotEqual(self.catalog(), first)
+
+    def test_skewed(self):
+        call_command('seed_catalog', authors=50, books=1000, stdout=StringIO())
+        counts = list(Author.objects.order_by('-book_count').values_list('book_count', flat=True))
+        self.assertEqual(sum(counts), 1000)
+        # The most prolific author has more books than the median one by far
+        self.assertGreater(counts[0], 10 * max(counts[25], 1))
+        call_command('rebuild_stats', verify=True, stdout=StringIO())
+
+    def test_existing_seed(self):
+        call_command('seed_catalog', authors=2, books=2, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('seed_catalog', authors=2, books=2, stdout=StringIO())
+
+    def test_sizes(self):
+        # Authors without books are a valid catalogue
+        call_command('seed_catalog', authors=2, books=0, stdout=StringIO())
+        self.assertEqual(Author.objects.count(), 2)
+        with self.assertRaisesMessage(CommandError, 'must not be negative'):
+            call_command('seed_catalog', authors=2, books=-1, clear=True, stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'batch size must be positive'):
+            call_command('seed_catalog', authors=2, books=2, batch_size=0, clear=True, stdout=StringIO())
+
+
+class EndpointBudgetTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+
+    def test_every_route_is_benchmarked(self):
+        self.assertEqual(uncovered_routes(), set())
+
+    def test_query_budgets(self):
+        # Query counts must not grow with the catalogue
+        results = run_benchmarks([50, 500], repeat=1)
+        self.assertEqual(len(results), 2 * len(CASES))
+        self.assertEqual(over_budget(results), [])
+        self.assertEqual(Book.objects.count(), 0)
+
+    def test_over_budget_and_regressions(self):
+        results = [{'case': 'book list', 'size': 100, 'queries': 4, 'query_budget': 3, 'median_ms': 20.0, 'min_ms': 18.0}]
+        self.assertEqual(over_budget(results), ['book list (100 books) ran 4 queries, its budget is 3.'])
+        self.assertEqual(regressions(results, [{**results[0], 'median_ms': 17.0}]), [])
+        self.assertEqual(
+            regressions(results, [{**results[0], 'median_ms': 10.0}]),
+            ['book list (100 books) took 20.0 ms, 10.0 ms in the baseline.'],
+        )
+        # Below the absolute noise allowance
+        self.assertEqual(regressions([{**results[0], 'median_ms': 0.9}], [{**results[0], 'median_ms': 0.3}]), [])
+        self.assertEqual(regressions(results, [{**results[0], 'size': 1000}]), [])
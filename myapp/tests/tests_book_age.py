@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+from unittest import mock
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.models import Author, Book
+from myapp.serializers import BookSerializer
+
+class BookAgeAnnotationTestCase(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+        self.book = Book.objects.create(title='Book1', published_date=date(2023, 12, 1), author=self.author)
+
+    def test_annotation_computed_in_sql(self):
+        book = Book.objects.with_age(date(2024, 3, 1)).get()
+        self.assertEqual(book.since_creation_in_days, 91)
+
+    def test_serializer_prefers_annotation_and_context_today(self):
+        book = Book.objects.with_age(date(2024, 1, 1)).get()
+        self.assertEqual(BookSerializer(book).data['since_creation_in_days'], 31)
+        serializer = BookSerializer(self.book, context={'today': date(2023, 12, 11)})
+        self.assertEqual(serializer.data['since_creation_in_days'], 10)
+
+
+class BookAgeFilterTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+        today = date.today()
+        for days in (0, 3, 3, 10, 40):
+            Book.objects.create(title=f'Book{days}', published_date=today - timedelta(days=days), author=self.author)
+        self.client = APIClient()
+
+    def ages(self, response):
+        return [book['since_creation_in_days'] for book in response.data['results']]
+
+    def test_max_age_days(self):
+        response = self.client.get(reverse('book-list'), {'max_age_days': 3})
+        self.assertEqual(sorted(self.ages(response)), [0, 3, 3])
+        response = self.client.get(reverse('book-list'), {'max_age_days': 3, 'fast': 'true'})
+        self.assertEqual(sorted(self.ages(response)), [0, 3, 3])
+
+    def test_invalid_max_age_days(self):
+        for value in ('-1', 'abc', '99999999999'):
+            response = self.client.get(reverse('book-list'), {'max_age_days': value})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ordering_with_pagination(self):
+        url = reverse('book-list')
+        response = self.client.get(url, {'ordering': 'since_creation_in_days', 'page_size': 2})
+        ages = self.ages(response)
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ages += self.ages(response)
+        self.assertEqual(ages, [0, 3, 3, 10, 40])
+        response = self.client.get(url, {'ordering': '-since_creation_in_days'})
+        self.assertEqual(self.ages(response), [40, 10, 3, 3, 0])
+        response = self.client.get(url, {'ordering': 'title'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_is_an_index_range(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('book-list'), {'max_age_days': 5, 'ordering': 'since_creation_in_days', 'fields': 'title'})
+        # The page query, before the one loading the rows missing from the fragment cache
+        sql = queries[-2]['sql']
+        self.assertIn('"myapp_book"."published_date" >=', sql.split(' WHERE ', 1)[1])
+        # The age is not computed when it is not serialized
+        self.assertNotIn('JULIANDAY', sql)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('USING INDEX book_published_id_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_update_response_has_current_age(self):
+        book = Book.objects.get(title='Book0')
+        data = {'title': 'Book0', 'published_date': str(date.today() - timedelta(days=7)), 'author': self.author.pk}
+        response = self.client.put(reverse('book-detail', args=[book.pk]), data)
+        self.assertEqual(response.data['since_creation_in_days'], 7)
+
+    def test_published_after(self):
+        url = reverse('published-after-book-list', kwargs={'date': '2000-01-01'})
+        response = self.client.get(url, {'max_age_days': 10, 'ordering': '-since_creation_in_days'})
+        self.assertEqual(self.ages(response), [10, 3, 3, 0])
+
+    def test_etag_changes_with_the_date(self):
+        etag = self.client.get(reverse('book-list'))['ETag']
+        get_cache().clear()
+        with mock.patch('myapp.serializers.date') as mock_date:
+            mock_date.today.return_value = date.today() + timedelta(days=1)
+            response = self.client.get(reverse('book-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(self.ages(response)), [1, 4, 4, 11, 41])
@@ -18,7 +18,7 @@ class BookViewSetTestCase(TestCase):
         url = reverse('book-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), Book.objects.count())
+        self.assertEqual(len(response.data['results']), Book.objects.count())
 
     def test_retrieve_book(self):
         # Test GET request to retrieve a specific book
@@ -0,0 +1,120 @@
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.models import Author, Book, ChangeLog
+from myapp.serializers import AuthorSerializer
+
+class BookCountTestCase(TestCase):
+    def setUp(self):
+        self.author1 = Author.objects.create(name='Author1', email='author1@example.com')
+        self.author2 = Author.objects.create(name='Author2', email='author2@example.com')
+
+    def assertCounts(self, first, second):
+        self.assertEqual(
+            list(Author.objects.order_by('pk').values_list('book_count', flat=True)),
+            [first, second],
+        )
+
+    def test_create_and_delete(self):
+        book = Book.objects.create(title='Book1', published_date='2023-01-01', author=self.author1)
+        Book.objects.create(title='Book2', published_date='2023-01-01', author=self.author1)
+        self.assertCounts(2, 0)
+        book.delete()
+        self.assertCounts(1, 0)
+
+    def test_reassign_author(self):
+        book = Book.objects.create(title='Book1', published_date='2023-01-01', author=self.author1)
+        book.author = self.author2
+        book.save()
+        self.assertCounts(0, 1)
+        book.title = 'Renamed'
+        book.save(update_fields=['title'])
+        self.assertCounts(0, 1)
+
+    def test_bulk_paths(self):
+        Book.objects.bulk_create([
+            Book(title=f'Book{i}', published_date='2023-01-01', author=self.author1) for i in range(3)
+        ])
+        self.assertCounts(3, 0)
+        Book.objects.filter(title='Book0').update(author=self.author2)
+        self.assertCounts(2, 1)
+        books = list(Book.objects.filter(author=self.author1))
+        for book in books:
+            book.author = self.author2
+        Book.objects.bulk_update(books, ['author'])
+        self.assertCounts(0, 3)
+        Book.objects.filter(title='Book1').delete()
+        self.assertCounts(0, 2)
+
+    def test_one_update_per_delta(self):
+        authors = [Author.objects.create(name=f'Other{i}', email=f'other{i}@example.com') for i in range(5)]
+        with CaptureQueriesContext(connection) as queries:
+            Book.objects.bulk_create([
+                Book(title=f'Book{i}', published_date='2023-01-01', author=author)
+                for i, author in enumerate(authors + [self.author1, self.author1])
+            ])
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "myapp_author"')]
+        self.assertEqual(len(updates), 2)
+        counts = list(Author.objects.order_by('pk').values_list('book_count', flat=True))
+        self.assertEqual(counts, [2, 0, 1, 1, 1, 1, 1])
+
+    def test_untracked_update_reads_primary_keys_only(self):
+        Book.objects.create(title='Book1', published_date='2023-01-01', author=self.author1)
+        with CaptureQueriesContext(connection) as queries:
+            Book.objects.filter(author=self.author1).update(title='Renamed')
+        select = queries[0]['sql']
+        self.assertTrue(select.startswith('SELECT "myapp_book"."id" FROM'), select)
+        self.assertCounts(1, 0)
+
+    def test_authors_with_multiple_books_uses_count(self):
+        Book.objects.bulk_create([
+            Book(title=f'Book{i}', published_date='2023-01-01', author=self.author1) for i in range(2)
+        ])
+        self.assertEqual(list(Book.objects.authors_with_multiple_books()), [self.author1])
+
+    def test_serializer_exposes_count(self):
+        Book.objects.create(title='Book1', published_date='2023-01-01', author=self.author1)
+        self.author1.refresh_from_db()
+        self.assertEqual(AuthorSerializer(self.author1).data['book_count'], 1)
+
+
+class RebuildBookCountsCommandTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+        Book.objects.create(title='Book1', published_date='2023-01-01', author=self.author)
+        Author.objects.update(book_count=5)
+
+    def test_verify_reports_mismatch(self):
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_book_counts', verify=True, stdout=out)
+        self.assertIn('stored 5, actual 1', out.getvalue())
+
+    def test_rebuild(self):
+        call_command('rebuild_book_counts', stdout=StringIO())
+        self.assertEqual(Author.objects.get().book_count, 1)
+        call_command('rebuild_book_counts', verify=True, stdout=StringIO())
+
+    def test_rebuild_is_seen_by_the_api(self):
+        Author.objects.create(name='Author2', email='author2@example.com')
+        client = APIClient()
+        url = reverse('author-list')
+        etag = client.get(url)['ETag']
+        position = ChangeLog.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        out = StringIO()
+        call_command('rebuild_book_counts', stdout=out)
+        self.assertIn('1 author(s) were incorrect', out.getvalue())
+        # Only the corrected author is modified
+        self.assertEqual(list(ChangeLog.objects.filter(pk__gt=position).values_list('object_id', 'action')), [(self.author.pk, 'update')])
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([author['book_count'] for author in response.data['results']], [1, 0])
@@ -0,0 +1,104 @@
+from datetime import date
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.models import Author, Book
+
+class BulkCreateTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.authors = [Author.objects.create(name=f'Author{i}', email=f'author{i}@example.com') for i in range(3)]
+        self.client = APIClient()
+
+    def rows(self, count):
+        return [
+            {'title': f'Book{i}', 'published_date': '2023-01-01', 'author': self.authors[i % 3].id}
+            for i in range(count)
+        ]
+
+    def test_create_many(self):
+        response = self.client.post(reverse('book-list'), self.rows(5), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([book['title'] for book in response.data['results']], [f'Book{i}' for i in range(5)])
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(Book.objects.count(), 5)
+        # The denormalized counts follow the bulk insert
+        self.assertEqual(Author.objects.get(pk=self.authors[0].pk).book_count, 2)
+
+    def test_authors_resolved_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('book-list'), self.rows(30), format='json')
+        author_selects = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and 'FROM "myapp_author"' in query['sql']
+        ]
+        self.assertEqual(len(author_selects), 1)
+
+    def test_partial_failure(self):
+        rows = self.rows(3)
+        rows[1]['author'] = 9999
+        rows[2]['published_date'] = 'not-a-date'
+        response = self.client.post(reverse('book-list'), rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['results'][0]['title'], 'Book0')
+        self.assertIsNone(response.data['results'][1])
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertIn('author', response.data['errors'][0]['errors'])
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_atomic_rejects_everything(self):
+        rows = self.rows(3)
+        rows[1]['title'] = ''
+        response = self.client.post(reverse('book-list') + '?atomic=true', rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertEqual(Book.objects.count(), 0)
+
+    def test_too_many_rows(self):
+        response = self.client.post(reverse('book-list'), [{}] * 10001, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_single_object_still_created(self):
+        response = self.client.post(reverse('book-list'), self.rows(1)[0], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['title'], 'Book0')
+
+
+class BulkPartialUpdateTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+        self.other = Author.objects.create(name='Author2', email='author2@example.com')
+        self.books = [Book.objects.create(title=f'Book{i}', published_date=date(2023, 1, 1), author=self.author) for i in range(3)]
+        self.client = APIClient()
+
+    def test_update_many(self):
+        rows = [
+            {'id': self.books[0].id, 'title': 'Renamed'},
+            {'id': self.books[1].id, 'author': self.other.id},
+        ]
+        response = self.client.patch(reverse('book-list'), rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['title'], 'Renamed')
+        self.assertEqual(Book.objects.get(pk=self.books[0].pk).title, 'Renamed')
+        # Moving a book updates both authors' counts
+        self.assertEqual(Author.objects.get(pk=self.author.pk).book_count, 2)
+        self.assertEqual(Author.objects.get(pk=self.other.pk).book_count, 1)
+
+    def test_unknown_id(self):
+        rows = [{'id': 9999, 'title': 'Missing'}, {'id': self.books[2].id, 'title': 'Found'}]
+        response = self.client.patch(reverse('book-list'), rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertIsNone(response.data['results'][0])
+        self.assertEqual(response.data['errors'][0]['index'], 0)
+        self.assertEqual(Book.objects.get(pk=self.books[2].pk).title, 'Found')
+
+    def test_invalidates_cached_list(self):
+        self.client.get(reverse('book-list'))
+        self.client.patch(reverse('book-list'), [{'id': self.books[0].id, 'title': 'Renamed'}], format='json')
+        response = self.client.get(reverse('book-list'))
+        self.assertIn('Renamed', [book['title'] for book in response.data['results']])
@@ -0,0 +1,175 @@
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.changelog import decode_token, encode_token
+from myapp.models import Author, Book, ChangeLog, ChangeLogQuerySet
+
+class ChangeLogTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+        self.client = APIClient()
+
+    def entries(self, since=0):
+        return list(ChangeLog.objects.filter(pk__gt=since).order_by('pk').values_list('model_name', 'object_id', 'action'))
+
+    def last_position(self):
+        return ChangeLog.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+    def test_writes_are_logged(self):
+        position = self.last_position()
+        book = Book.objects.create(title='Book1', published_date=date(2020, 1, 1), author=self.author)
+        book.title = 'Changed'
+        book.save()
+        self.author.refresh_from_db()
+        self.author.name = 'Renamed'
+        self.author.save()
+        # The author's representation holds its books
+        self.assertEqual(self.entries(position), [
+            ('author', self.author.pk, 'update'),
+            ('book', book.pk, 'create'),
+            ('author', self.author.pk, 'update'),
+            ('book', book.pk, 'update'),
+            ('author', self.author.pk, 'update'),
+        ])
+
+    def test_cascade_deletes_are_logged(self):
+        books = [Book.objects.create(title=f'Book{i}', published_date=date(2020, 1, 1), author=self.author) for i in range(2)]
+        position, author_pk = self.last_position(), self.author.pk
+        self.author.delete()
+        deleted = [entry for entry in self.entries(position) if entry[2] == 'delete']
+        self.assertEqual(sorted(deleted), [
+            ('author', author_pk, 'delete'),
+            ('book', books[0].pk, 'delete'),
+            ('book', books[1].pk, 'delete'),
+        ])
+        # The author's tombstone is the last entry
+        self.assertEqual(self.entries(position)[-1], ('author', author_pk, 'delete'))
+
+    def test_bulk_writes_are_logged(self):
+        position = self.last_position()
+        rows = [{'title': f'Book{i}', 'published_date': '2020-01-01', 'author': self.author.pk} for i in range(3)]
+        created = self.client.post(reverse('book-list'), rows, format='json')
+        pks = list(Book.objects.order_by('pk').values_list('pk', flat=True))
+        self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([entry for entry in self.entries(position) if entry[0] == 'book'], [('book', pk, 'create') for pk in pks])
+        position = self.last_position()
+        self.client.patch(reverse('book-list'), [{'id': pks[0], 'title': 'Changed'}], format='json')
+        self.assertIn(('book', pks[0], 'update'), self.entries(position))
+        self.assertIn(('author', self.author.pk, 'update'), self.entries(position))
+
+    def test_author_queryset_updates_are_logged(self):
+        url = reverse('author-detail', args=[self.author.pk])
+        etag = self.client.get(url)['ETag']
+        position = self.last_position()
+        updated_at = self.author.updated_at
+        Author.objects.filter(pk=self.author.pk).update(name='Renamed')
+        self.assertEqual(self.entries(position), [('author', self.author.pk, 'update')])
+        self.author.refresh_from_db()
+        self.assertGreater(self.author.updated_at, updated_at)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['name'], 'Renamed')
+
+    def test_upserts_are_logged(self):
+        position = self.last_position()
+        authors = Author.objects.bulk_create(
+            [Author(name='Changed', email='author1@example.com'), Author(name='Author2', email='author2@example.com')],
+            update_conflicts=True, unique_fields=['email'], update_fields=['name'],
+        )
+        new = Author.objects.get(email='author2@example.com')
+        self.assertEqual([author.pk for author in authors], [self.author.pk, new.pk])
+        self.assertEqual(self.entries(position), [('author', self.author.pk, 'update'), ('author', new.pk, 'update')])
+
+    def test_logged_in_the_transaction_of_the_change(self):
+        with mock.patch.object(ChangeLogQuerySet, 'record', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                Book.objects.create(title='Book1', published_date=date(2020, 1, 1), author=self.author)
+        self.assertFalse(Book.objects.exists())
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.book_count, 0)
+
+    def test_tokens(self):
+        token = encode_token(42)
+        self.assertNotIn('42', token)
+        self.assertEqual(decode_token(token), 42)
+        for token in ('', 'abc', encode_token(-1), '%%%'):
+            with self.assertRaises(ValueError):
+                decode_token(token)
+
+
+class ChangeFeedTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+
+    def get(self, **params):
+        return self.client.get(reverse('changes'), params)
+
+    def test_follow_the_feed(self):
+        token = self.get().data['next']
+        book = Book.objects.create(title='Book1', published_date=date(2020, 1, 1), author=self.author)
+        book_pk = book.pk
+        book.delete()
+
+        first = self.get(since=token, page_size=2)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertTrue(first.data['has_more'])
+        self.assertEqual([(change['model'], change['id'], change['action']) for change in first.data['results']], [
+            ('author', self.author.pk, 'update'),
+            ('book', book_pk, 'create'),
+        ])
+        self.assertEqual(first.data['next'], first.data['results'][-1]['token'])
+
+        rest = self.get(since=first.data['next'])
+        self.assertFalse(rest.data['has_more'])
+        self.assertEqual([(change['model'], change['action']) for change in rest.data['results']], [
+            ('author', 'update'),
+            ('book', 'delete'),
+        ])
+        empty = self.get(since=rest.data['next'])
+        self.assertEqual(empty.data['results'], [])
+        self.assertEqual(empty.data['next'], rest.data['next'])
+
+    def test_invalid_token(self):
+        response = self.get(since='nope')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('since', response.data)
+
+    def test_compaction(self):
+        token = self.get().data['next']
+        book = Book.objects.create(title='Book1', published_date=date(2020, 1, 1), author=self.author)
+        book.title = 'Changed'
+        book.save()
+        stdout = StringIO()
+        call_command('compact_change_log', stdout=stdout)
+        self.assertIn('Deleted 0 expired', stdout.getvalue())
+        # The latest entry of every row is kept
+        changes = self.get(since=token).data['results']
+        self.assertEqual([(change['model'], change['action']) for change in changes], [('author', 'update'), ('book', 'update')])
+
+    def test_expired_token(self):
+        token = self.get().data['next']
+        Book.objects.create(title='Book1', published_date=date(2020, 1, 1), author=self.author)
+        ChangeLog.objects.update(changed_at=timezone.now() - timedelta(days=31))
+        latest = self.get().data['next']
+        call_command('compact_change_log', stdout=StringIO())
+        self.assertFalse(ChangeLog.objects.exists())
+        self.assertEqual(self.get(since=token).status_code, status.HTTP_410_GONE)
+        # Clients that read every compacted change are not affected, nor the
+        # current token
+        response = self.get(since=latest)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get().data['next'], latest)
+        Author.objects.create(name='Author2', email='author2@example.com')
+        self.assertEqual(len(self.get(since=latest).data['results']), 1)
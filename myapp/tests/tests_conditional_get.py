@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+from unittest import mock
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.models import Author, Book
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+        self.book = Book.objects.create(title='Book1', published_date='2023-01-01', author=self.author)
+        self.client = APIClient()
+
+    def test_if_none_match(self):
+        url = reverse('book-list')
+        etag = self.client.get(url)['ETag']
+        get_cache().clear()
+        # Only the fingerprint queries run, not the list query or the serializer
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_cached_response_answers_conditional_request(self):
+        url = reverse('author-detail', args=[self.author.id])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since(self):
+        url = reverse('author-detail', args=[self.author.id])
+        last_modified = self.client.get(url)['Last-Modified']
+        get_cache().clear()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_book_change_changes_author_etag(self):
+        url = reverse('author-detail', args=[self.author.id])
+        etag = self.client.get(url)['ETag']
+        self.book.title = 'Renamed'
+        self.book.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_author_etag_changes_with_the_date(self):
+        # The books of the authors carry their age
+        for url in (reverse('author-list'), reverse('authors_with_multiple_books_api')):
+            etag = self.client.get(url)['ETag']
+            get_cache().clear()
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+            with mock.patch('myapp.serializers.date') as mock_date:
+                mock_date.today.return_value = date.today() + timedelta(days=1)
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response['ETag'], etag)
+        # Unless the age is left out
+        url = reverse('author-list')
+        etag = self.client.get(url, {'fields': 'name'})['ETag']
+        get_cache().clear()
+        with mock.patch('myapp.serializers.date') as mock_date:
+            mock_date.today.return_value = date.today() + timedelta(days=1)
+            response = self.client.get(url, {'fields': 'name'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_filtered_set_fingerprint(self):
+        url = reverse('published-after-book-list', kwargs={'date': '2022-01-01'})
+        etag = self.client.get(url)['ETag']
+        get_cache().clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        Book.objects.filter(pk=self.book.pk).update(title='Renamed')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['title'], 'Renamed')
+
+    def test_deletion_changes_etag(self):
+        Book.objects.create(title='Book2', published_date='2023-01-01', author=self.author)
+        url = reverse('book-list')
+        etag = self.client.get(url)['ETag']
+        Book.objects.filter(pk=self.book.pk).delete()
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
@@ -0,0 +1,77 @@
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from myapp.db_router import PrimaryReplicaRouter, use_replicas
+from myapp.middleware import PrimaryReplicaMiddleware
+from myapp.models import Book
+from myapp.receivers import configure_sqlite_connection
+from myapp.views import BookViewSet
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class PrimaryReplicaRouterTestCase(TestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def read_database(self, request):
+        # Run a request through the middleware, recording where a read goes
+        databases = []
+
+        def view(request):
+            databases.append(self.router.db_for_read(Book))
+            return HttpResponse()
+
+        response = PrimaryReplicaMiddleware(view)(request)
+        return databases[0], response
+
+    def test_reads_go_to_primary_outside_requests(self):
+        self.assertEqual(self.router.db_for_read(Book), 'default')
+        self.assertEqual(self.router.db_for_write(Book), 'default')
+
+    def test_safe_requests_read_replicas(self):
+        database, response = self.read_database(self.factory.get('/books/'))
+        self.assertIn(database, ['replica1', 'replica2'])
+        self.assertNotIn('apexive_primary', response.cookies)
+        # The flag does not outlive the request
+        self.assertFalse(use_replicas.get())
+
+    def test_read_your_writes(self):
+        database, response = self.read_database(self.factory.post('/books/'))
+        self.assertEqual(database, 'default')
+        self.assertEqual(response.cookies['apexive_primary']['max-age'], 5)
+        request = self.factory.get('/books/')
+        request.COOKIES['apexive_primary'] = '1'
+        database, _ = self.read_database(request)
+        self.assertEqual(database, 'default')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertTrue(self.router.allow_migrate('default', 'myapp'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'myapp'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        database, response = self.read_database(self.factory.post('/books/'))
+        self.assertNotIn('apexive_primary', response.cookies)
+        database, _ = self.read_database(self.factory.get('/books/'))
+        self.assertEqual(database, 'default')
+
+
+class SqlitePragmasTestCase(TestCase):
+    def test_pragmas_applied_to_new_connections(self):
+        with override_settings(SQLITE_PRAGMAS={'cache_size': -4096}):
+            configure_sqlite_connection(sender=None, connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -4096)
+
+
+class ReplicaCacheTestCase(TestCase):
+    @override_settings(DATABASE_REPLICA_LAG=3)
+    def test_replica_responses_cached_briefly(self):
+        view = BookViewSet()
+        self.assertEqual(view.get_cache_timeout(), 300)
+        token = use_replicas.set(True)
+        try:
+            self.assertEqual(view.get_cache_timeout(), 3)
+        finally:
+            use_replicas.reset(token)
@@ -0,0 +1,95 @@
+from datetime import date
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp.models import Author, Book
+from myapp.serializers import AuthorSerializer, BookSerializer, parse_field_selection
+
+class ParseFieldSelectionTestCase(TestCase):
+    def test_nested_selection(self):
+        self.assertEqual(
+            parse_field_selection('name, books.title,books.published_date,'),
+            {'name': {}, 'books': {'title': {}, 'published_date': {}}},
+        )
+
+
+class DynamicFieldsSerializerTestCase(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+        self.book = Book.objects.create(title='Book1', published_date=date(2022, 1, 1), author=self.author)
+
+    def test_fields(self):
+        serializer = BookSerializer(self.book, fields={'title': {}, 'published_date': {}})
+        self.assertEqual(set(serializer.data), {'title', 'published_date'})
+
+    def test_omit(self):
+        serializer = BookSerializer(self.book, omit={'author_name': {}})
+        self.assertNotIn('author_name', serializer.data)
+        self.assertIn('title', serializer.data)
+
+    def test_expand(self):
+        serializer = BookSerializer(self.book, expand={'author': {}})
+        self.assertEqual(serializer.data['author']['name'], 'Author1')
+
+    def test_nested_fields_do_not_leak_to_other_instances(self):
+        serializer = AuthorSerializer(self.author, fields={'name': {}, 'books': {'title': {}}})
+        self.assertEqual(serializer.data, {'name': 'Author1', 'books': [{'title': 'Book1'}]})
+        self.assertIn('author_name', AuthorSerializer(self.author).data['books'][0])
+
+
+def list_queries(queries):
+    # Leave out the aggregate queries computing the ETag fingerprint
+    return [query['sql'] for query in queries if 'MAX(' not in query['sql']]
+
+
+class DynamicFieldsViewTestCase(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+        Book.objects.create(title='Book1', published_date='2022-01-01', author=self.author)
+        Book.objects.create(title='Book2', published_date='2023-01-01', author=self.author)
+        self.client = APIClient()
+
+    def test_book_list_fields_narrow_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('book-list'), {'fields': 'title,published_date'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'title', 'published_date'})
+        # The versions of the page's rows, then the rows missing from the fragment cache
+        self.assertEqual(len(list_queries(queries)), 2)
+        # The authors being deleted are excluded with a subquery, neither a
+        # join nor a loaded column
+        sql = list_queries(queries)[1]
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('author', sql.split(' FROM ')[0])
+
+    def test_book_list_author_name_joins_author(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('book-list'), {'fields': 'title,author_name'})
+        self.assertEqual(response.data['results'][0]['author_name'], 'Author1')
+        self.assertEqual(len(list_queries(queries)), 2)
+        self.assertIn('myapp_author', list_queries(queries)[1])
+
+    def test_published_after_fields(self):
+        url = reverse('published-after-book-list', kwargs={'date': '2022-06-01'})
+        response = self.client.get(url, {'omit': 'author,author_name'})
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertEqual(set(response.data['results'][0]), {'title', 'published_date', 'since_creation_in_days'})
+
+    def test_author_list_omit_books_skips_prefetch(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('author-list'), {'omit': 'books'})
+        self.assertNotIn('books', response.data['results'][0])
+        self.assertEqual(len(list_queries(queries)), 2)
+
+    def test_authors_with_multiple_books_nested_fields(self):
+        response = self.client.get('/authors-with-multiple-books/', {'fields': 'name,books.title'})
+        self.assertEqual(response.data['results'][0], {'name': 'Author1', 'books': [{'title': 'Book1'}, {'title': 'Book2'}]})
+
+    def test_selection_ignored_on_write(self):
+        data = {'title': 'New Book', 'published_date': '2023-01-01', 'author': self.author.id}
+        response = self.client.post(reverse('book-list') + '?fields=title', data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('author', response.data)
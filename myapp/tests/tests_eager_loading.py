@@ -0,0 +1,69 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.test import APIClient
+from myapp.eager_loading import build_query_plan, plan_queryset
+from myapp.models import Author, Book
+from myapp.serializers import AuthorSerializer, BookSerializer
+
+class QueryPlanTestCase(TestCase):
+    def test_book_plan(self):
+        plan = build_query_plan(Book, BookSerializer())
+        self.assertEqual(plan.related, {'author'})
+        self.assertEqual(plan.get_columns(), ['author', 'author__name', 'id', 'published_date', 'title'])
+
+    def test_author_plan_prefetches_books(self):
+        plan = build_query_plan(Author, AuthorSerializer(many=True))
+        self.assertEqual(set(plan.prefetches), {'books'})
+        self.assertEqual(plan.prefetches['books'].related, {'author'})
+        self.assertIn('author', plan.prefetches['books'].get_columns())
+
+    def test_unknown_source_loads_full_rows(self):
+        class BookLabelSerializer(serializers.ModelSerializer):
+            label = serializers.CharField(source='__str__')
+
+            class Meta:
+                model = Book
+                fields = ('title', 'label')
+
+        self.assertIsNone(build_query_plan(Book, BookLabelSerializer()).get_columns())
+
+    def test_plan_queryset_serializes_without_extra_queries(self):
+        author = Author.objects.create(name='Author1', email='author1@example.com')
+        Book.objects.create(title='Book1', published_date='2022-01-01', author=author)
+        queryset = plan_queryset(Author.objects.all(), AuthorSerializer(many=True))
+        with self.assertNumQueries(2):
+            data = AuthorSerializer(queryset, many=True).data
+        self.assertEqual(data[0]['books'][0]['author_name'], 'Author1')
+
+
+class ConstantQueryCountTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def create_catalog(self, authors, books_per_author):
+        for i in range(authors):
+            author = Author.objects.create(name=f'Author{i}', email=f'author{i}-{Author.objects.count()}@example.com')
+            for j in range(books_per_author):
+                Book.objects.create(title=f'Book{i}-{j}', published_date='2023-01-01', author=author)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        urls = [
+            reverse('book-list'),
+            reverse('author-list'),
+            reverse('published-after-book-list', kwargs={'date': '2022-01-01'}),
+            '/authors-with-multiple-books/',
+        ]
+        self.create_catalog(2, 2)
+        small = [self.count_queries(url) for url in urls]
+        self.create_catalog(5, 4)
+        large = [self.count_queries(url) for url in urls]
+        self.assertEqual(small, large)
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.eager_loading import plan_queryset
+from myapp.fast_serializers import FastReader
+from myapp.models import Author, Book
+from myapp.serializers import AuthorSerializer, BookSerializer
+
+class FastReaderEquivalenceTestCase(TestCase):
+    def setUp(self):
+        for i in range(3):
+            author = Author.objects.create(name=f'Author{i}', email=f'author{i}@example.com')
+            for j in range(i):
+                Book.objects.create(title=f'Book{i}-{j}', published_date=date(2020, 1, 1) + timedelta(days=j), author=author)
+        Author.objects.create(name='Ünïcode "quoted"', email='unicode@example.com')
+
+    def assertSameJSON(self, serializer_class, queryset, **selection):
+        serializer = serializer_class(**selection)
+        expected = serializer_class(plan_queryset(queryset, serializer), many=True, **selection).data
+        fast = FastReader(serializer).serialize(queryset)
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(expected))
+
+    def test_books(self):
+        self.assertSameJSON(BookSerializer, Book.objects.order_by('pk'))
+
+    def test_books_with_selection(self):
+        self.assertSameJSON(BookSerializer, Book.objects.order_by('pk'), fields={'title': {}, 'since_creation_in_days': {}})
+        self.assertSameJSON(BookSerializer, Book.objects.order_by('pk'), expand={'author': {}})
+
+    def test_authors_with_nested_books(self):
+        self.assertSameJSON(AuthorSerializer, Author.objects.order_by('pk'))
+        self.assertSameJSON(AuthorSerializer, Author.objects.order_by('pk'), fields={'name': {}, 'books': {'title': {}}})
+
+    def test_nested_books_in_one_query(self):
+        with self.assertNumQueries(2):
+            FastReader(AuthorSerializer()).serialize(Author.objects.all())
+
+
+class FastReadViewTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        author = Author.objects.create(name='Author1', email='author1@example.com')
+        for i in range(5):
+            Book.objects.create(title=f'Book{i}', published_date=date(2023, 1, 1), author=author)
+        self.client = APIClient()
+
+    def test_same_pages_as_regular_path(self):
+        Author.objects.create(name='Author2', email='author2@example.com')
+        for url in [reverse('book-list'), reverse('author-list'), '/authors-with-multiple-books/',
+                    reverse('published-after-book-list', kwargs={'date': '2022-01-01'})]:
+            regular = self.client.get(url, {'page_size': 1})
+            fast = self.client.get(url, {'page_size': 1, 'fast': 'true'})
+            self.assertEqual(fast.json()['results'], regular.json()['results'])
+            if regular.data['next']:
+                self.assertEqual(
+                    self.client.get(fast.data['next']).json()['results'],
+                    self.client.get(regular.data['next']).json()['results'],
+                )
@@ -0,0 +1,152 @@
+import json
+from datetime import date, timedelta
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.fragments import EncodedList, LRUFragmentStore, fragments
+from myapp.models import Author, Book
+from myapp.views import AuthorViewSet, BookViewSet
+
+def row_queries(queries):
+    # The queries loading the rows missing from the fragment cache
+    return [query['sql'] for query in queries if '"myapp_book"."title"' in query['sql']]
+
+class FragmentCacheTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        fragments.clear()
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+        self.books = [
+            Book.objects.create(title=f'Book{i}', published_date=date(2020, 1, 1 + i), author=self.author)
+            for i in range(3)
+        ]
+        self.client = APIClient()
+
+    def get(self, url, params=None, **kwargs):
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params, **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, queries
+
+    def test_same_output_as_regular_path(self):
+        for view, url in [(BookViewSet, reverse('book-list')), (AuthorViewSet, reverse('author-list'))]:
+            for params in [{}, {'fields': 'title'}, {'expand': 'author'}, {'books_limit': 1}]:
+                cold, _ = self.get(url, params)
+                warm, _ = self.get(url, params)
+                with mock.patch.object(view, 'fragment_cache', False):
+                    regular, _ = self.get(url, params)
+                self.assertEqual(cold.content, regular.content)
+                self.assertEqual(warm.content, regular.content)
+
+    def test_unchanged_rows_are_not_loaded(self):
+        response, queries = self.get(reverse('book-list'))
+        self.assertEqual(len(row_queries(queries)), 1)
+        response, queries = self.get(reverse('book-list'))
+        self.assertEqual(row_queries(queries), [])
+        self.assertEqual([book['title'] for book in response.data['results']], ['Book0', 'Book1', 'Book2'])
+
+        book = self.books[1]
+        book.title = 'Renamed'
+        book.save()
+        response, queries = self.get(reverse('book-list'))
+        self.assertEqual(len(row_queries(queries)), 1)
+        self.assertIn(f'IN ({book.pk})', row_queries(queries)[0])
+        self.assertEqual([book['title'] for book in response.data['results']], ['Book0', 'Renamed', 'Book2'])
+
+    def test_related_rows_change_the_version(self):
+        self.get(reverse('book-list'))
+        self.get(reverse('author-list'))
+        self.author.refresh_from_db()
+        self.author.name = 'Renamed'
+        self.author.save()
+        response, _ = self.get(reverse('book-list'))
+        self.assertEqual({book['author_name'] for book in response.data['results']}, {'Renamed'})
+        Book.objects.filter(pk=self.books[0].pk).update(title='Updated')
+        response, _ = self.get(reverse('author-list'))
+        self.assertEqual(response.data['results'][0]['books'][0]['title'], 'Updated')
+        self.books[2].delete()
+        response, _ = self.get(reverse('author-list'))
+        self.assertEqual(len(response.data['results'][0]['books']), 2)
+
+    def test_ages_follow_the_date(self):
+        # The response cache is cleared by `get`, not the fragment cache
+        for url in (reverse('author-list'), reverse('authors_with_multiple_books_api')):
+            response, _ = self.get(url)
+            ages = [book['since_creation_in_days'] for book in response.json()['results'][0]['books']]
+            with mock.patch('myapp.serializers.date') as mock_date:
+                mock_date.today.return_value = date.today() + timedelta(days=1)
+                response, _ = self.get(url)
+            self.assertEqual([book['since_creation_in_days'] for book in response.json()['results'][0]['books']], [age + 1 for age in ages])
+
+    def test_representation_variants(self):
+        self.get(reverse('book-list'))
+        response, queries = self.get(reverse('book-list'), {'fields': 'title'})
+        self.assertEqual(set(response.data['results'][0]), {'title'})
+        self.assertEqual(len(row_queries(queries)), 1)
+        # Pagination and filters do not change the representation of the rows
+        response, queries = self.get(reverse('book-list'), {'fields': 'title', 'page_size': 2, 'author': self.author.pk})
+        self.assertEqual(row_queries(queries), [])
+        response, queries = self.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{'title': 'Book2'}])
+        self.assertEqual(row_queries(queries), [])
+
+    def test_indented_and_browsable_responses(self):
+        response, _ = self.get(reverse('book-list'), HTTP_ACCEPT='application/json; indent=2')
+        self.assertIn(b'\n  "results": [\n', response.content)
+        self.assertEqual(json.loads(response.content)['results'][0]['title'], 'Book0')
+        response, _ = self.get(reverse('book-list'), HTTP_ACCEPT='text/html')
+        self.assertIn(b'Book0', response.content)
+
+    @override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'fragments': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'fragments'}},
+        FRAGMENT_CACHE_ALIAS='fragments',
+    )
+    def test_shared_tier(self):
+        self.get(reverse('book-list'))
+        fragments.clear()
+        response, queries = self.get(reverse('book-list'))
+        self.assertEqual(row_queries(queries), [])
+        self.assertEqual(len(response.data['results']), 3)
+
+    async def test_async_path(self):
+        await get_cache().aclear()
+        response = await AsyncClient().get(reverse('book-list'))
+        # The fragments stored by the async view serve the regular one
+        expected, queries = await sync_to_async(self.get)(reverse('book-list'))
+        self.assertEqual(row_queries(queries), [])
+        self.assertEqual(response.content, expected.content)
+        await get_cache().aclear()
+        response = await AsyncClient().get(reverse('author-list'), {'fields': 'name,books.title'})
+        expected, _ = await sync_to_async(self.get)(reverse('author-list'), {'fields': 'name,books.title'})
+        self.assertEqual(response.content, expected.content)
+
+
+class FragmentStoreTestCase(TestCase):
+    def test_lru_eviction(self):
+        store = LRUFragmentStore(max_bytes=30)
+        store.set_many({'a': b'1' * 9, 'b': b'2' * 9, 'c': b'3' * 9})
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.get_many(['a']), {'a': b'1' * 9})
+        store.set_many({'d': b'4' * 9})
+        # The least recently used fragment is evicted
+        self.assertEqual(set(store.get_many(['a', 'b', 'c', 'd'])), {'a', 'c', 'd'})
+        self.assertLessEqual(store.size, 30)
+        store.set_many({'e': b'5' * 40})
+        self.assertEqual(store.get_many(['e']), {})
+        store.clear()
+        self.assertEqual((len(store), store.size), (0, 0))
+
+    def test_encoded_list(self):
+        items = EncodedList([b'{"a":1}', b'{"a":2}'])
+        self.assertEqual(items.encode(), b'[{"a":1},{"a":2}]')
+        self.assertEqual(items, [{'a': 1}, {'a': 2}])
+        self.assertEqual(items[1], {'a': 2})
+        self.assertEqual(len(items), 2)
@@ -0,0 +1,71 @@
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from myapp.models import Author, Book
+
+class ImportCatalogTestCase(TestCase):
+    def write(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w', newline='') as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def run_import(self, path, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_catalog', path, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_upsert_authors_from_csv(self):
+        Author.objects.create(name='Old name', email='author1@example.com')
+        path = self.write('.csv', 'name,email\nAuthor1,author1@example.com\n"Author, 2",author2@example.com\nBroken,not-an-email\n')
+        stdout, stderr = self.run_import(path, '--model', 'author')
+        self.assertEqual(
+            list(Author.objects.order_by('email').values_list('name', 'email')),
+            [('Author1', 'author1@example.com'), ('Author, 2', 'author2@example.com')],
+        )
+        self.assertIn('Imported 2 author(s)', stdout)
+        self.assertIn('email', stderr)
+
+    def test_books_from_ndjson(self):
+        author = Author.objects.create(name='Author1', email='author1@example.com')
+        path = self.write('.ndjson', ''.join(
+            f'{{"title": "Book{i}", "published_date": "2023-01-0{i + 1}", "author_email": "author1@example.com"}}\n'
+            for i in range(5)
+        ) + '{"title": "Orphan", "published_date": "2023-01-01", "author_email": "nobody@example.com"}\nnot json\n')
+        stdout, stderr = self.run_import(path, '--model', 'book', '--batch-size', '2')
+        self.assertEqual(Book.objects.count(), 5)
+        self.assertEqual(Author.objects.get(pk=author.pk).book_count, 5)
+        self.assertIn('skipped 2', stdout)
+        self.assertIn('unknown author', stderr)
+        # One progress line per batch
+        self.assertEqual(stdout.count('rows/sec, offset'), 4)
+
+    def test_resume_from_offset(self):
+        Author.objects.create(name='Author1', email='author1@example.com')
+        lines = [
+            f'Book{i},2023-01-01,author1@example.com\n' for i in range(4)
+        ]
+        path = self.write('.csv', 'title,published_date,author_email\n' + ''.join(lines))
+        stdout, _ = self.run_import(path, '--model', 'book', '--batch-size', '2')
+        offset = stdout.splitlines()[0].rsplit(' ', 1)[1]
+        Book.objects.filter(title__in=['Book2', 'Book3']).delete()
+        self.run_import(path, '--model', 'book', '--offset', offset)
+        self.assertEqual(sorted(Book.objects.values_list('title', flat=True)), ['Book0', 'Book1', 'Book2', 'Book3'])
+
+    def test_quoted_line_breaks(self):
+        Author.objects.create(name='Author1', email='author1@example.com')
+        path = self.write('.csv', 'title,published_date,author_email\n"Two\nlines",2023-01-01,author1@example.com\nBook,2023-01-01,author1@example.com\n')
+        stdout, _ = self.run_import(path, '--model', 'book', '--batch-size', '1')
+        # One batch per record, not per line
+        self.assertEqual([line.split(',')[0] for line in stdout.splitlines()[:2]], ['1 rows imported', '2 rows imported'])
+        self.assertEqual(Book.objects.count(), 2)
+        self.assertTrue(Book.objects.filter(title='Two\nlines').exists())
+
+    def test_unknown_format(self):
+        path = self.write('.txt', '')
+        with self.assertRaises(CommandError):
+            self.run_import(path, '--model', 'author')
@@ -0,0 +1,83 @@
+import re
+from datetime import date
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.instrumentation import RequestMetrics, LatencyHistograms, histograms
+from myapp.models import Author, Book
+
+def server_timing(response):
+    return {
+        name: (float(dur), desc)
+        for name, desc, dur in re.findall(r'(\w+);(?:desc="([^"]*)";)?dur=([\d.]+)', response['Server-Timing'])
+    }
+
+class RequestMetricsTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        histograms.reset()
+        author = Author.objects.create(name='Author1', email='author1@example.com')
+        for i in range(3):
+            Book.objects.create(title=f'Book{i}', published_date=date(2023, 1, 1), author=author)
+        self.client = APIClient()
+
+    def test_server_timing(self):
+        response = self.client.get(reverse('author-list'))
+        timing = server_timing(response)
+        self.assertEqual(set(timing), {'db', 'serialize', 'render', 'app', 'total'})
+        self.assertEqual(timing['db'][1], '4 queries')
+        self.assertGreater(timing['serialize'][0], 0)
+        self.assertGreater(timing['render'][0], 0)
+        self.assertLessEqual(timing['db'][0] + timing['serialize'][0] + timing['render'][0], timing['total'][0] + 0.01)
+        # Served from the cache
+        response = self.client.get(reverse('author-list'))
+        self.assertEqual(server_timing(response)['db'][1], '0 queries')
+        self.assertEqual(server_timing(response)['serialize'][0], 0)
+
+    def test_fast_read_is_measured(self):
+        response = self.client.get(reverse('book-list'), {'fast': 'true'})
+        self.assertGreater(server_timing(response)['serialize'][0], 0)
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('book-list'))
+        self.client.get(reverse('book-list'))
+        self.client.post(reverse('book-list'), {}, format='json')
+        self.client.get('/missing/')
+        text = self.client.get(reverse('metrics')).content.decode()
+        labels = 'route="^books/$",method="GET",status="2xx"'
+        self.assertIn(f'apexive_http_request_duration_seconds_count{{{labels}}} 2', text)
+        self.assertIn(f'apexive_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn('route="^books/$",method="POST",status="4xx"', text)
+        self.assertIn('route="unmatched",method="GET",status="4xx"', text)
+        # The second request is served from the cache
+        self.assertIn(f'apexive_http_request_queries_total{{{labels}}} 4', text)
+        self.assertIn('# TYPE apexive_http_request_db_seconds_total counter', text)
+
+    async def test_async_views(self):
+        response = await AsyncClient().get(reverse('author-list'))
+        timing = server_timing(response)
+        self.assertEqual(timing['db'][1], '4 queries')
+        self.assertGreater(timing['serialize'][0], 0)
+        self.assertGreater(timing['render'][0], 0)
+
+    def test_bounded_memory(self):
+        for i in range(20):
+            self.client.get(reverse('book-list'), {'page_size': i + 1})
+        self.assertEqual(len(histograms._series), 1)
+
+
+class LatencyHistogramsTestCase(TestCase):
+    def test_buckets(self):
+        metrics = RequestMetrics()
+        metrics.queries = 2
+        store = LatencyHistograms(buckets=(0.1, 1))
+        for total in (0.05, 0.1, 0.5, 3):
+            store.observe('r"\\', 'BREW', 200, metrics, total)
+        text = store.render()
+        labels = 'route="r\\"\\\\",method="OTHER",status="2xx"'
+        self.assertIn(f'apexive_http_request_duration_seconds_bucket{{{labels},le="0.1"}} 2', text)
+        self.assertIn(f'apexive_http_request_duration_seconds_bucket{{{labels},le="1"}} 3', text)
+        self.assertIn(f'apexive_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4', text)
+        self.assertIn(f'apexive_http_request_duration_seconds_sum{{{labels}}} 3.65', text)
+        self.assertIn(f'apexive_http_request_queries_total{{{labels}}} 8', text)
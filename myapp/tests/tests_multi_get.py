@@ -0,0 +1,135 @@
+from datetime import date
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import AsyncClient, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.models import Author, Book
+from myapp.views import BookViewSet
+
+class MultiGetTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author1 = Author.objects.create(name='Author1', email='author1@example.com')
+        self.author2 = Author.objects.create(name='Author2', email='author2@example.com')
+        self.books = [
+            Book.objects.create(title=f'Book{i}', published_date=date(2020, 1, i + 1), author=self.author1 if i % 2 else self.author2)
+            for i in range(5)
+        ]
+        self.client = APIClient()
+
+    def ids(self, *pks):
+        return ','.join(map(str, pks))
+
+    def test_books_in_requested_order(self):
+        pks = [self.books[3].pk, self.books[0].pk, self.books[2].pk]
+        response = self.client.get(reverse('book-list'), {'ids': self.ids(*pks)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([book['title'] for book in response.data['results']], ['Book3', 'Book0', 'Book2'])
+        self.assertEqual(response.data['results'][0]['author_name'], 'Author1')
+        self.assertEqual(response.data['not_found'], [])
+        self.assertIn('ETag', response)
+
+    async def test_async_path(self):
+        missing = self.books[-1].pk + 100
+        ids = self.ids(self.books[2].pk, missing, self.books[1].pk)
+        await get_cache().aclear()
+        response = await AsyncClient().get(reverse('book-list'), {'ids': ids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertNotIn('next', data)
+        self.assertEqual([book and book['title'] for book in data['results']], ['Book2', None, 'Book1'])
+        self.assertEqual(data['not_found'], [missing])
+        await get_cache().aclear()
+        expected = await sync_to_async(self.client.get)(reverse('book-list'), {'ids': ids})
+        self.assertEqual(response.content, expected.content)
+
+    def test_not_found_and_duplicates(self):
+        missing = self.books[-1].pk + 100
+        pks = [self.books[1].pk, missing, self.books[1].pk]
+        response = self.client.post(reverse('book-multi-get'), {'ids': pks}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(len(results), 3)
+        self.assertIsNone(results[1])
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(results[0]['title'], 'Book1')
+        self.assertEqual(response.data['not_found'], [missing])
+
+    def test_post_matches_get(self):
+        pks = [self.books[4].pk, self.books[0].pk]
+        params = {'fields': 'title', 'expand': 'author'}
+        got = self.client.get(reverse('book-list'), {'ids': self.ids(*pks), **params})
+        posted = self.client.post(f"{reverse('book-multi-get')}?fields=title", {'ids': pks}, format='json')
+        self.assertEqual(posted.status_code, status.HTTP_200_OK)
+        self.assertEqual(posted.data['results'], [{'title': 'Book4'}, {'title': 'Book0'}])
+        self.assertEqual(got.data['results'], [{'title': 'Book4'}, {'title': 'Book0'}])
+
+    def test_books_read_in_one_query(self):
+        pks = [book.pk for book in self.books]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('book-multi-get'), {'ids': pks}, format='json', QUERY_STRING='expand=author')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data['results'][1]['author']['name'], 'Author1')
+
+    def test_authors_with_books(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('author-multi-get'), {'ids': [self.author2.pk, self.author1.pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # The authors, then their books
+        self.assertEqual(len(queries), 2)
+        authors = response.data['results']
+        self.assertEqual([author['name'] for author in authors], ['Author2', 'Author1'])
+        self.assertEqual([book['title'] for book in authors[0]['books']], ['Book0', 'Book2', 'Book4'])
+
+    def test_authors_nested_limit(self):
+        response = self.client.get(reverse('author-list'), {'ids': self.ids(self.author2.pk), 'books_limit': 1, 'books_ordering': '-published_date'})
+        author = response.data['results'][0]
+        self.assertEqual([book['title'] for book in author['books']], ['Book4'])
+        self.assertEqual(author['books_count'], 3)
+
+    def test_filters_apply(self):
+        response = self.client.get(reverse('book-list'), {'ids': self.ids(self.books[0].pk, self.books[1].pk), 'author': self.author1.pk})
+        self.assertIsNone(response.data['results'][0])
+        self.assertEqual(response.data['results'][1]['title'], 'Book1')
+        self.assertEqual(response.data['not_found'], [self.books[0].pk])
+
+    def test_conditional_get(self):
+        url = reverse('book-list')
+        params = {'ids': self.ids(self.books[0].pk)}
+        etag = self.client.get(url, params)['ETag']
+        get_cache().clear()
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        Book.objects.filter(pk=self.books[0].pk).delete()
+        get_cache().clear()
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'results': [None], 'not_found': [self.books[0].pk]})
+
+    def test_invalid_ids(self):
+        for ids in ('', '1,x', '1,,2'):
+            response = self.client.get(reverse('book-list'), {'ids': ids})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, ids)
+            self.assertIn('ids', response.data)
+        for body in ({'ids': '1,2'}, {'ids': [1, True]}, {'ids': [None]}, [1, 2], {}):
+            response = self.client.post(reverse('book-multi-get'), body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, body)
+
+    def test_batch_size_capped(self):
+        ids = list(range(1, BookViewSet.multi_get_max_ids + 2))
+        response = self.client.post(reverse('book-multi-get'), {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse('book-multi-get'), {'ids': ids[:-1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), BookViewSet.multi_get_max_ids)
+        self.assertEqual(len(response.data['not_found']), BookViewSet.multi_get_max_ids - len(self.books))
+
+    def test_post_does_not_write(self):
+        response = self.client.post(reverse('book-multi-get'), {'ids': [self.books[0].pk], 'title': 'New'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Book.objects.count(), 5)
@@ -0,0 +1,87 @@
+from datetime import date
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import AsyncClient, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.models import Author, Book
+
+class NestedLimitTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author1 = Author.objects.create(name='Author1', email='author1@example.com')
+        self.author2 = Author.objects.create(name='Author2', email='author2@example.com')
+        for i in range(5):
+            Book.objects.create(title=f'Book{i}', published_date=date(2020 + i, 1, 1), author=self.author1)
+        Book.objects.create(title='Other1', published_date=date(2010, 1, 1), author=self.author2)
+        Book.objects.create(title='Other2', published_date=date(2011, 1, 1), author=self.author2)
+        self.client = APIClient()
+
+    def get(self, url, **params):
+        get_cache().clear()
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_limit_and_ordering(self):
+        authors = self.get(reverse('author-list'), books_limit=2, books_ordering='-published_date').data['results']
+        self.assertEqual([book['title'] for book in authors[0]['books']], ['Book4', 'Book3'])
+        self.assertEqual([book['title'] for book in authors[1]['books']], ['Other2', 'Other1'])
+        self.assertEqual(authors[0]['books_count'], 5)
+        self.assertEqual(authors[0]['books_url'], f'http://testserver/books/?author={self.author1.pk}')
+        authors = self.get(reverse('author-list'), books_limit=0).data['results']
+        self.assertEqual(authors[0]['books'], [])
+        self.assertEqual(authors[0]['books_count'], 5)
+        author = self.get(reverse('author-detail', args=[self.author1.pk]), books_limit=1, books_ordering='title').data
+        self.assertEqual([book['title'] for book in author['books']], ['Book0'])
+
+    def test_without_limit(self):
+        author = self.get(reverse('author-detail', args=[self.author1.pk])).data
+        self.assertEqual(len(author['books']), 5)
+        self.assertNotIn('books_count', author)
+        author = self.get(reverse('author-detail', args=[self.author1.pk]), books_ordering='-title').data
+        self.assertEqual(author['books'][0]['title'], 'Book4')
+        self.assertNotIn('books_count', author)
+
+    def test_one_query_for_all_authors(self):
+        with CaptureQueriesContext(connection) as unbounded:
+            self.get(reverse('author-list'))
+        with CaptureQueriesContext(connection) as bounded:
+            self.get(reverse('author-list'), books_limit=2)
+        self.assertEqual(len(bounded), len(unbounded))
+        self.assertIn('ROW_NUMBER()', bounded[-1]['sql'])
+
+    def test_fast_path(self):
+        params = {'books_limit': 2, 'books_ordering': '-published_date', 'fields': 'name,books.title'}
+        regular = self.get(reverse('author-list'), **params)
+        fast = self.get(reverse('author-list'), fast='true', **params)
+        self.assertEqual(fast.content, regular.content)
+        self.assertIn(b'"books_url"', fast.content)
+
+    def test_authors_with_multiple_books(self):
+        authors = self.get(reverse('authors_with_multiple_books_api'), books_limit=1).data['results']
+        self.assertEqual([len(author['books']) for author in authors], [1, 1])
+        self.assertEqual([author['books_count'] for author in authors], [5, 2])
+
+    def test_link_lists_every_book(self):
+        author = self.get(reverse('author-detail', args=[self.author1.pk]), books_limit=1).data
+        books = self.get(author['books_url']).data['results']
+        self.assertEqual(len(books), 5)
+        response = self.client.get(reverse('book-list'), {'author': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_parameters(self):
+        for params in ({'books_limit': '-1'}, {'books_limit': '1001'}, {'books_limit': 'x'}, {'books_ordering': 'email'}):
+            response = self.client.get(reverse('author-list'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_path(self):
+        params = {'books_limit': 2, 'books_ordering': '-published_date'}
+        await get_cache().aclear()
+        response = await AsyncClient().get(reverse('author-list'), params)
+        await get_cache().aclear()
+        expected = await sync_to_async(self.client.get)(reverse('author-list'), params)
+        self.assertEqual(response.content, expected.content)
@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp.models import Author, Book
+
+class KeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+        # Several books share a publication date, so pages have to break ties on id
+        for i in range(7):
+            Book.objects.create(title=f'Book{i}', published_date=date(2023, 1, 1) + timedelta(days=i // 3), author=self.author)
+        self.client = APIClient()
+        self.expected = list(Book.objects.order_by('published_date', 'id').values_list('title', flat=True))
+
+    def walk(self, url, link):
+        titles = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            titles.append([book['title'] for book in response.data['results']])
+            url = response.data[link]
+        return titles
+
+    def test_forward_and_backward(self):
+        forward = self.walk(reverse('book-list') + '?page_size=2', 'next')
+        self.assertEqual([title for page in forward for title in page], self.expected)
+        self.assertEqual([len(page) for page in forward], [2, 2, 2, 1])
+
+        last_page = self.client.get(reverse('book-list') + '?page_size=2').data
+        while last_page['next']:
+            last_page = self.client.get(last_page['next']).data
+        backward = self.walk(last_page['previous'], 'previous')
+        self.assertEqual(backward, list(reversed(forward[:-1])))
+
+    def test_first_page_has_no_previous(self):
+        response = self.client.get(reverse('book-list'), {'page_size': 3})
+        self.assertIsNone(response.data['previous'])
+        self.assertIsNotNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('book-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_published_after_is_paginated(self):
+        url = reverse('published-after-book-list', kwargs={'date': '2023-01-01'})
+        response = self.client.get(url, {'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(len(self.client.get(response.data['next']).data['results']), 1)
+
+    def test_authors_ordered_by_id(self):
+        Author.objects.create(name='Author2', email='author2@example.com')
+        response = self.client.get(reverse('author-list'), {'page_size': 1})
+        self.assertEqual(response.data['results'][0]['id'], self.author.id)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'][0]['name'], 'Author2')
+        self.assertIsNone(response.data['next'])
+
+    def test_page_query_seeks_on_index(self):
+        first = self.client.get(reverse('book-list'), {'page_size': 2, 'fields': 'title'})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data['next'])
+        with connection.cursor() as cursor:
+            # The page query, before the one loading the rows missing from the fragment cache
+            cursor.execute('EXPLAIN QUERY PLAN ' + queries[-2]['sql'])
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('SEARCH myapp_book USING INDEX book_published_id_idx', plan)
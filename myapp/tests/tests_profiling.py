@@ -0,0 +1,71 @@
+from datetime import date
+from django.contrib.auth.models import User
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.models import Author, Book
+from myapp.profiling import ProfileBuffer, make_token, profiles
+
+class ProfilerTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        profiles.clear()
+        author = Author.objects.create(name='Author1', email='author1@example.com')
+        Book.objects.create(title='Book1', published_date=date(2023, 1, 1), author=author)
+        self.client = APIClient()
+        self.staff = User.objects.create_user('staff', password='secret', is_staff=True)
+
+    def test_not_sampled(self):
+        response = self.client.get(reverse('book-list'))
+        self.assertNotIn('X-Profile-Id', response)
+        response = self.client.get(reverse('book-list'), headers={'X-Profile': 'forged'})
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(profiles.list(), [])
+
+    def test_signed_header(self):
+        response = self.client.get(reverse('book-list'), headers={'X-Profile': make_token()})
+        profile = profiles.get(int(response['X-Profile-Id']))
+        self.assertEqual(profile['path'], '/books/')
+        self.assertEqual(profile['status'], 200)
+        self.assertEqual(profile['queries'], 4)
+        self.assertIn('function calls', profile['profile'])
+        plans = [query['plan'] for query in profile['slowest_queries']]
+        self.assertEqual(len(plans), 4)
+        self.assertTrue(any('myapp_book' in line for plan in plans for line in plan))
+        # The plan queries are not counted as the request's
+        self.assertIn('db;desc="4 queries"', response['Server-Timing'])
+
+    @override_settings(PROFILER_SAMPLE_RATE=1.0, PROFILER_SLOW_QUERIES=1)
+    def test_sampling(self):
+        response = self.client.get(reverse('author-list'))
+        profile = profiles.get(int(response['X-Profile-Id']))
+        self.assertEqual(len(profile['slowest_queries']), 1)
+
+    async def test_async_requests(self):
+        response = await AsyncClient().get(reverse('book-list'), headers={'X-Profile': make_token()})
+        profile = profiles.get(int(response['X-Profile-Id']))
+        self.assertIsNone(profile['profile'])
+        self.assertEqual(profile['queries'], 4)
+
+    def test_ring_buffer(self):
+        with override_settings(PROFILER_BUFFER_SIZE=2):
+            buffer = ProfileBuffer()
+        for i in range(3):
+            buffer.add({'path': str(i)})
+        self.assertEqual([profile['path'] for profile in buffer.list()], ['2', '1'])
+        self.assertIsNone(buffer.get(1))
+
+    def test_staff_only_endpoints(self):
+        response = self.client.get(reverse('book-list'), headers={'X-Profile': make_token()})
+        profile_id = int(response['X-Profile-Id'])
+        self.assertEqual(self.client.get(reverse('profile-list')).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(reverse('profile-list'))
+        self.assertEqual([profile['id'] for profile in response.data], [profile_id])
+        self.assertNotIn('profile', response.data[0])
+        response = self.client.get(reverse('profile-detail', args=[profile_id]))
+        self.assertEqual(response.data['queries'], 4)
+        response = self.client.get(reverse('profile-detail', args=[profile_id + 1]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+import unittest
+import uuid
+from collections import OrderedDict
+from contextlib import nullcontext
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.test import APIClient
+from myapp import renderers
+from myapp.benchmarks import available_encoders, run_renderer_benchmarks
+from myapp.cache import get_cache
+from myapp.models import Author, Book
+
+SAMPLE = OrderedDict([
+    ('title', 'Ünïcode "quoted"   line'),
+    ('published_date', date(2020, 1, 2)),
+    ('updated_at', datetime(2020, 1, 2, 3, 4, 5, 678, tzinfo=timezone.utc)),
+    ('price', Decimal('1.50')),
+    ('id', uuid.UUID(int=1)),
+    ('label', gettext_lazy('Books')),
+    ('counts', {1: 2, 'x': [True, False, None, 1.5, -3]}),
+])
+
+class JSONEncoderTestCase(TestCase):
+    def test_stdlib_is_drf_output(self):
+        from rest_framework.renderers import JSONRenderer
+        self.assertEqual(renderers.stdlib_json_dumps(SAMPLE), JSONRenderer().render(SAMPLE))
+
+    @unittest.skipIf(renderers.orjson is None, 'orjson is not installed')
+    def test_orjson_is_stdlib_output(self):
+        self.assertEqual(renderers.orjson_dumps(SAMPLE), renderers.stdlib_json_dumps(SAMPLE))
+        # Beyond 64 bits
+        self.assertEqual(renderers.orjson_dumps([1 << 70]), b'[1180591620717411303424]')
+
+    def test_accelerated_libraries_can_be_disabled(self):
+        with override_settings(FAST_RENDERERS=False):
+            self.assertEqual(renderers.json_dumps(SAMPLE), renderers.stdlib_json_dumps(SAMPLE))
+            self.assertEqual(renderers.packb(SAMPLE), renderers.pack(SAMPLE))
+
+
+class MessagePackTestCase(TestCase):
+    def test_pure_python_encoding(self):
+        cases = [
+            (None, b'\xc0'), (True, b'\xc3'), (False, b'\xc2'),
+            (0, b'\x00'), (127, b'\x7f'), (128, b'\xcc\x80'), (256, b'\xcd\x01\x00'),
+            (1 << 32, b'\xcf\x00\x00\x00\x01\x00\x00\x00\x00'), (-1, b'\xff'), (-32, b'\xe0'),
+            (-33, b'\xd0\xdf'), (-129, b'\xd1\xff\x7f'), (1.5, b'\xcb?\xf8\x00\x00\x00\x00\x00\x00'),
+            ('', b'\xa0'), ('é', b'\xa2\xc3\xa9'), ('a' * 32, b'\xd9\x20' + b'a' * 32),
+            (b'\x01', b'\xc4\x01\x01'), ([1, [2]], b'\x92\x01\x91\x02'), ({'a': 1}, b'\x81\xa1a\x01'),
+            (list(range(16)), b'\xdc\x00\x10' + bytes(range(16))),
+            (date(2020, 1, 2), b'\xaa2020-01-02'),
+        ]
+        for value, expected in cases:
+            self.assertEqual(renderers.pack(value), expected, value)
+        with self.assertRaises(OverflowError):
+            renderers.pack(1 << 64)
+
+    @unittest.skipIf(renderers.msgpack is None, 'msgpack is not installed')
+    def test_pure_python_is_msgpack_output(self):
+        data = [SAMPLE, list(range(70000)), 'x' * 70000, -(1 << 40)]
+        self.assertEqual(renderers.pack(data), renderers.msgpack_packb(data))
+
+
+class RendererViewTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        author = Author.objects.create(name='Author1', email='author1@example.com')
+        Book.objects.create(title='Book1', published_date=date(2020, 1, 1), author=author)
+        self.client = APIClient()
+
+    def test_negotiation(self):
+        for url in [reverse('book-list'), reverse('author-list')]:
+            for params in [{}, {'fast': 'true'}]:
+                response = self.client.get(url, params, HTTP_ACCEPT='application/msgpack')
+                self.assertEqual(response['Content-Type'], 'application/msgpack')
+                expected = self.client.get(url, params)
+                self.assertEqual(response.content, renderers.packb(json.loads(expected.content)))
+        response = self.client.get(reverse('book-list'), {'format': 'msgpack'})
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(self.client.get(reverse('book-list'))['Content-Type'], 'application/json')
+
+    async def test_async_views(self):
+        response = await AsyncClient().get(reverse('book-list'), headers={'Accept': 'application/msgpack'})
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertIn(b'\xaa2020-01-01', response.content)
+
+    def test_benchmark(self):
+        results = run_renderer_benchmarks(50, repeat=1)
+        self.assertEqual(len(results), 3 * len(available_encoders()))
+        self.assertEqual(Book.objects.count(), 1)
+        sizes = {(result['dataset'], result['encoder']): result['bytes'] for result in results}
+        self.assertLess(sizes['books', 'msgpack, pure Python'], sizes['books', 'json'])
+        self.assertEqual(sizes['books, fast read', 'json'], sizes['books', 'json'])
+
+    def test_benchmark_command(self):
+        stdout = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'renderers.json')
+            # Already in a test database
+            with mock.patch('myapp.management.commands.benchmark_renderers.benchmark_database', nullcontext):
+                call_command('benchmark_renderers', size=20, repeat=1, output=output, stdout=stdout)
+            with open(output) as file:
+                report = json.load(file)
+        self.assertEqual(report['size'], 20)
+        self.assertEqual(len(report['results']), 3 * len(available_encoders()))
+        self.assertIn('books (20 books), json:', stdout.getvalue())
+        self.assertIn(f'Results written to {output}.', stdout.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('benchmark_renderers', size=0, stdout=StringIO())
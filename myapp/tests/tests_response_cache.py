@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from io import StringIO
+from rest_framework.test import APIClient
+from myapp.cache import get_cache, get_cache_stats
+from myapp.models import Author, Book
+
+class ResponseCacheTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+        self.book = Book.objects.create(title='Book1', published_date='2023-01-01', author=self.author)
+        self.client = APIClient()
+
+    def test_hit_skips_database(self):
+        url = reverse('book-list')
+        first = self.client.get(url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(get_cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_query_parameters_are_part_of_the_key(self):
+        url = reverse('book-list')
+        self.client.get(url, {'fields': 'title'})
+        response = self.client.get(url, {'fields': 'published_date'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(list(response.data['results'][0]), ['published_date'])
+
+    def test_write_through_viewset_invalidates(self):
+        url = reverse('author-detail', args=[self.author.id])
+        self.client.get(url)
+        self.client.patch(url, {'name': 'Renamed'})
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['name'], 'Renamed')
+
+    def test_date_relative_responses_expire_at_midnight(self):
+        url = reverse('author-detail', args=[self.author.id])
+        age = self.client.get(url).data['books'][0]['since_creation_in_days']
+        with mock.patch('myapp.serializers.date') as mock_date:
+            mock_date.today.return_value = date.today() + timedelta(days=1)
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['books'][0]['since_creation_in_days'], age + 1)
+        # Responses without ages are kept
+        stats_url = reverse('catalog-stats')
+        self.client.get(stats_url)
+        with mock.patch('myapp.serializers.date') as mock_date:
+            mock_date.today.return_value = date.today() + timedelta(days=1)
+            self.assertEqual(self.client.get(stats_url)['X-Cache'], 'HIT')
+
+    def test_related_write_invalidates(self):
+        url = reverse('book-list')
+        self.client.get(url)
+        self.author.name = 'Renamed'
+        self.author.save()
+        self.assertEqual(self.client.get(url).data['results'][0]['author_name'], 'Renamed')
+
+    def test_bulk_write_invalidates(self):
+        url = '/authors-with-multiple-books/'
+        self.assertEqual(self.client.get(url).data['results'], [])
+        Book.objects.bulk_create([Book(title='Book2', published_date='2023-01-01', author=self.author)])
+        self.assertEqual(len(self.client.get(url).data['results']), 1)
+
+    def test_errors_are_not_cached(self):
+        url = reverse('book-detail', args=[self.book.id + 1])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(get_cache_stats(), {'hits': 0, 'misses': 2})
+
+    def test_stats_command(self):
+        self.client.get(reverse('book-list'))
+        out = StringIO()
+        call_command('response_cache_stats', stdout=out)
+        self.assertIn('misses: 1', out.getvalue())
@@ -0,0 +1,87 @@
+from datetime import date
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.models import Author, Book
+from myapp.search import SQLiteFTSBackend
+
+class BookSearchTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.herbert = Author.objects.create(name='Frank Herbert', email='herbert@example.com')
+        self.tolkien = Author.objects.create(name='J. R. R. Tolkien', email='tolkien@example.com')
+        self.dune = Book.objects.create(title='Dune', published_date=date(1965, 8, 1), author=self.herbert)
+        Book.objects.create(title='Dune Messiah', published_date=date(1969, 1, 1), author=self.herbert)
+        Book.objects.create(title='The Hobbit', published_date=date(1937, 9, 21), author=self.tolkien)
+        self.client = APIClient()
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('book-search'), {'q': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [book['title'] for book in response.data['results']]
+
+    def test_title_and_author_name(self):
+        self.assertEqual(sorted(self.search('dune')), ['Dune', 'Dune Messiah'])
+        self.assertEqual(self.search('tolkien'), ['The Hobbit'])
+        self.assertEqual(self.search('herbert messiah'), ['Dune Messiah'])
+        # The last word is a prefix
+        self.assertEqual(self.search('hob'), ['The Hobbit'])
+        self.assertEqual(self.search('missing'), [])
+
+    def test_ranked(self):
+        # The shorter title is the better match
+        self.assertEqual(self.search('dune'), ['Dune', 'Dune Messiah'])
+
+    def test_paginated_by_rank(self):
+        response = self.client.get(reverse('book-search'), {'q': 'dune', 'page_size': 1})
+        self.assertEqual([book['title'] for book in response.data['results']], ['Dune'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([book['title'] for book in response.data['results']], ['Dune Messiah'])
+        self.assertIsNone(response.data['next'])
+
+    def test_query_syntax_is_searched_as_text(self):
+        self.assertEqual(self.search('(dune"'), ['Dune', 'Dune Messiah'])
+        self.assertEqual(self.search('dune NEAR OR'), [])
+        response = self.client.get(reverse('book-search'), {'q': ' '})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.search('***'), [])
+
+    def test_index_follows_writes(self):
+        self.dune.title = 'Children of Dune'
+        self.dune.save()
+        self.assertIn('Children of Dune', self.search('children'))
+        Author.objects.filter(pk=self.tolkien.pk).update(name='John Tolkien')
+        self.assertEqual(self.search('john'), ['The Hobbit'])
+        Book.objects.bulk_create([Book(title='Silmarillion', published_date=date(1977, 9, 15), author=self.tolkien)])
+        self.assertEqual(self.search('silmarillion'), ['Silmarillion'])
+        Book.objects.filter(title='The Hobbit').delete()
+        self.assertEqual(self.search('hobbit'), [])
+
+    def test_search_uses_the_index(self):
+        backend = SQLiteFTSBackend()
+        sql = str(backend.search(Book.objects.all(), 'dune').query)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql.replace('"dune"*', "'\"dune\"*'"))
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('VIRTUAL TABLE INDEX', plan)
+        self.assertIn('SEARCH myapp_book USING INTEGER PRIMARY KEY', plan)
+        self.assertNotIn("SCAN myapp_book'", plan)
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM myapp_book_search')
+        self.assertEqual(self.search('dune'), [])
+        get_cache().clear()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 3 book(s)', out.getvalue())
+        self.assertEqual(self.search('dune'), ['Dune', 'Dune Messiah'])
+
+    @override_settings(BOOK_SEARCH_BACKEND='myapp.search.ContainsSearchBackend')
+    def test_contains_backend(self):
+        self.assertEqual(sorted(self.search('herbert')), ['Dune', 'Dune Messiah'])
@@ -0,0 +1,78 @@
+from datetime import date
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.test import APIClient
+from apexiveproject import settings_api
+from myapp.benchmarks import run_startup_benchmarks, time_middleware
+from myapp.cache import get_cache
+from myapp.models import Author, Book
+
+def api_classes(name):
+    return [import_string(path) for path in settings_api.REST_FRAMEWORK[name]]
+
+# The views read the renderers and authentication classes when defined
+@override_settings(MIDDLEWARE=settings_api.MIDDLEWARE, REST_FRAMEWORK=settings_api.REST_FRAMEWORK)
+@mock.patch.multiple(
+    APIView,
+    renderer_classes=api_classes('DEFAULT_RENDERER_CLASSES'),
+    authentication_classes=api_classes('DEFAULT_AUTHENTICATION_CLASSES'),
+)
+class APISettingsProfileTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        author = Author.objects.create(name='Author1', email='author1@example.com')
+        Book.objects.create(title='Book1', published_date=date(2023, 1, 1), author=author)
+        self.client = APIClient()
+
+    def test_profile(self):
+        for app in ('django.contrib.admin', 'django.contrib.sessions', 'django.contrib.messages', 'django.contrib.staticfiles'):
+            self.assertNotIn(app, settings_api.INSTALLED_APPS)
+        self.assertNotIn('django.middleware.csrf.CsrfViewMiddleware', settings_api.MIDDLEWARE)
+        self.assertNotIn('rest_framework.renderers.BrowsableAPIRenderer', settings_api.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'])
+        self.assertEqual(settings_api.REST_FRAMEWORK['PAGE_SIZE'], 100)
+
+    def test_browsers_get_json(self):
+        response = self.client.get(reverse('book-list'), HTTP_ACCEPT='text/html,*/*;q=0.8')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['results'][0]['title'], 'Book1')
+        self.assertNotIn('X-Frame-Options', response)
+        self.assertIn('Server-Timing', response)
+
+    def test_writes_without_csrf_or_session(self):
+        client = APIClient(enforce_csrf_checks=True)
+        data = {'title': 'Book2', 'published_date': '2023-01-01', 'author': Author.objects.get().pk}
+        response = client.post(reverse('book-list'), data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.cookies, {})
+
+    def test_basic_authentication(self):
+        User.objects.create_user('staff', password='secret', is_staff=True)
+        self.assertEqual(self.client.get(reverse('profile-list')).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials(HTTP_AUTHORIZATION='Basic c3RhZmY6c2VjcmV0')
+        self.assertEqual(self.client.get(reverse('profile-list')).status_code, status.HTTP_200_OK)
+
+
+class StartupBenchmarkTestCase(TestCase):
+    def test_time_middleware(self):
+        self.assertIsInstance(time_middleware(requests=10, rounds=1), float)
+
+    def test_run_startup_benchmarks(self):
+        stdout = StringIO()
+        results = run_startup_benchmarks({'api': 'apexiveproject.settings_api'}, repeat=1, requests=10, stdout=stdout)
+        self.assertEqual([result['profile'] for result in results], ['api'])
+        self.assertGreater(results[0]['import_ms'], 0)
+        self.assertGreater(results[0]['check_ms'], 0)
+        self.assertIn('api (apexiveproject.settings_api): import', stdout.getvalue())
+
+    def test_command_validates_its_arguments(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_startup', '--repeat', '0', stdout=StringIO())
@@ -0,0 +1,110 @@
+from datetime import date
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.models import Author, Book, MonthlyBookCount
+
+class CatalogStatsTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author1 = Author.objects.create(name='Author1', email='author1@example.com')
+        self.author2 = Author.objects.create(name='Author2', email='author2@example.com')
+        self.book = Book.objects.create(title='Book1', published_date='2023-01-15', author=self.author1)
+        Book.objects.create(title='Book2', published_date=date(2023, 1, 20), author=self.author1)
+        Book.objects.create(title='Book3', published_date=date(2024, 3, 1), author=self.author2)
+        self.client = APIClient()
+
+    def months(self):
+        return {
+            (year, month): count
+            for year, month, count in MonthlyBookCount.objects.filter(book_count__gt=0).values_list('year', 'month', 'book_count')
+        }
+
+    def test_stats(self):
+        response = self.client.get(reverse('catalog-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'book_count': 3,
+            'books_per_year': [{'year': 2023, 'book_count': 2}, {'year': 2024, 'book_count': 1}],
+            'books_per_month': [
+                {'year': 2023, 'month': 1, 'book_count': 2},
+                {'year': 2024, 'month': 3, 'book_count': 1},
+            ],
+            'books_per_author': [
+                {'id': self.author1.pk, 'name': 'Author1', 'book_count': 2},
+                {'id': self.author2.pk, 'name': 'Author2', 'book_count': 1},
+            ],
+        })
+
+    def test_reads_the_rollups(self):
+        Book.objects.bulk_create([
+            Book(title=f'Bulk{i}', published_date=date(2000 + i % 20, 1 + i % 12, 1), author=self.author2)
+            for i in range(200)
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('catalog-stats'))
+        self.assertEqual(response.data['book_count'], 203)
+        self.assertFalse(any('"myapp_book"' in query['sql'] for query in queries))
+
+    def test_rollups_follow_writes(self):
+        self.assertEqual(self.months(), {(2023, 1): 2, (2024, 3): 1})
+        self.book.published_date = date(2024, 3, 5)
+        self.book.save()
+        self.assertEqual(self.months(), {(2023, 1): 1, (2024, 3): 2})
+        self.book.title = 'Renamed'
+        self.book.save(update_fields=['title'])
+        self.assertEqual(self.months(), {(2023, 1): 1, (2024, 3): 2})
+        Book.objects.bulk_create([Book(title='Book4', published_date=date(2025, 6, 1), author=self.author1)])
+        Book.objects.filter(published_date__year=2024).update(published_date=date(2025, 6, 2))
+        self.assertEqual(self.months(), {(2023, 1): 1, (2025, 6): 3})
+        books = list(Book.objects.filter(published_date__year=2025))
+        for book in books:
+            book.published_date = date(2023, 1, 1)
+        Book.objects.bulk_update(books, ['published_date'])
+        self.assertEqual(self.months(), {(2023, 1): 4})
+        self.author1.delete()
+        self.assertEqual(self.months(), {(2023, 1): 1})
+        self.assertEqual(Book.objects.count_by_month(), {(2023, 1): 1})
+
+    def test_response_is_invalidated(self):
+        self.client.get(reverse('catalog-stats'))
+        response = self.client.get(reverse('catalog-stats'))
+        self.assertEqual(response['X-Cache'], 'HIT')
+        Book.objects.create(title='Book4', published_date=date(2024, 3, 2), author=self.author2)
+        response = self.client.get(reverse('catalog-stats'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['books_per_year'][1], {'year': 2024, 'book_count': 2})
+
+    def test_rebuild_stats(self):
+        MonthlyBookCount.objects.filter(year=2023).update(book_count=5)
+        Author.objects.filter(pk=self.author2.pk).update(book_count=0)
+        MonthlyBookCount.objects.create(year=1999, month=1, book_count=1)
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_stats', verify=True, stdout=out)
+        self.assertIn('Month 2023-01: stored 5, actual 2', out.getvalue())
+        self.assertIn('Month 1999-01: stored 1, actual 0', out.getvalue())
+        self.assertIn(f'Author {self.author2.pk}: stored 0, actual 1', out.getvalue())
+        call_command('rebuild_stats', stdout=StringIO())
+        self.assertEqual(self.months(), {(2023, 1): 2, (2024, 3): 1})
+        self.assertEqual(MonthlyBookCount.objects.count(), 2)
+        call_command('rebuild_stats', verify=True, stdout=StringIO())
+
+    def test_rebuild_stats_invalidates_author_responses(self):
+        Author.objects.filter(pk=self.author2.pk).update(book_count=0)
+        url = reverse('catalog-stats')
+        detail_url = reverse('author-detail', args=[self.author2.pk])
+        self.client.get(url)
+        self.client.get(detail_url)
+        call_command('rebuild_stats', stdout=StringIO())
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn({'id': self.author2.pk, 'name': 'Author2', 'book_count': 1}, response.data['books_per_author'])
+        self.assertEqual(self.client.get(detail_url).data['book_count'], 1)
@@ -0,0 +1,69 @@
+import json
+from unittest import mock
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from myapp.cache import get_cache
+from myapp.models import Author, Book
+from myapp.streaming import batched, json_array_stream, ndjson_stream
+from myapp.views import PublishedAfterBookList
+
+class StreamEncodingTestCase(TestCase):
+    def test_batched(self):
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+    def test_json_array(self):
+        self.assertEqual(b''.join(json_array_stream([[1, 2], [], [3]])), b'[1,2,3]')
+        self.assertEqual(b''.join(json_array_stream([])), b'[]')
+
+    def test_ndjson(self):
+        self.assertEqual(b''.join(ndjson_stream([[{'a': 1}], [{'a': 2}]])), b'{"a":1}\n{"a":2}\n')
+
+
+class StreamingListTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author = Author.objects.create(name='Author1', email='author1@example.com')
+        for i in range(5):
+            Book.objects.create(title=f'Book{i}', published_date=f'2023-01-0{i + 1}', author=self.author)
+        self.client = APIClient()
+
+    def regular_results(self, url, **params):
+        return self.client.get(url, {'page_size': 100, **params}).json()['results']
+
+    def test_json_stream_matches_regular_list(self):
+        url = reverse('book-list')
+        response = self.client.get(url, {'stream': 'json'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), self.regular_results(url))
+
+    def test_ndjson_stream_in_chunks(self):
+        url = reverse('published-after-book-list', kwargs={'date': '2023-01-02'})
+        with mock.patch.object(PublishedAfterBookList, 'stream_chunk_size', 2):
+            response = self.client.get(url, {'stream': 'ndjson', 'fields': 'title'})
+            chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 2)
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.regular_results(url, fields='title'))
+
+    def test_authors_stream_with_nested_books(self):
+        url = reverse('author-list')
+        response = self.client.get(url, {'stream': 'json'})
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), self.regular_results(url))
+
+    def test_invalid_format(self):
+        self.assertEqual(self.client.get(reverse('book-list'), {'stream': 'xml'}).status_code, 400)
+
+
+class AsyncStreamingListTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        author = Author.objects.create(name='Author1', email='author1@example.com')
+        Book.objects.create(title='Book1', published_date='2023-01-01', author=author)
+
+    async def test_asgi_stream(self):
+        response = await AsyncClient().get(reverse('book-list'), {'stream': 'ndjson'})
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(json.loads(content)['title'], 'Book1')
@@ -1,8 +1,8 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
-from myapp.views import AuthorViewSet, BookViewSet, PublishedAfterBookList, AuthorsWithMultipleBooksAPIView
+from myapp.routers import BulkRouter
+from myapp.views import AuthorViewSet, BookViewSet, CatalogStatsAPIView, ChangeFeedAPIView, DeletionJobDetailAPIView, MetricsView, ProfileDetailAPIView, ProfileListAPIView, PublishedAfterBookList, AuthorsWithMultipleBooksAPIView
 
-router = DefaultRouter()
+router = BulkRouter()
 router.register(r"author", AuthorViewSet, basename="author"),
 router.register(r"books", BookViewSet, basename="book")
 
@@ -10,4 +10,10 @@ urlpatterns = [
     path("", include(router.urls)),
     path('authors-with-multiple-books/', AuthorsWithMultipleBooksAPIView.as_view(), name='authors_with_multiple_books_api'),
     path('books-published-after/<str:date>/', PublishedAfterBookList.as_view(), name='published-after-book-list'),
+    path('stats/', CatalogStatsAPIView.as_view(), name='catalog-stats'),
+    path('changes/', ChangeFeedAPIView.as_view(), name='changes'),
+    path('deletion-jobs/<int:pk>/', DeletionJobDetailAPIView.as_view(), name='deletion-job-detail'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('profiles/', ProfileListAPIView.as_view(), name='profile-list'),
+    path('profiles/<int:pk>/', ProfileDetailAPIView.as_view(), name='profile-detail'),
 ]
@@ -1,10 +1,54 @@
-from rest_framework import viewsets, generics
-
-from myapp.models import Author, Book
-from myapp.serializers import AuthorSerializer, BookSerializer
-
-
-class AuthorViewSet(viewsets.ModelViewSet):
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework import generics, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import _positive_int
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from myapp.changelog import (
+    decode_token,
+    encode_token,
+    get_current_position,
+    read_changes,
+)
+from myapp.deletion import start_author_deletion
+from myapp.instrumentation import histograms
+from myapp.mixins import (
+    AgeFilterMixin,
+    BulkWriteMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    DynamicFieldsViewMixin,
+    FastReadMixin,
+    FragmentCacheMixin,
+    MultiGetMixin,
+    NestedLimitMixin,
+    StreamingListMixin,
+)
+from myapp.models import Author, Book, DeletionJob, MonthlyBookCount
+from myapp.profiling import profiles
+from myapp.search import get_search_backend
+from myapp.serializers import (
+    AuthorSerializer,
+    BookSerializer,
+    DeletionJobSerializer,
+)
+
+
+class AuthorViewSet(
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    MultiGetMixin,
+    StreamingListMixin,
+    FragmentCacheMixin,
+    NestedLimitMixin,
+    FastReadMixin,
+    DynamicFieldsViewMixin,
+    viewsets.ModelViewSet,
+):
     """
     ViewSet for interacting with Author objects.
 
@@ -13,12 +57,17 @@ class AuthorViewSet(viewsets.ModelViewSet):
     AuthorSerializer for serialization.
 
     Attributes:
-        queryset (QuerySet): The default queryset containing all Author objects.
+        queryset (QuerySet): The default queryset containing all Author
+            objects but the hidden ones, being deleted.
         serializer_class (Serializer): The serializer class used for
             serialization and deserialization of Author objects.
+        ordering (tuple): The keyset ordering of the paginated list.
+        cache_models (tuple): The models whose writes invalidate the cached
+            responses, see `CachedResponseMixin`.
     Usage example:
     ```
-    # To retrieve a list of all authors
+    # To retrieve the first page of authors, following the `next` link for
+    # the remaining ones
     GET /authors/
 
     # To retrieve details of a specific author
@@ -32,13 +81,57 @@ class AuthorViewSet(viewsets.ModelViewSet):
 
     # To delete an author
     DELETE /authors/{author_id}/
-    """
 
-    queryset = Author.objects.all()
-    serializer_class = AuthorSerializer
+    # To delete an author with many books in the background: it is hidden
+    # right away and the response (202) links to the status of the deletion
+    DELETE /authors/{author_id}/?background=true
 
+    # To retrieve only the names of the authors and the titles of their books
+    GET /authors/?fields=name,books.title
 
-class BookViewSet(viewsets.ModelViewSet):
+    # To retrieve the three latest books of every author, with their number
+    # of books and the link to all of them (see `NestedLimitMixin`)
+    GET /authors/?books_limit=3&books_ordering=-published_date
+
+    # To retrieve authors by id, in that order, with null for the missing
+    # ones (see `MultiGetMixin`), or by POST for long lists of ids
+    GET /authors/?ids=3,1,2
+    POST /authors/multi-get/ {"ids": [3, 1, 2]}
+    """
+
+    queryset = Author.objects.visible()
+    serializer_class = AuthorSerializer
+    ordering = ("id",)
+    cache_models = (Author, Book)
+    background_delete_param = "background"
+
+    def destroy(self, request, *args, **kwargs):
+        value = request.query_params.get(self.background_delete_param, "")
+        if value.lower() not in ("1", "true", "yes"):
+            return super().destroy(request, *args, **kwargs)
+        job = start_author_deletion(self.get_object())
+        data = DeletionJobSerializer(
+            job, context=self.get_serializer_context()
+        ).data
+        return Response(
+            data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": data["url"]},
+        )
+
+
+class BookViewSet(
+    BulkWriteMixin,
+    AgeFilterMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    MultiGetMixin,
+    StreamingListMixin,
+    FragmentCacheMixin,
+    FastReadMixin,
+    DynamicFieldsViewMixin,
+    viewsets.ModelViewSet,
+):
     """
     API ViewSet for managing Book objects.
 
@@ -50,10 +143,22 @@ class BookViewSet(viewsets.ModelViewSet):
         - queryset (QuerySet): The default queryset for retrieving Book objects.
         - serializer_class (Serializer): The serializer class for converting
           Book objects to/from JSON.
+        - ordering (tuple): The keyset ordering of the paginated list, backed
+          by the (published_date, id) index.
+        - search_ordering (tuple): The keyset ordering of search results.
+        - cache_models (tuple): The models whose writes invalidate the cached
+          responses, see `CachedResponseMixin`.
+        - fingerprint_models (tuple): The related models included in the
+          ETag of the responses, see `ConditionalGetMixin`.
+        - fragment_version_fields (tuple): The columns whose values change
+          with the representation of a book, see `FragmentCacheMixin`.
+        - fragment_row_params (tuple): The query parameters that do not
+          change the representation of the books.
 
     Usage example:
     ```
-    # Retrieve a list of all books
+    # Retrieve the first page of books, following the `next` link for the
+    # remaining ones
     GET /api/books/
 
     # Retrieve details of a specific book
@@ -62,19 +167,109 @@ class BookViewSet(viewsets.ModelViewSet):
     # Create a new book
     POST /api/books/
 
+    # Create or partially update many books at once (see `BulkWriteMixin`)
+    POST /api/books/ [{"title": ..., "published_date": ..., "author": ...}, ...]
+    PATCH /api/books/ [{"id": ..., "title": ...}, ...]
+
+    # Retrieve books by id, in that order, with null for the missing ones
+    # (see `MultiGetMixin`), or by POST for long lists of ids
+    GET /api/books/?ids=3,1,2
+    POST /api/books/multi-get/ {"ids": [3, 1, 2]}
+
     # Update an existing book
     PUT /api/books/{book_id}/
 
     # Delete a book
     DELETE /api/books/{book_id}/
+
+    # Retrieve only the title and publication date of every book
+    GET /api/books/?fields=title,published_date
+
+    # Retrieve the books of an author
+    GET /api/books/?author={author_id}
+
+    # Retrieve books with their author nested instead of its id
+    GET /api/books/?expand=author
+
+    # Serialize the list through the fast read path (see `FastReadMixin`)
+    GET /api/books/?fast=true
+
+    # Stream every book as one JSON array, or one JSON document per line
+    # (see `StreamingListMixin`)
+    GET /api/books/?stream=json
+    GET /api/books/?stream=ndjson
+
+    # Books published in the last 30 days, youngest first (see
+    # `AgeFilterMixin`)
+    GET /api/books/?max_age_days=30&ordering=since_creation_in_days
+
+    # Books whose title or author name match words, most relevant first
+    # (see `myapp.search`)
+    GET /api/books/search/?q=dune herbert
     ```
     """
 
-    queryset = Book.objects.all()
+    queryset = Book.objects.visible()
     serializer_class = BookSerializer
+    ordering = ("published_date", "id")
+    search_ordering = ("search_rank", "id")
+    cache_models = (Book, Author)
+    fingerprint_models = (Author,)
+    # A book is represented with its author's name (and email, expanded),
+    # which change without its `updated_at`
+    fragment_version_fields = ("updated_at", "author__name", "author__email")
+    fragment_row_params = (
+        *FragmentCacheMixin.fragment_row_params, "max_age_days", "author",
+    )
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        author = self.request.query_params.get("author")
+        if author is not None:
+            try:
+                author = int(author)
+            except ValueError:
+                raise ValidationError({"author": "Expected an author id."})
+            # Read through the (author, published_date) index
+            queryset = queryset.filter(author_id=author)
+        return queryset
+
+    def get_ordering(self):
+        if getattr(self, "action", None) == "search":
+            return self.search_ordering
+        return super().get_ordering()
+
+    @action(detail=False)
+    def search(self, request):
+        """
+        Return the books whose title or author name match the words of the
+        ``q`` query parameter, most relevant first, paginated.
+        """
 
-
-class PublishedAfterBookList(generics.ListAPIView):
+        return self.cached_response(self.search_response, request)
+
+    def search_response(self, request):
+        query = request.query_params.get("q", "")
+        if not query.strip():
+            raise ValidationError({"q": "This parameter is required."})
+        queryset = get_search_backend().search(
+            self.filter_queryset(self.get_queryset()), query
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class PublishedAfterBookList(
+    AgeFilterMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    StreamingListMixin,
+    FragmentCacheMixin,
+    FastReadMixin,
+    DynamicFieldsViewMixin,
+    generics.ListAPIView,
+):
     """
     A DRF API endpoint that returns a list of books published after a specified date.
 
@@ -84,6 +279,9 @@ class PublishedAfterBookList(generics.ListAPIView):
     Example Usage:
     ```
     GET /books/published_after/2023-01-01/
+
+    # Only the books of the last year, oldest first (see `AgeFilterMixin`)
+    GET /books/published_after/2023-01-01/?max_age_days=365&ordering=-since_creation_in_days
     ```
     Serializer:
     - Uses `BookSerializer` for serializing the book objects.
@@ -97,6 +295,13 @@ class PublishedAfterBookList(generics.ListAPIView):
     """
 
     serializer_class = BookSerializer
+    ordering = ("published_date", "id")
+    cache_models = (Book, Author)
+    fingerprint_models = (Author,)
+    fragment_version_fields = ("updated_at", "author__name", "author__email")
+    fragment_row_params = (
+        *FragmentCacheMixin.fragment_row_params, "max_age_days",
+    )
 
     def get_queryset(self):
         """
@@ -107,10 +312,21 @@ class PublishedAfterBookList(generics.ListAPIView):
         """
 
         date = self.kwargs['date']
-        return Book.objects.published_after(date)
-    
-
-class AuthorsWithMultipleBooksAPIView(generics.ListAPIView):
+        return self.plan_queryset(
+            Book.objects.visible().published_after(date)
+        )
+
+
+class AuthorsWithMultipleBooksAPIView(
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    StreamingListMixin,
+    FragmentCacheMixin,
+    NestedLimitMixin,
+    FastReadMixin,
+    DynamicFieldsViewMixin,
+    generics.ListAPIView,
+):
     """
     API endpoint to retrieve a list of authors with multiple books.
 
@@ -126,15 +342,22 @@ class AuthorsWithMultipleBooksAPIView(generics.ListAPIView):
     - `GET`: Retrieves a list of authors with multiple books.
 
     ### Query Parameters
-    - No specific query parameters are required.
+    - `fields`, `omit`, `expand`: Restrict the serialized fields, see
+      `DynamicFieldsViewMixin`.
+    - `fast`: Serialize through the fast read path, see `FastReadMixin`.
+    - `books_limit`, `books_ordering`: Bound the nested books, see
+      `NestedLimitMixin`.
 
     ## Example Usage
     ```bash
     curl -X GET http://localhost:8000/authors-with-multiple-books/
+    curl -X GET "http://localhost:8000/authors-with-multiple-books/?books_limit=5"
     ```
     """
 
     serializer_class = AuthorSerializer
+    ordering = ("id",)
+    cache_models = (Author, Book)
 
     def get_queryset(self):
         """
@@ -143,5 +366,228 @@ class AuthorsWithMultipleBooksAPIView(generics.ListAPIView):
         Returns:
         - Queryset of authors with multiple books.
         """
-        return Book.objects.authors_with_multiple_books()
-    
\ No newline at end of file
+        return self.plan_queryset(Book.objects.authors_with_multiple_books())
+
+
+class CatalogStatsAPIView(CachedResponseMixin, APIView):
+    """
+    API endpoint returning statistics of the catalogue for dashboards.
+
+    The statistics are read from rollups kept up to date on every book
+    write, the book count of every author (`Author.book_count`) and of every
+    publication month (`MonthlyBookCount`), so a request reads one row per
+    author and per month whatever the number of books. Years are summed from
+    their months. ``manage.py rebuild_stats`` rebuilds the rollups, or
+    verifies them against the books table.
+
+    ## Response
+    - HTTP 200 OK:
+      - `book_count`: The number of books.
+      - `books_per_year`: `year` and `book_count` of every year with books,
+        in chronological order.
+      - `books_per_month`: `year`, `month` and `book_count` of every month
+        with books, in chronological order.
+      - `books_per_author`: `id`, `name` and `book_count` of every author
+        with books, most books first.
+
+    ## Example Usage
+    ```bash
+    curl -X GET http://localhost:8000/stats/
+    ```
+    """
+
+    cache_models = (Book, Author, MonthlyBookCount)
+
+    def get(self, request, *args, **kwargs):
+        return self.cached_response(self.stats_response, request)
+
+    def stats_response(self, request):
+        months = list(
+            MonthlyBookCount.objects.filter(book_count__gt=0)
+            .order_by("year", "month")
+            .values("year", "month", "book_count")
+        )
+        years = {}
+        for month in months:
+            years[month["year"]] = (
+                years.get(month["year"], 0) + month["book_count"]
+            )
+        authors = (
+            Author.objects.visible()
+            .filter(book_count__gt=0)
+            .order_by("-book_count", "id")
+            .values("id", "name", "book_count")
+        )
+        return Response(
+            {
+                "book_count": sum(years.values()),
+                "books_per_year": [
+                    {"year": year, "book_count": count}
+                    for year, count in years.items()
+                ],
+                "books_per_month": months,
+                "books_per_author": list(authors),
+            }
+        )
+
+
+class ChangeFeedAPIView(APIView):
+    """
+    API endpoint returning the creations, updates and deletions of authors
+    and books since a token, for clients keeping a copy of the catalogue.
+
+    The changes are read from the `ChangeLog`, written in the transaction of
+    every change, deletions cascading from an author to its books included.
+    A client reads a token without ``since``, pulls the lists, then follows
+    the feed from the token, reading the changed rows by id (``?ids=`` of
+    the lists, see `myapp.mixins.MultiGetMixin`) and deleting the deleted
+    ones. Changes made while pulling the lists may be returned again, so
+    updates are applied as upserts. ``manage.py compact_change_log`` deletes
+    the entries older than `CHANGE_LOG_RETENTION_DAYS`: reading from an
+    older token returns 410 and the client pulls the lists again.
+
+    ## Query Parameters
+    - `since`: The token of the last change read, the `next` token of the
+      previous response.
+    - `page_size`: The maximum number of changes returned, up to
+      `max_page_size`.
+
+    ## Response
+    - HTTP 200 OK:
+      - `results`: The changes, oldest first, with their `token`, `model`
+        (``author`` or ``book``), `id`, `action` (``create``, ``update`` or
+        ``delete``) and `changed_at`. Empty without ``since``.
+      - `next`: The token to read the following changes from.
+      - `has_more`: Whether more changes follow.
+    - HTTP 400 Bad Request: The token is invalid.
+    - HTTP 410 Gone: The changes since the token were compacted.
+
+    ## Example Usage
+    ```bash
+    curl -X GET http://localhost:8000/changes/
+    curl -X GET "http://localhost:8000/changes/?since={next}"
+    ```
+    """
+
+    page_size = 100
+    max_page_size = 1000
+
+    def get(self, request, *args, **kwargs):
+        token = request.query_params.get("since")
+        if token is None:
+            return Response(
+                {
+                    "results": [],
+                    "next": encode_token(get_current_position()),
+                    "has_more": False,
+                }
+            )
+        try:
+            position = decode_token(token)
+        except ValueError:
+            raise ValidationError({"since": "Invalid token."})
+        results, has_more = read_changes(position, self.get_page_size())
+        if results:
+            token = results[-1]["token"]
+        return Response(
+            {"results": results, "next": token, "has_more": has_more}
+        )
+
+    def get_page_size(self):
+        try:
+            return _positive_int(
+                self.request.query_params["page_size"],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+
+class DeletionJobDetailAPIView(generics.RetrieveAPIView):
+    """
+    API endpoint returning the status of the background deletion of an
+    author, linked from the response to
+    ``DELETE /author/{author_id}/?background=true``.
+
+    ## Response
+    - HTTP 200 OK: The `status` of the job (``pending``, ``running``,
+      ``done`` or ``failed``, with the `error`), the numbers of
+      `total_books` and `deleted_books`, `created_at` and `finished_at`.
+
+    ## Example Usage
+    ```bash
+    curl -X DELETE "http://localhost:8000/author/{author_id}/?background=true"
+    curl -X GET http://localhost:8000/deletion-jobs/{job_id}/
+    ```
+    """
+
+    queryset = DeletionJob.objects.all()
+    serializer_class = DeletionJobSerializer
+
+
+class MetricsView(View):
+    """
+    Endpoint exposing the request metrics of the process in the Prometheus
+    text format, see `myapp.middleware.RequestMetricsMiddleware`.
+
+    ## Example Usage
+    ```bash
+    curl -X GET http://localhost:8000/metrics
+    ```
+    """
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(
+            histograms.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
+class ProfileListAPIView(APIView):
+    """
+    API endpoint listing the request profiles kept by
+    `myapp.middleware.ProfilerMiddleware`, latest first, for staff users.
+
+    The list holds the summary of every profile: its `id`, the `method`,
+    `path` and `status` of the request, when it `started` (a timestamp), its
+    `duration_ms`, number of `queries` and `db_ms`. The detail adds the
+    `slowest_queries` with their `plan` and the Python `profile`.
+
+    ## Example Usage
+    ```bash
+    # Profile a request, then read its profile
+    curl -H "X-Profile: $(python manage.py profiler_token)" \
+        http://localhost:8000/books/
+    curl -X GET http://localhost:8000/profiles/
+    curl -X GET http://localhost:8000/profiles/{profile_id}/
+    ```
+    """
+
+    permission_classes = [IsAdminUser]
+    summary_fields = (
+        "id", "method", "path", "status", "started", "duration_ms",
+        "queries", "db_ms",
+    )
+
+    def get(self, request, *args, **kwargs):
+        return Response(
+            [
+                {name: profile[name] for name in self.summary_fields}
+                for profile in profiles.list()
+            ]
+        )
+
+
+class ProfileDetailAPIView(APIView):
+    """
+    API endpoint returning a request profile, see `ProfileListAPIView`.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk, *args, **kwargs):
+        profile = profiles.get(pk)
+        if profile is None:
+            raise Http404
+        return Response(profile)